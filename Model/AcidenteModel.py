@@ -1,63 +1,436 @@
 import sqlite3
+import logging
+import time
 import pandas as pd
 import os
+from contextlib import nullcontext
+from Model.CuboModel import CuboModel, CONDICAO_CUBO
+from Model.IndiceEspacialModel import IndiceEspacialModel
+from Model.ManifestoModel import ManifestoModel
+from Model.GerenciadorConexoes import gerenciador_conexoes
+from suporte.Instrumentacao import instrumentacao
+
+# Versão do schema gravada em PRAGMA user_version. Bancos com versão menor
+# guardam os dados como vieram da planilha e precisam de limpeza na leitura
+# até serem atualizados com `python manutencao_bancos.py atualizar`. A partir
+# da versão 1 os dados são tipados; a 2 acrescenta as colunas de controle e
+# a 3, a br e o km em colunas numéricas (br_numero, km_numero).
+VERSAO_SCHEMA = 3
+VERSAO_TIPADA = 1
+
+# Índices mantidos após cada carga. Todas as consultas filtram por uf, por isso
+# ela abre cada índice; o de município também cobre as somas do detalhamento
+# por município, que é respondido só com o índice, sem ler a tabela.
+INDICES = {
+    "idx_acidentes_municipio": "uf, municipio, feridos_graves, mortos, veiculos",
+    "idx_acidentes_data": "uf, data_inversa",
+    "idx_acidentes_causa": "uf, causa_acidente",
+    "idx_acidentes_tipo": "uf, tipo_acidente",
+    "idx_acidentes_classificacao": "uf, classificacao_acidente",
+    "idx_acidentes_tipo_pista": "uf, tipo_pista",
+    "idx_acidentes_dia_semana": "uf, dia_semana",
+    "idx_acidentes_trecho": "uf, br_numero, km_numero",
+}
+
+# Índice usado pela carga incremental para achar as linhas já gravadas
+INDICES_CARGA = {
+    "idx_acidentes_chave": "chave",
+}
+
+# Colunas gravadas na tabela acidentes, com o tipo de cada uma. Colunas da
+# planilha fora desta lista são descartadas na leitura.
+COLUNAS_ACIDENTES = {
+    "id": "INTEGER",
+    "data_inversa": "TEXT",
+    "dia_semana": "TEXT",
+    "horario": "TEXT",
+    "hora": "INTEGER",
+    "uf": "TEXT",
+    "br": "TEXT",
+    "km": "TEXT",
+    "br_numero": "INTEGER",
+    "km_numero": "REAL",
+    "municipio": "TEXT",
+    "causa_acidente": "TEXT",
+    "tipo_acidente": "TEXT",
+    "classificacao_acidente": "TEXT",
+    "fase_dia": "TEXT",
+    "sentido_via": "TEXT",
+    "condicao_metereologica": "TEXT",
+    "tipo_pista": "TEXT",
+    "tracado_via": "TEXT",
+    "uso_solo": "TEXT",
+    "pessoas": "INTEGER",
+    "mortos": "INTEGER",
+    "feridos_leves": "INTEGER",
+    "feridos_graves": "INTEGER",
+    "ilesos": "INTEGER",
+    "ignorados": "INTEGER",
+    "feridos": "INTEGER",
+    "veiculos": "INTEGER",
+    "latitude": "REAL",
+    "longitude": "REAL",
+    "regional": "TEXT",
+    "delegacia": "TEXT",
+    "uop": "TEXT",
+    "chave": "TEXT",
+    "hash_linha": "INTEGER",
+}
+
+# Colunas de controle da carga incremental: chave identifica o acidente (o id
+# da PRF ou, sem ele, o hash do conteúdo) e hash_linha detecta alterações.
+# Não fazem parte dos dados lidos pelas páginas.
+COLUNAS_CONTROLE = ["chave", "hash_linha"]
+
+# Quantidade de chaves consultadas por vez (limite de parâmetros do SQLite)
+TAMANHO_LOTE_CHAVES = 500
+
+
+# Ajustes da conexão durante uma carga: WAL e synchronous=NORMAL evitam o
+# fsync a cada página, e o cache maior com temporários em memória acelera a
+# criação dos índices no fim. Ao concluir, voltam os valores padrão do SQLite
+# (e o journal DELETE, para o banco continuar sendo um único arquivo).
+PRAGMAS_CARGA = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -131072,  # 128 MB
+    "temp_store": "MEMORY",
+}
+PRAGMAS_PADRAO = {
+    "journal_mode": "DELETE",
+    "synchronous": "FULL",
+    "cache_size": -2000,
+    "temp_store": "DEFAULT",
+}
+
 
 class AcidenteModel:
-    def __init__(self, db_path):
-       
-        db_dir = os.path.dirname(db_path)
-        if db_dir:
-            os.makedirs(db_dir, exist_ok=True)
+    CONSULTA_GEOLOCALIZADOS = """
+        SELECT * FROM acidentes
+        WHERE uf = ? AND latitude IS NOT NULL AND longitude IS NOT NULL
+    """
 
-        self.conn = sqlite3.connect(db_path)
-        self.create_table()
+    # Sem escrita, cada leitura usa uma conexão somente leitura reaproveitada
+    # do gerenciador_conexoes. Com escrita=True o modelo deve ser usado em um
+    # bloco with, que reserva a conexão de escrita do banco (e cria a tabela).
+    def __init__(self, db_path, escrita=False):
+        self.db_path = db_path
+        self.escrita = escrita
+        self.conn = None
 
+    def __enter__(self):
+        if self.escrita:
+            db_dir = os.path.dirname(self.db_path)
+            if db_dir:
+                os.makedirs(db_dir, exist_ok=True)
+
+            self.conn = gerenciador_conexoes.reservar_escrita(self.db_path)
+            try:
+                self._preparar_escrita()
+            except Exception:
+                self.__exit__(None, None, None)
+                raise
+        return self
+
+    def __exit__(self, tipo, valor, rastreamento):
+        if self.conn is not None:
+            if self.conn.in_transaction:
+                self.conn.rollback()
+            self.conn = None
+            gerenciador_conexoes.liberar_escrita(self.db_path)
+
+    def _preparar_escrita(self):
+        if not self.tabela_existe():
+            self.create_table()
+            self.definir_versao_schema(VERSAO_SCHEMA)
+        self.conn.commit()
+
+    def _conexao(self):
+        if self.conn is not None:
+            return nullcontext(self.conn)
+        return gerenciador_conexoes.leitura(self.db_path)
+
+    def consultar(self, query, params=()):
+        with instrumentacao.medir_consulta(self.db_path, query) as medicao, self._conexao() as conn:
+            resultado = pd.read_sql(query, conn, params=params)
+            medicao.registrar(resultado)
+            return resultado
 
     def create_table(self):
-        query = """
+        colunas = ",\n            ".join(f"{nome} {tipo}" for nome, tipo in COLUNAS_ACIDENTES.items())
+        query = f"""
         CREATE TABLE IF NOT EXISTS acidentes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            data_inversa TEXT,
-            dia_semana TEXT,
-            horario TEXT,
-            uf TEXT,
-            br TEXT,
-            km TEXT,
-            municipio TEXT,
-            causa_acidente TEXT,
-            tipo_acidente TEXT,
-            classificacao_acidente TEXT,
-            fase_dia TEXT,
-            sentido_via TEXT,
-            condicao_metereologica TEXT,
-            tipo_pista TEXT,
-            tracado_via TEXT,
-            uso_solo TEXT,
-            pessoas INTEGER,
-            mortos INTEGER,
-            feridos_leves INTEGER,
-            feridos_graves INTEGER,
-            ilesos INTEGER,
-            ignorados INTEGER,
-            feridos INTEGER,
-            veiculos INTEGER,
-            latitude REAL,
-            longitude REAL,
-            regional TEXT,
-            delegacia TEXT,
-            uop TEXT
+            {colunas}
         );
         """
         self.conn.execute(query)
+
+    def tabela_existe(self):
+        query = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'acidentes'"
+        with self._conexao() as conn:
+            return conn.execute(query).fetchone() is not None
+
+    def colunas(self):
+        with self._conexao() as conn:
+            return [linha[1] for linha in conn.execute("PRAGMA table_info(acidentes)")]
+
+    def versao_schema(self):
+        with self._conexao() as conn:
+            return conn.execute("PRAGMA user_version").fetchone()[0]
+
+    def cubo_atualizado(self):
+        with self._conexao() as conn:
+            return CuboModel(conn).atualizado()
+
+    def cubos_disponiveis(self):
+        with self._conexao() as conn:
+            return CuboModel(conn).disponiveis()
+
+    def versao_dados(self):
+        with self._conexao() as conn:
+            return ManifestoModel(conn).versao()
+
+    def carga_identica(self, hash_arquivo, substituir=True):
+        with self._conexao() as conn:
+            return ManifestoModel(conn).carga_identica(hash_arquivo, substituir)
+
+    def listar_manifesto(self):
+        with self._conexao() as conn:
+            return ManifestoModel(conn).listar()
+
+    def indice_espacial_atualizado(self):
+        with self._conexao() as conn:
+            return IndiceEspacialModel(conn).atualizado()
+
+    def buscar_retangulo(self, lat_min, lat_max, lon_min, lon_max, colunas=None):
+        # Acidentes do Pará dentro do retângulo, pelo índice espacial
+        existentes = self.colunas()
+        if colunas is None:
+            colunas = [c for c in existentes if c not in COLUNAS_CONTROLE]
+        colunas = [c for c in colunas if c in existentes]
+        limites = (lat_min, lat_max, lon_min, lon_max)
+        return self.consultar(IndiceEspacialModel.consulta_retangulo(colunas), limites + limites)
+
+    def buscar_trecho(self, br, km_inicio, km_fim, colunas=None):
+        # Acidentes do Pará com coordenadas na br entre km_inicio (inclusive)
+        # e km_fim, os mesmos somados no cubo por trecho; pelo índice
+        # idx_acidentes_trecho
+        existentes = self.colunas()
+        if colunas is None:
+            colunas = [c for c in existentes if c not in COLUNAS_CONTROLE]
+        selecao = ", ".join(c for c in colunas if c in existentes)
+        return self.consultar(
+            f"SELECT {selecao} FROM acidentes "
+            f"WHERE {CONDICAO_CUBO} AND br_numero = ? AND km_numero >= ? AND km_numero < ? "
+            f"ORDER BY km_numero",
+            (int(br), float(km_inicio), float(km_fim)))
+
+    def definir_versao_schema(self, versao):
+        self.conn.execute(f"PRAGMA user_version = {int(versao)}")
+
+    def inserir_dados(self, df: pd.DataFrame, substituir=True, registro=None):
+        # Carga de um único quadro; para vários blocos use iniciar_carga,
+        # inserir_bloco e concluir_carga
+        self.iniciar_carga(substituir)
+        try:
+            self.inserir_bloco(df)
+        except Exception:
+            self.cancelar_carga()
+            raise
+        return self.concluir_carga(registro)
+
+    def iniciar_carga(self, substituir=True):
+        # Toda a carga fica em uma transação: ou o arquivo inteiro é gravado, ou
+        # o banco continua como estava. Substituindo o ano, os índices só são
+        # criados no fim; na carga incremental (mesclar_bloco) eles são mantidos
+        # e atualizados pelo SQLite junto com as linhas alteradas. Removê-los e
+        # recriá-los no fim custa mais que atualizá-los, mesmo anexando ao ano
+        # dez vezes as linhas que ele já tinha.
+        self._aplicar_pragmas(PRAGMAS_CARGA)
+        self.conn.execute("BEGIN")
+        try:
+            if substituir:
+                self.conn.execute("DROP TABLE IF EXISTS acidentes")
+                self.create_table()
+                self.definir_versao_schema(VERSAO_SCHEMA)
+                CuboModel(self.conn).recriar()
+                IndiceEspacialModel(self.conn).recriar()
+            elif not CuboModel(self.conn).existe():
+                # Falta algum cubo (mais novo que o banco): o cubo é recriado
+                # vazio e somado por inteiro em concluir_carga
+                CuboModel(self.conn).recriar()
+        except Exception:
+            self.cancelar_carga()
+            raise
+
+        self._substituir = substituir
+        self._colunas_carga = self.colunas()
+        self._resumo_carga = {"inseridas": 0, "atualizadas": 0, "inalteradas": 0}
+        self._inicio_carga = time.perf_counter()
+        self._relogio_carga = time.time()
+
+    def inserir_bloco(self, df: pd.DataFrame):
+        # executemany com o bloco inteiro; os valores vão como tipos do Python
+        # (None para nulos), já que o sqlite3 não aceita os escalares do numpy
+        colunas = [c for c in self._colunas_carga if c in df.columns]
+        valores = [df[c].astype(object).where(df[c].notna(), None).tolist() for c in colunas]
+        query = (f"INSERT INTO acidentes ({', '.join(colunas)}) "
+                 f"VALUES ({', '.join('?' * len(colunas))})")
+        self.conn.executemany(query, zip(*valores))
+        self._resumo_carga["inseridas"] += len(df)
+
+    def mesclar_bloco(self, df: pd.DataFrame):
+        # Carga incremental: compara cada linha com a gravada sob a mesma chave.
+        # Linhas novas são inseridas; as alteradas são inseridas de novo e a
+        # versão antiga é subtraída do cubo e apagada; as iguais são ignoradas.
+        df = df.drop_duplicates("chave", keep="last")
+        gravadas = {}
+        chaves = df["chave"].tolist()
+        for i in range(0, len(chaves), TAMANHO_LOTE_CHAVES):
+            lote = chaves[i:i + TAMANHO_LOTE_CHAVES]
+            for chave, hash_linha, linha in self.conn.execute(
+                    f"SELECT chave, hash_linha, rowid FROM acidentes "
+                    f"WHERE chave IN ({', '.join('?' * len(lote))})", lote):
+                gravadas.setdefault(chave, []).append((hash_linha, linha))
+
+        existentes = df["chave"].isin(gravadas.keys())
+        inalteradas = pd.Series([
+            any(h == hash_linha for h, _ in gravadas.get(chave, ()))
+            for chave, hash_linha in zip(df["chave"], df["hash_linha"])], index=df.index, dtype=bool)
+        alteradas = existentes & ~inalteradas
+        substituidas = [linha for chave in df.loc[alteradas, "chave"] for _, linha in gravadas[chave]]
+
+        # Insere antes de apagar, para que o SQLite não reaproveite o rowid de
+        # uma linha apagada (o cubo soma só rowids maiores que o último somado)
+        self.inserir_bloco(df[~inalteradas])
+        self._resumo_carga["inseridas"] -= int(alteradas.sum())
+        if substituidas:
+            self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS linhas_substituidas (linha INTEGER PRIMARY KEY)")
+            self.conn.execute("DELETE FROM temp.linhas_substituidas")
+            self.conn.executemany("INSERT INTO temp.linhas_substituidas VALUES (?)",
+                                  ((linha,) for linha in substituidas))
+            # Só as linhas que o cubo já somou são subtraídas dele
+            CuboModel(self.conn).subtrair(
+                "rowid IN (SELECT linha FROM temp.linhas_substituidas) AND rowid <= ?",
+                (CuboModel(self.conn).ultimo_rowid(),))
+            if IndiceEspacialModel(self.conn).existe():
+                IndiceEspacialModel(self.conn).remover("SELECT linha FROM temp.linhas_substituidas")
+            self.conn.execute(
+                "DELETE FROM acidentes WHERE rowid IN (SELECT linha FROM temp.linhas_substituidas)")
+
+        self._resumo_carga["atualizadas"] += int(alteradas.sum())
+        self._resumo_carga["inalteradas"] += int(inalteradas.sum())
+
+    def concluir_carga(self, registro=None):
+        # Soma as linhas novas ao cubo, cria os índices, registra a carga no
+        # manifesto e confirma a transação. registro: dados do arquivo enviado
+        # (hash_arquivo, nome_arquivo, tamanho_bytes, linhas_lidas,
+        # linhas_mantidas e, opcionalmente, o modo). Devolve as linhas
+        # inseridas, atualizadas e inalteradas e os segundos.
+        registro = dict(registro or {})
+        modo = registro.pop("modo", None) or ("substituir" if self._substituir else "incremental")
+        try:
+            cubo = CuboModel(self.conn)
+            if not cubo.existe():
+                cubo.recriar()
+            cubo.acumular()
+            indice_espacial = IndiceEspacialModel(self.conn)
+            if not indice_espacial.existe():
+                indice_espacial.recriar()
+            indice_espacial.acumular()
+            for nome, colunas in {**INDICES, **INDICES_CARGA}.items():
+                self.conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS {nome} ON acidentes ({colunas})")
+            segundos = time.perf_counter() - self._inicio_carga
+            ManifestoModel(self.conn).registrar(
+                registro, modo, self._resumo_carga, self._relogio_carga, segundos)
+            self.conn.commit()
+        except Exception:
+            self.cancelar_carga()
+            raise
+
+        # ANALYZE percorre o ano inteiro; na carga incremental o optimize só
+        # refaz as estatísticas se a tabela tiver mudado bastante
+        self.conn.execute("ANALYZE" if self._substituir else "PRAGMA optimize")
         self.conn.commit()
+        self._restaurar_pragmas()
+        return dict(self._resumo_carga, segundos=segundos)
 
-    def inserir_dados(self, df: pd.DataFrame):
-        df.to_sql("acidentes", self.conn, if_exists="replace", index=False)
+    def cancelar_carga(self):
+        self.conn.rollback()
+        self._restaurar_pragmas()
+
+    def _restaurar_pragmas(self):
+        # Passa o conteúdo do WAL para o arquivo do banco antes de voltar ao
+        # journal DELETE. Conexões de leitura de outros processos impedem a
+        # troca; nesse caso o banco segue em WAL, já com tudo no arquivo principal.
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+        gerenciador_conexoes.fechar_livres(self.db_path)
+        self._aplicar_pragmas(PRAGMAS_PADRAO)
+
+    def _aplicar_pragmas(self, pragmas):
+        for nome, valor in pragmas.items():
+            try:
+                self.conn.execute(f"PRAGMA {nome} = {valor}").fetchall()
+            except sqlite3.OperationalError as e:
+                logging.info("PRAGMA %s = %s não aplicado em %s: %s", nome, valor, self.db_path, e)
+
+    def atualizar_cubo(self):
+        # Soma ao cubo só as linhas que ainda não foram somadas; bancos sem
+        # cubo (gravados antes dele existir) têm o cubo criado do zero. O mesmo
+        # vale para o índice espacial.
+        cubo = CuboModel(self.conn)
+        indice_espacial = IndiceEspacialModel(self.conn)
+        with self.conn:
+            if not cubo.existe():
+                cubo.recriar()
+            cubo.acumular()
+            if not indice_espacial.existe():
+                indice_espacial.recriar()
+            indice_espacial.acumular()
+
+    def criar_indices(self):
+        for nome, colunas in {**INDICES, **INDICES_CARGA}.items():
+            self.conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {nome} ON acidentes ({colunas})")
+        # Atualiza as estatísticas usadas pelo planejador para escolher os índices
+        self.conn.execute("ANALYZE")
+        self.conn.commit()
+
+    def aquecer(self):
+        # Percorre cada tabela e índice do banco para trazer as páginas para o
+        # cache do sistema, de onde as conexões de leitura (com mmap) leem sem cópia
+        with self._conexao() as conn:
+            objetos = conn.execute(
+                "SELECT type, name, tbl_name FROM sqlite_master "
+                "WHERE type IN ('table', 'index') AND sql IS NOT NULL").fetchall()
+            for tipo, nome, tabela in objetos:
+                if tipo == "table":
+                    conn.execute(f"SELECT COUNT(*) FROM {nome} NOT INDEXED").fetchone()
+                else:
+                    # COUNT de uma coluna do índice, para o SQLite percorrer o
+                    # próprio índice em vez do menor deles
+                    coluna = conn.execute(f"PRAGMA index_info({nome})").fetchone()[2]
+                    conn.execute(f"SELECT COUNT({coluna}) FROM {tabela} INDEXED BY {nome}").fetchone()
+        return len(objetos)
+
+    def explicar(self, query, params=()):
+        with self._conexao() as conn:
+            return [linha[3] for linha in conn.execute(f"EXPLAIN QUERY PLAN {query}", params)]
 
 
     def listar_acidentes(self):
-        return pd.read_sql("SELECT * FROM acidentes", self.conn)
+        return self.consultar("SELECT * FROM acidentes")
 
     def listar_por_uf(self, uf="PA"):
         query = f"SELECT * FROM acidentes WHERE uf = ?"
-        return pd.read_sql(query, self.conn, params=(uf,))
\ No newline at end of file
+        return self.consultar(query, (uf,))
+
+    def listar_geolocalizados(self, uf="PA", colunas=None):
+        query = self.CONSULTA_GEOLOCALIZADOS
+        existentes = self.colunas()
+        if colunas is None:
+            colunas = [c for c in existentes if c not in COLUNAS_CONTROLE]
+        selecao = ", ".join(c for c in colunas if c in existentes)
+        query = query.replace("SELECT *", f"SELECT {selecao}", 1)
+        return self.consultar(query, (uf,))
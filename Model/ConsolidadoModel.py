@@ -0,0 +1,115 @@
+import os
+from Model.AcidenteModel import AcidenteModel, INDICES, COLUNAS_ACIDENTES
+
+# Banco único com todos os anos. Cada ano é uma partição (coluna ano) copiada
+# do respectivo data/acidentes_<ano>.db; a tabela particoes guarda de qual
+# versão dos dados de origem (schema e manifesto) cada partição foi copiada.
+CAMINHO_CONSOLIDADO = "data/consolidado/acidentes.db"
+
+INDICES_PARTICAO = {
+    "idx_consolidado_ano": "ano",
+    "idx_consolidado_uf_ano": "uf, ano, feridos_graves, mortos, veiculos, pessoas, feridos",
+}
+
+
+class ConsolidadoModel(AcidenteModel):
+    def __init__(self, db_path=CAMINHO_CONSOLIDADO, escrita=False):
+        super().__init__(db_path, escrita)
+
+    def _preparar_escrita(self):
+        super()._preparar_escrita()
+        # Colunas acrescentadas ao schema depois que o consolidado foi criado;
+        # ficam nulas até a partição ser copiada de novo do banco atualizado
+        existentes = self.colunas()
+        for nome, tipo in COLUNAS_ACIDENTES.items():
+            if nome not in existentes:
+                self.conn.execute(f"ALTER TABLE acidentes ADD COLUMN {nome} {tipo}")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS particoes (
+                ano TEXT PRIMARY KEY,
+                origem TEXT,
+                mtime_ns INTEGER,
+                tamanho INTEGER,
+                linhas INTEGER
+            )
+        """)
+        # Consolidados anteriores à coluna versao: as partições sem ela são
+        # copiadas de novo na próxima sincronização
+        if "versao" not in [linha[1] for linha in self.conn.execute("PRAGMA table_info(particoes)")]:
+            self.conn.execute("ALTER TABLE particoes ADD COLUMN versao TEXT")
+        self.conn.commit()
+
+    def create_table(self):
+        super().create_table()
+        if "ano" not in self.colunas():
+            self.conn.execute("ALTER TABLE acidentes ADD COLUMN ano TEXT")
+
+    def criar_indices(self):
+        for nome, colunas in {**INDICES, **INDICES_PARTICAO}.items():
+            self.conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {nome} ON acidentes ({colunas})")
+        self.conn.execute("ANALYZE")
+        self.conn.commit()
+
+    def listar_particoes(self):
+        return self.consultar("SELECT * FROM particoes ORDER BY ano")
+
+    def versoes_particoes(self):
+        # {ano: versão copiada}, sem escrever nada (vazio se o consolidado
+        # ainda não foi criado ou é anterior à coluna versao)
+        if not os.path.exists(self.db_path):
+            return {}
+        with self._conexao() as conn:
+            colunas = [linha[1] for linha in conn.execute("PRAGMA table_info(particoes)")]
+            if "versao" not in colunas:
+                return {}
+            return dict(conn.execute("SELECT ano, versao FROM particoes").fetchall())
+
+    def trocar_particao(self, ano, origem, versao, df=None):
+        # Substitui todas as linhas de um ano em uma única transação. Sem df,
+        # as linhas são copiadas direto do banco do ano via ATTACH.
+        colunas = [c for c in self.colunas() if c != "ano"]
+
+        if df is None:
+            self.conn.execute("ATTACH DATABASE ? AS origem", (origem,))
+            colunas_origem = [linha[1] for linha in self.conn.execute(
+                "PRAGMA origem.table_info(acidentes)")]
+            colunas = [c for c in colunas if c in colunas_origem]
+        else:
+            colunas = [c for c in colunas if c in df.columns]
+
+        try:
+            self.conn.execute("BEGIN IMMEDIATE")
+            self.conn.execute("DELETE FROM acidentes WHERE ano = ?", (ano,))
+
+            lista = ", ".join(colunas)
+            if df is None:
+                cursor = self.conn.execute(
+                    f"INSERT INTO acidentes ({lista}, ano) SELECT {lista}, ? FROM origem.acidentes",
+                    (ano,))
+                linhas = cursor.rowcount
+            else:
+                marcadores = ", ".join("?" * (len(colunas) + 1))
+                registros = df[colunas].astype(object).where(df[colunas].notna(), None)
+                self.conn.executemany(
+                    f"INSERT INTO acidentes ({lista}, ano) VALUES ({marcadores})",
+                    (tuple(r) + (ano,) for r in registros.itertuples(index=False)))
+                linhas = len(df)
+
+            self.conn.execute(
+                "INSERT OR REPLACE INTO particoes (ano, origem, versao, linhas) VALUES (?, ?, ?, ?)",
+                (ano, origem, versao, linhas))
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            if df is None:
+                self.conn.execute("DETACH DATABASE origem")
+
+        return linhas
+
+    def remover_particao(self, ano):
+        with self.conn:
+            self.conn.execute("DELETE FROM acidentes WHERE ano = ?", (ano,))
+            self.conn.execute("DELETE FROM particoes WHERE ano = ?", (ano,))
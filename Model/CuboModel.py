@@ -0,0 +1,139 @@
+# Dimensões calculadas aceitas nas agregações além das colunas da tabela
+DIMENSOES_DERIVADAS = {
+    "mes": "CAST(substr(data_inversa, 6, 2) AS INTEGER)",
+    "hora": "CAST(substr(horario, 1, 2) AS INTEGER)",
+    # Trecho de 1 km da rodovia (o km é sempre positivo)
+    "km_trecho": "CAST(km_numero AS INTEGER)",
+    # Dia da semana pela data (0 = domingo), sem depender do texto de dia_semana
+    "dia_semana_numero": "CAST(strftime('%w', data_inversa) AS INTEGER)",
+}
+
+# Somas guardadas em cada linha do cubo, além da quantidade de acidentes
+MEDIDAS_CUBO = ["pessoas", "mortos", "feridos_leves", "feridos_graves",
+                "ilesos", "ignorados", "feridos", "veiculos"]
+
+# Tabelas de resumo mantidas em cada banco anual: nome -> dimensões. Uma
+# consulta pode ser respondida por qualquer cubo que contenha todas as suas
+# dimensões e filtros, somando as linhas. O total usa uf como chave única.
+CUBOS = {
+    "cubo_total": ["uf"],
+    "cubo_mes": ["mes"],
+    "cubo_dia_semana": ["dia_semana"],
+    "cubo_hora_condicao": ["hora", "condicao_metereologica"],
+    "cubo_municipio_mes": ["municipio", "mes"],
+    "cubo_municipio_tipo": ["municipio", "tipo_acidente"],
+    "cubo_causa": ["causa_acidente"],
+    "cubo_classificacao": ["classificacao_acidente"],
+    "cubo_tipo_pista": ["tipo_pista"],
+    "cubo_veiculos": ["veiculos"],
+    "cubo_trecho": ["br_numero", "km_trecho"],
+    # Séries temporais: por dia e por dia da semana e hora, no estado e por município
+    "cubo_dia": ["data_inversa"],
+    "cubo_municipio_dia": ["municipio", "data_inversa"],
+    "cubo_municipio_hora": ["municipio", "dia_semana_numero", "hora"],
+}
+
+
+# Versão do conteúdo do cubo, gravada em cubo_estado. A 2 soma só os
+# acidentes com coordenadas (como as páginas, que sempre contaram as linhas que
+# passam pela limpeza das coordenadas); cubos de versão menor são recriados
+# na próxima carga ou no atualizar e, até lá, as consultas leem acidentes.
+VERSAO_CUBO = 2
+
+# Linhas somadas no cubo e nas agregações direto sobre acidentes
+CONDICAO_CUBO = "uf = 'PA' AND latitude IS NOT NULL AND longitude IS NOT NULL"
+
+
+# Cubo de agregados (contagem e somas por dimensão) de um banco anual, só com
+# as linhas do Pará que têm coordenadas. É atualizado de forma incremental: cubo_estado guarda o
+# maior rowid de acidentes já somado, e cada carga soma só as linhas novas.
+# Linhas substituídas numa carga incremental são subtraídas antes de apagadas.
+class CuboModel:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def _tabelas(self):
+        return {linha[0] for linha in self.conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+    def existe(self):
+        tabelas = self._tabelas()
+        return ("cubo_estado" in tabelas and all(nome in tabelas for nome in CUBOS)
+                and self._versao() == VERSAO_CUBO)
+
+    def _versao(self):
+        # Cubos anteriores à versão não têm a coluna
+        colunas = {linha[1] for linha in self.conn.execute("PRAGMA table_info(cubo_estado)")}
+        if "versao" not in colunas:
+            return 1
+        return self.conn.execute("SELECT versao FROM cubo_estado").fetchone()[0]
+
+    def ultimo_rowid(self):
+        return self.conn.execute("SELECT ultimo_rowid FROM cubo_estado").fetchone()[0]
+
+    def atualizado(self):
+        if not self.existe():
+            return False
+        return self._em_dia()
+
+    def disponiveis(self):
+        # Cubos que podem responder consultas. Um banco gravado antes de um cubo
+        # novo continua usando os que já tem até a próxima carga ou o atualizar.
+        tabelas = self._tabelas()
+        if "cubo_estado" not in tabelas or self._versao() != VERSAO_CUBO or not self._em_dia():
+            return []
+        return [nome for nome in CUBOS if nome in tabelas]
+
+    def _em_dia(self):
+        maior = self.conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM acidentes").fetchone()[0]
+        return self.ultimo_rowid() == maior
+
+    def recriar(self):
+        # Sem commit: é chamado dentro da transação que recria a tabela acidentes
+        medidas = ", ".join(f"soma_{m} INTEGER" for m in MEDIDAS_CUBO)
+        for nome, dimensoes in CUBOS.items():
+            self.conn.execute(f"DROP TABLE IF EXISTS {nome}")
+            self.conn.execute(
+                f"CREATE TABLE {nome} ({', '.join(dimensoes)}, total_acidentes INTEGER, {medidas})")
+            # Linhas com dimensão nula não conflitam no índice único e podem se
+            # repetir; como as consultas sempre somam com GROUP BY, o total não muda
+            self.conn.execute(
+                f"CREATE UNIQUE INDEX idx_{nome} ON {nome} ({', '.join(dimensoes)})")
+
+        self.conn.execute("DROP TABLE IF EXISTS cubo_estado")
+        self.conn.execute("CREATE TABLE cubo_estado (ultimo_rowid INTEGER, versao INTEGER)")
+        self.conn.execute("INSERT INTO cubo_estado VALUES (0, ?)", (VERSAO_CUBO,))
+
+    def acumular(self):
+        # Soma ao cubo as linhas de acidentes com rowid maior que o último somado.
+        # Sem commit, para entrar na mesma transação da carga.
+        inicio = self.ultimo_rowid()
+        fim = self.conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM acidentes").fetchone()[0]
+        if fim <= inicio:
+            return
+
+        self._somar("rowid > ? AND rowid <= ?", (inicio, fim), 1)
+        self.conn.execute("UPDATE cubo_estado SET ultimo_rowid = ?", (fim,))
+
+    def subtrair(self, condicao, params=()):
+        # Tira do cubo as linhas de acidentes que atendem à condição; chamado
+        # antes de elas serem apagadas, na mesma transação
+        self._somar(condicao, params, -1)
+        for nome in CUBOS:
+            self.conn.execute(f"DELETE FROM {nome} WHERE total_acidentes = 0")
+
+    def _somar(self, condicao, params, sinal):
+        somas = ", ".join(f"{sinal} * COALESCE(SUM({m}), 0)" for m in MEDIDAS_CUBO)
+        colunas_medidas = ["total_acidentes"] + [f"soma_{m}" for m in MEDIDAS_CUBO]
+        atualizacao = ", ".join(f"{c} = {c} + excluded.{c}" for c in colunas_medidas)
+
+        colunas = {linha[1] for linha in self.conn.execute("PRAGMA table_info(acidentes)")}
+        for nome, dimensoes in CUBOS.items():
+            expressoes = ", ".join(d if d in colunas else DIMENSOES_DERIVADAS[d] for d in dimensoes)
+            self.conn.execute(f"""
+                INSERT INTO {nome} ({', '.join(dimensoes)}, {', '.join(colunas_medidas)})
+                SELECT {expressoes}, {sinal} * COUNT(*), {somas} FROM acidentes
+                WHERE ({condicao}) AND {CONDICAO_CUBO}
+                GROUP BY {expressoes}
+                ON CONFLICT ({', '.join(dimensoes)}) DO UPDATE SET {atualizacao}
+            """, params)
@@ -0,0 +1,169 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from urllib.request import pathname2url
+
+# Tamanho máximo de cada banco lido por mapeamento em memória (mmap) nas
+# conexões de leitura; 0 desliga. Pode ser ajustado por servidor com a
+# variável TRANSITO_MMAP_MB.
+MMAP_PADRAO_MB = int(os.environ.get("TRANSITO_MMAP_MB", "256"))
+
+# Conexões paradas há mais tempo que isso (em segundos) são fechadas
+TEMPO_OCIOSO = 300
+
+# Conexões de leitura livres guardadas por banco; as excedentes são fechadas
+MAXIMO_LIVRES = 4
+
+
+# Conexões SQLite reaproveitadas por todas as sessões do processo, por caminho
+# de banco. As de leitura são abertas em modo somente leitura (mode=ro e
+# query_only) e cada uma é usada por uma thread de cada vez: quem pede recebe
+# uma conexão livre ou uma nova, e a devolve no fim. A escrita usa uma conexão
+# própria por banco, reservada por uma thread de cada vez. Conexões ociosas são
+# fechadas na próxima vez que o gerenciador é usado.
+class GerenciadorConexoes:
+    def __init__(self, tempo_ocioso=TEMPO_OCIOSO, maximo_livres=MAXIMO_LIVRES, mmap_mb=MMAP_PADRAO_MB):
+        self.tempo_ocioso = tempo_ocioso
+        self.maximo_livres = maximo_livres
+        self.mmap_bytes = max(0, mmap_mb) * 1024 * 1024
+
+        # caminho -> [(conexão, identidade do arquivo, último uso)]
+        self._livres = {}
+        # caminho -> [conexão, identidade do arquivo, último uso, reservas]
+        self._escrita = {}
+        self._travas_escrita = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def leitura(self, caminho):
+        caminho = os.path.abspath(caminho)
+        identidade = self._identidade(caminho)
+        conexao = self._retirar(caminho, identidade)
+
+        descartar = False
+        try:
+            yield conexao
+        except sqlite3.Error:
+            # Depois de um erro do SQLite a conexão não é reaproveitada
+            descartar = True
+            raise
+        finally:
+            if descartar or conexao.in_transaction:
+                conexao.close()
+            else:
+                self._devolver(caminho, identidade, conexao)
+
+    def reservar_escrita(self, caminho):
+        # Devolve a conexão de escrita do banco, que fica reservada para a
+        # thread atual até liberar_escrita (a mesma thread pode reservar de novo)
+        caminho = os.path.abspath(caminho)
+        with self._lock:
+            trava = self._travas_escrita.setdefault(caminho, threading.RLock())
+        trava.acquire()
+
+        try:
+            with self._lock:
+                item = self._escrita.pop(caminho, None)
+            if item is not None and not item[3] and item[1] != self._identidade(caminho):
+                item[0].close()
+                item = None
+            if item is None:
+                conexao = sqlite3.connect(caminho, check_same_thread=False)
+                item = [conexao, self._identidade(caminho), time.monotonic(), 0]
+            item[3] += 1
+            with self._lock:
+                self._escrita[caminho] = item
+        except Exception:
+            trava.release()
+            raise
+        return item[0]
+
+    def liberar_escrita(self, caminho):
+        caminho = os.path.abspath(caminho)
+        with self._lock:
+            item = self._escrita[caminho]
+            item[2] = time.monotonic()
+            item[3] -= 1
+            trava = self._travas_escrita[caminho]
+        trava.release()
+
+    def fechar_livres(self, caminho=None):
+        # Fecha as conexões de leitura livres (de um banco ou de todos)
+        with self._lock:
+            caminhos = list(self._livres) if caminho is None else [os.path.abspath(caminho)]
+            fechar = [c for p in caminhos for c, _, _ in self._livres.pop(p, [])]
+        for conexao in fechar:
+            conexao.close()
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                "bancos": len(set(self._livres) | set(self._escrita)),
+                "leitura_livres": sum(len(livres) for livres in self._livres.values()),
+                "escrita_abertas": len(self._escrita),
+                "mmap_bytes": self.mmap_bytes,
+            }
+
+    @staticmethod
+    def _identidade(caminho):
+        # Um arquivo apagado e recriado tem outro inode; as conexões abertas no
+        # arquivo antigo deixam de servir
+        try:
+            info = os.stat(caminho)
+            return info.st_dev, info.st_ino
+        except OSError:
+            return None
+
+    def _retirar(self, caminho, identidade):
+        fechar = self._remover_ociosas()
+        conexao = None
+        with self._lock:
+            livres = self._livres.get(caminho, [])
+            while livres and conexao is None:
+                candidata, identidade_candidata, _ = livres.pop()
+                if identidade_candidata == identidade:
+                    conexao = candidata
+                else:
+                    fechar.append(candidata)
+
+        for antiga in fechar:
+            antiga.close()
+        return conexao if conexao is not None else self._abrir_leitura(caminho)
+
+    def _devolver(self, caminho, identidade, conexao):
+        with self._lock:
+            livres = self._livres.setdefault(caminho, [])
+            if len(livres) < self.maximo_livres:
+                livres.append((conexao, identidade, time.monotonic()))
+                return
+        conexao.close()
+
+    def _abrir_leitura(self, caminho):
+        conexao = sqlite3.connect(f"file:{pathname2url(caminho)}?mode=ro",
+                                  uri=True, check_same_thread=False)
+        conexao.execute("PRAGMA query_only = ON")
+        conexao.execute(f"PRAGMA mmap_size = {int(self.mmap_bytes)}")
+        return conexao
+
+    def _remover_ociosas(self):
+        # Tira do gerenciador as conexões ociosas e devolve a lista para fechar
+        # fora da trava
+        limite = time.monotonic() - self.tempo_ocioso
+        fechar = []
+        with self._lock:
+            for caminho, livres in list(self._livres.items()):
+                fechar.extend(c for c, _, uso in livres if uso < limite)
+                livres[:] = [item for item in livres if item[2] >= limite]
+                if not livres:
+                    del self._livres[caminho]
+
+            for caminho, (conexao, _, uso, reservas) in list(self._escrita.items()):
+                if uso < limite and not reservas:
+                    del self._escrita[caminho]
+                    fechar.append(conexao)
+        return fechar
+
+
+gerenciador_conexoes = GerenciadorConexoes()
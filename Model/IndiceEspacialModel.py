@@ -0,0 +1,64 @@
+# Índice espacial (R*Tree do SQLite) das coordenadas das linhas do Pará. Cada
+# acidente com latitude e longitude vira um retângulo de um ponto só, com o
+# id igual ao rowid em acidentes. Como o cubo, é atualizado de forma
+# incremental: espacial_estado guarda o maior rowid já indexado. O R*Tree
+# guarda as coordenadas em float32, arredondadas para fora, então as buscas
+# nele devolvem candidatos e a comparação exata é feita na tabela acidentes.
+class IndiceEspacialModel:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def existe(self):
+        tabelas = {linha[0] for linha in self.conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'")}
+        return "acidentes_espacial" in tabelas and "espacial_estado" in tabelas
+
+    def ultimo_rowid(self):
+        return self.conn.execute("SELECT ultimo_rowid FROM espacial_estado").fetchone()[0]
+
+    def atualizado(self):
+        if not self.existe():
+            return False
+        maior = self.conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM acidentes").fetchone()[0]
+        return self.ultimo_rowid() == maior
+
+    def recriar(self):
+        # Sem commit: é chamado dentro da transação da carga
+        self.conn.execute("DROP TABLE IF EXISTS acidentes_espacial")
+        self.conn.execute(
+            "CREATE VIRTUAL TABLE acidentes_espacial USING rtree(id, min_lat, max_lat, min_lon, max_lon)")
+        self.conn.execute("DROP TABLE IF EXISTS espacial_estado")
+        self.conn.execute("CREATE TABLE espacial_estado (ultimo_rowid INTEGER)")
+        self.conn.execute("INSERT INTO espacial_estado VALUES (0)")
+
+    def acumular(self):
+        # Indexa as linhas com rowid maior que o último indexado
+        inicio = self.ultimo_rowid()
+        fim = self.conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM acidentes").fetchone()[0]
+        if fim <= inicio:
+            return
+
+        self.conn.execute("""
+            INSERT INTO acidentes_espacial (id, min_lat, max_lat, min_lon, max_lon)
+            SELECT rowid, latitude, latitude, longitude, longitude FROM acidentes
+            WHERE rowid > ? AND rowid <= ? AND uf = 'PA'
+              AND latitude IS NOT NULL AND longitude IS NOT NULL
+        """, (inicio, fim))
+        self.conn.execute("UPDATE espacial_estado SET ultimo_rowid = ?", (fim,))
+
+    def remover(self, linhas):
+        # linhas: subconsulta com os rowids de acidentes que serão apagados
+        self.conn.execute(f"DELETE FROM acidentes_espacial WHERE id IN ({linhas})")
+
+    @staticmethod
+    def consulta_retangulo(colunas):
+        # Linhas de acidentes dentro do retângulo (lat_min, lat_max, lon_min,
+        # lon_max); os parâmetros vão duas vezes, para o índice e para a
+        # comparação exata
+        selecao = ", ".join(f"a.{c}" for c in colunas)
+        return f"""
+            SELECT {selecao} FROM acidentes_espacial e
+            JOIN acidentes a ON a.rowid = e.id
+            WHERE e.max_lat >= ? AND e.min_lat <= ? AND e.max_lon >= ? AND e.min_lon <= ?
+              AND a.latitude BETWEEN ? AND ? AND a.longitude BETWEEN ? AND ?
+        """
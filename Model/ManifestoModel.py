@@ -0,0 +1,87 @@
+from datetime import datetime
+
+
+# Manifesto de um banco anual: uma linha por carga confirmada, com o hash
+# (SHA-256) do arquivo enviado, as contagens de linhas e os horários. O modo é
+# substituir, incremental ou atualizacao (a conversão feita por
+# `manutencao_bancos.py atualizar`, que não vem de um arquivo enviado). A
+# versão dos dados é o id e o horário da última carga que alterou as linhas;
+# os caches de leitura (memória e cópia Parquet) comparam essa versão em vez
+# do mtime do arquivo, que muda também com ANALYZE e checkpoints.
+class ManifestoModel:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def existe(self):
+        return self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'manifesto'").fetchone() is not None
+
+    def criar(self):
+        # AUTOINCREMENT: ids nunca são reaproveitados, então a versão não se
+        # repete mesmo que linhas do manifesto sejam apagadas à mão
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS manifesto (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                hash_arquivo TEXT,
+                nome_arquivo TEXT,
+                tamanho_bytes INTEGER,
+                modo TEXT,
+                linhas_lidas INTEGER,
+                linhas_mantidas INTEGER,
+                inseridas INTEGER,
+                atualizadas INTEGER,
+                inalteradas INTEGER,
+                alterou INTEGER,
+                inicio TEXT,
+                fim TEXT,
+                segundos REAL
+            )
+        """)
+
+    def registrar(self, registro, modo, resumo, inicio, segundos):
+        # Sem commit: entra na mesma transação da carga
+        self.criar()
+        alterou = modo != "incremental" or bool(resumo["inseridas"] or resumo["atualizadas"])
+        self.conn.execute("""
+            INSERT INTO manifesto (hash_arquivo, nome_arquivo, tamanho_bytes, modo, linhas_lidas,
+                                   linhas_mantidas, inseridas, atualizadas, inalteradas, alterou,
+                                   inicio, fim, segundos)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (registro.get("hash_arquivo"), registro.get("nome_arquivo"), registro.get("tamanho_bytes"),
+              modo, registro.get("linhas_lidas"), registro.get("linhas_mantidas"),
+              resumo["inseridas"], resumo["atualizadas"], resumo["inalteradas"], int(alterou),
+              datetime.fromtimestamp(inicio).isoformat(timespec="seconds"),
+              datetime.now().isoformat(timespec="seconds"), segundos))
+
+    def versao(self):
+        if not self.existe():
+            return None
+        linha = self.conn.execute(
+            "SELECT id, fim FROM manifesto WHERE alterou = 1 ORDER BY id DESC LIMIT 1").fetchone()
+        return None if linha is None else f"{linha[0]}:{linha[1]}"
+
+    def carga_identica(self, hash_arquivo, substituir):
+        # Última carga de arquivo que alterou os dados. Reenviar o mesmo arquivo
+        # não muda nada se ele foi o último aplicado; para substituir o ano, a
+        # carga anterior também precisa ter sido completa.
+        if not self.existe():
+            return None
+        cursor = self.conn.execute("""
+            SELECT * FROM manifesto
+            WHERE alterou = 1 AND modo != 'atualizacao'
+            ORDER BY id DESC LIMIT 1
+        """)
+        linha = cursor.fetchone()
+        if linha is None:
+            return None
+        carga = dict(zip([c[0] for c in cursor.description], linha))
+        if carga["hash_arquivo"] != hash_arquivo or (substituir and carga["modo"] != "substituir"):
+            return None
+        return carga
+
+    def listar(self):
+        if not self.existe():
+            return []
+        cursor = self.conn.execute("SELECT * FROM manifesto ORDER BY id")
+        colunas = [c[0] for c in cursor.description]
+        return [dict(zip(colunas, linha)) for linha in cursor]
@@ -0,0 +1,84 @@
+import os
+import tempfile
+import pandas as pd
+from suporte.Instrumentacao import instrumentacao
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# Colunas de texto com poucos valores distintos; no Parquet viram colunas com
+# dicionário e voltam para o pandas como category
+COLUNAS_CATEGORICAS = [
+    "dia_semana", "uf", "br", "municipio", "causa_acidente", "tipo_acidente",
+    "classificacao_acidente", "fase_dia", "sentido_via", "condicao_metereologica",
+    "tipo_pista", "tracado_via", "uso_solo", "regional", "delegacia", "uop",
+]
+
+
+# Chave dos metadados do Parquet com a versão dos dados (do manifesto do banco)
+# de onde a cópia foi gravada
+CHAVE_VERSAO = b"versao_dados"
+
+
+# Cópia colunar (data/acidentes_<ano>.parquet) das linhas que as páginas leem
+# de data/acidentes_<ano>.db. Só é usada enquanto tiver a mesma versão dos
+# dados do banco (ou, em bancos sem manifesto, enquanto for mais nova que ele);
+# sem o pyarrow instalado o app continua lendo direto do SQLite.
+class SnapshotModel:
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.caminho = os.path.splitext(db_path)[0] + ".parquet"
+
+    @staticmethod
+    def suportado():
+        return pq is not None
+
+    def atualizado(self, versao=None):
+        if pq is None:
+            return False
+        try:
+            if versao is not None:
+                metadados = pq.read_schema(self.caminho).metadata or {}
+                return metadados.get(CHAVE_VERSAO) == versao.encode()
+            return os.stat(self.caminho).st_mtime_ns >= os.stat(self.db_path).st_mtime_ns
+        except (OSError, pa.ArrowException):
+            return False
+
+    def colunas(self):
+        return pq.read_schema(self.caminho).names
+
+    def gravar(self, df: pd.DataFrame, versao=None):
+        df = df.copy()
+        for col in COLUNAS_CATEGORICAS:
+            if col in df.columns:
+                df[col] = df[col].astype("category")
+
+        tabela = pa.Table.from_pandas(df, preserve_index=False)
+        if versao is not None:
+            tabela = tabela.replace_schema_metadata(
+                {**(tabela.schema.metadata or {}), CHAVE_VERSAO: versao.encode()})
+
+        # Grava em um arquivo temporário e troca de uma vez, para que uma leitura
+        # concorrente nunca encontre o arquivo pela metade; o nome é único, para
+        # que duas gravações do mesmo ano ao mesmo tempo não usem o mesmo arquivo
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(os.path.abspath(self.caminho)),
+                                         prefix=os.path.basename(self.caminho) + ".",
+                                         suffix=".tmp", delete=False) as arquivo:
+            temporario = arquivo.name
+        try:
+            pq.write_table(tabela, temporario)
+            os.replace(temporario, self.caminho)
+        except Exception:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            raise
+
+    @instrumentacao.instrumentar("parquet", "SnapshotModel.ler")
+    def ler(self, colunas=None):
+        if colunas is not None:
+            existentes = set(self.colunas())
+            colunas = [c for c in colunas if c in existentes]
+        return pd.read_parquet(self.caminho, engine="pyarrow", columns=colunas)
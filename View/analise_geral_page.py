@@ -1,6 +1,7 @@
 import streamlit as st
 import plotly.express as px
-import pandas as pd
+from View.components.mapa import render_mapa
+from View.components.grafico import exibir_grafico
 
 
 def render(controller, rocket_palette):
@@ -11,9 +12,19 @@ def render(controller, rocket_palette):
         "abrangendo múltiplos anos de acidentes de trânsito no estado do Pará."
     )
 
-    df_geral = controller.listar_dados_consolidados_todos_anos()
-
-    if df_geral.empty:
+    metricas_por_ano = controller.agregar(
+        None, ["ano"],
+        medidas={
+            "total_acidentes": ("contagem", None),
+            "mortos": ("soma", "mortos"),
+            "feridos_graves": ("soma", "feridos_graves"),
+            "veiculos": ("soma", "veiculos"),
+            "pessoas": ("soma", "pessoas"),
+            "feridos": ("soma", "feridos"),
+        },
+        ordenar_por="ano", crescente=True)
+
+    if metricas_por_ano.empty:
         st.warning(
             "❌ Não há dados carregados para análise geral. "
             "Carregue arquivos de dados na aba 'Análise de dados' primeiro."
@@ -21,30 +32,19 @@ def render(controller, rocket_palette):
         return
 
     st.header("Métricas Consolidadas")
-    
-    metricas_por_ano = df_geral.groupby("ano").agg({
-        "data_inversa": "count",
-        "mortos": "sum",
-        "feridos_graves": "sum",
-        "veiculos": "sum",
-        "pessoas": "sum",
-        "feridos": "sum"
-    }).rename(columns={"data_inversa": "total_acidentes"}).reset_index()
-
-    total_acidentes = len(df_geral)
-    total_mortos = df_geral["mortos"].sum() if "mortos" in df_geral.columns else 0
-    total_feridos_graves = df_geral["feridos_graves"].sum() if "feridos_graves" in df_geral.columns else 0
-    total_veiculos = df_geral["veiculos"].sum() if "veiculos" in df_geral.columns else 0
-    media_veiculos = (
-        df_geral["veiculos"].mean() if "veiculos" in df_geral.columns else 0
-    )
+
+    total_acidentes = int(metricas_por_ano["total_acidentes"].sum())
+    total_mortos = metricas_por_ano["mortos"].sum()
+    total_feridos_graves = metricas_por_ano["feridos_graves"].sum()
+    total_veiculos = metricas_por_ano["veiculos"].sum()
+    media_veiculos = total_veiculos / total_acidentes if total_acidentes else 0
 
     col1, col2, col3, col4, col5 = st.columns(5)
     col1.metric("Total de Acidentes", f"{total_acidentes:,}".replace(",", "."))
     col2.metric("Total de Mortes", f"{int(total_mortos):,}".replace(",", "."))
     col3.metric("Feridos Graves", f"{int(total_feridos_graves):,}".replace(",", "."))
     col4.metric("Média de Veículos", f"{media_veiculos:.2f}".replace(".", ","))
-    col5.metric("Anos Analisados", f"{df_geral['ano'].nunique()}")
+    col5.metric("Anos Analisados", f"{metricas_por_ano['ano'].nunique()}")
 
     st.markdown("---")
 
@@ -61,7 +61,7 @@ def render(controller, rocket_palette):
         color_discrete_sequence=["#541a83"]
     )
     fig_linha.update_traces(textposition="top center")
-    st.plotly_chart(fig_linha, use_container_width=True)
+    exibir_grafico(fig_linha, use_container_width=True)
 
     dados_comparacao = metricas_por_ano[["ano", "total_acidentes", "mortos", "feridos_graves"]].copy()
     dados_comparacao = dados_comparacao.rename(columns={
@@ -80,15 +80,14 @@ def render(controller, rocket_palette):
         color_discrete_sequence=rocket_palette["discrete"][:3],
         template="plotly_dark"
     )
-    st.plotly_chart(fig_barras, use_container_width=True)
+    exibir_grafico(fig_barras, use_container_width=True)
 
     st.markdown("---")
 
     st.header("Top Municípios com Maior Número de Acidentes")
 
-    if "municipio" in df_geral.columns:
-        top_municipios = df_geral["municipio"].value_counts().head(10).reset_index()
-        top_municipios.columns = ["municipio", "total_acidentes"]
+    top_municipios = controller.agregar(None, ["municipio"], top_n=10)
+    if not top_municipios.empty:
 
         fig_top_municipios = px.bar(
             top_municipios,
@@ -102,12 +101,15 @@ def render(controller, rocket_palette):
             template="plotly_dark"
         )
         fig_top_municipios.update_layout(yaxis={"categoryorder": "total ascending"})
-        st.plotly_chart(fig_top_municipios, use_container_width=True)
+        exibir_grafico(fig_top_municipios, use_container_width=True)
 
     st.markdown("---")
 
     st.header("Localização dos Acidentes - Mapa Geral")
 
+    df_geral = controller.listar_dados_consolidados_todos_anos(
+        colunas=["latitude", "longitude", "municipio", "ano", "mortos", "feridos_graves"])
+
     if "latitude" in df_geral.columns and "longitude" in df_geral.columns:
         df_mapa = df_geral[
             (df_geral["latitude"].notna()) &
@@ -117,24 +119,14 @@ def render(controller, rocket_palette):
         ].copy()
 
         if not df_mapa.empty:
-            mapa = px.scatter_mapbox(
-                df_mapa,
-                lat="latitude",
-                lon="longitude",
-                hover_name="municipio" if "municipio" in df_mapa.columns else None,
+            render_mapa(
+                df_mapa, "Mapa Consolidado de Acidentes (Todos os Anos)", rocket_palette,
+                altura=600, cor="ano",
                 hover_data={
                     "ano": True,
                     "mortos": True if "mortos" in df_mapa.columns else False,
                     "feridos_graves": True if "feridos_graves" in df_mapa.columns else False,
-                },
-                zoom=4,
-                height=600,
-                color="ano",
-                color_discrete_sequence=rocket_palette["discrete"],
-                title="Mapa Consolidado de Acidentes (Todos os Anos)"
-            )
-            mapa.update_layout(mapbox_style="open-street-map")
-            st.plotly_chart(mapa, use_container_width=True)
+                })
         else:
             st.warning(
                 f"⚠️ Nenhuma coordenada válida encontrada. "
@@ -147,9 +139,8 @@ def render(controller, rocket_palette):
 
     st.header("Causas de Acidentes - Consolidado")
 
-    if "causa_acidente" in df_geral.columns:
-        top_causas = df_geral["causa_acidente"].value_counts().head(10).reset_index()
-        top_causas.columns = ["causa_acidente", "total_acidentes"]
+    top_causas = controller.agregar(None, ["causa_acidente"], top_n=10)
+    if not top_causas.empty:
 
         fig_causas = px.bar(
             top_causas,
@@ -162,15 +153,14 @@ def render(controller, rocket_palette):
             template="plotly_dark"
         )
         fig_causas.update_layout(yaxis={"categoryorder": "total ascending"})
-        st.plotly_chart(fig_causas, use_container_width=True)
+        exibir_grafico(fig_causas, use_container_width=True)
 
     st.markdown("---")
 
     st.header("Tipos de Acidentes - Consolidado")
 
-    if "tipo_acidente" in df_geral.columns:
-        tipos_acidentes = df_geral["tipo_acidente"].value_counts().reset_index()
-        tipos_acidentes.columns = ["tipo_acidente", "total_acidentes"]
+    tipos_acidentes = controller.agregar(None, ["tipo_acidente"])
+    if not tipos_acidentes.empty:
 
         fig_tipos = px.pie(
             tipos_acidentes,
@@ -179,7 +169,7 @@ def render(controller, rocket_palette):
             title="Distribuição de Tipos de Acidentes (Consolidado)",
             color_discrete_sequence=rocket_palette["discrete"]
         )
-        st.plotly_chart(fig_tipos, use_container_width=True)
+        exibir_grafico(fig_tipos, use_container_width=True)
 
     st.markdown("---")
 
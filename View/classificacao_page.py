@@ -1,12 +1,12 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
+from View.components.grafico import exibir_grafico
 
 
-def render(df, ano, rocket_palette, controller):
+def render(dados, ano, rocket_palette, controller):
     st.header("Análise de Acidentes por Classificação")
 
-    if df.empty:
+    if dados is None or dados.vazio:
         st.warning(
             "Não há dados para exibir. Selecione um ano na barra lateral ou carregue dados primeiro.")
         return
@@ -17,17 +17,16 @@ def render(df, ano, rocket_palette, controller):
 
     col_esq, col_central, col_dir = st.columns([0.5, 5, 0.5])
     with col_central:
-        if 'tipo_acidente' in df.columns:
-            tipo = df['tipo_acidente'].value_counts().reset_index()
+        tipo = dados.agregar(['tipo_acidente'])
+        if not tipo.empty:
             tipo.columns = ['Tipo de Acidente', 'Número de Acidentes']
-            tipo = tipo.sort_values(by='Número de Acidentes', ascending=False)
             fig_tipo = px.bar(
                 tipo, x='Tipo de Acidente', y='Número de Acidentes',
                 title=f"Tipos de Acidentes no Pará ({ano})",
                 color='Tipo de Acidente', color_discrete_sequence=rocket_palette['discrete']
             )
             fig_tipo.update_layout(template='plotly_dark')
-            st.plotly_chart(fig_tipo)
+            exibir_grafico(fig_tipo)
         else:
             st.warning("Coluna 'tipo_acidente' não encontrada no arquivo.")
 
@@ -36,9 +35,8 @@ def render(df, ano, rocket_palette, controller):
     col1, col2 = st.columns(2)
 
     with col1:
-        if 'classificacao_acidente' in df.columns:
-            classificacao = df['classificacao_acidente'].value_counts(
-            ).reset_index()
+        classificacao = dados.agregar(['classificacao_acidente'])
+        if not classificacao.empty:
             classificacao.columns = ['Classificação', 'Número de Acidentes']
             fig_classificacao = px.pie(
                 classificacao, names='Classificação', values='Número de Acidentes',
@@ -48,14 +46,14 @@ def render(df, ano, rocket_palette, controller):
             fig_classificacao.update_traces(
                 textposition='inside', textinfo='percent+label')
             fig_classificacao.update_layout(template='plotly_dark')
-            st.plotly_chart(fig_classificacao, use_container_width=True)
+            exibir_grafico(fig_classificacao, use_container_width=True)
         else:
             st.warning(
                 "Coluna 'classificacao_acidente' não encontrada no arquivo.")
 
     with col2:
-        if 'tipo_pista' in df.columns:
-            tipo_pista = df['tipo_pista'].value_counts().reset_index()
+        tipo_pista = dados.agregar(['tipo_pista'])
+        if not tipo_pista.empty:
             tipo_pista.columns = ['Tipo de Pista', 'Número de Acidentes']
             fig_tipo_pista = px.bar(
                 tipo_pista, x='Tipo de Pista', y='Número de Acidentes',
@@ -63,7 +61,7 @@ def render(df, ano, rocket_palette, controller):
                 color='Tipo de Pista', color_discrete_sequence=rocket_palette['discrete']
             )
             fig_tipo_pista.update_layout(template='plotly_dark')
-            st.plotly_chart(fig_tipo_pista)
+            exibir_grafico(fig_tipo_pista)
         else:
             st.warning("Coluna 'tipo_pista' não encontrada no arquivo.")
 
@@ -81,9 +79,9 @@ def render(df, ano, rocket_palette, controller):
     ]
     col_esq, col_central, col_dir = st.columns([0.5, 5, 0.5])
     with col_central:
-        if 'causa_acidente' in df.columns:
-            causa_acidente = controller.get_dados_agrupados(
-                df, 'causa_acidente', top_n=15)
+        causa_acidente = dados.agregar(
+            ['causa_acidente'], top_n=15)
+        if not causa_acidente.empty:
             causa_acidente.columns = ['Causa do Acidente', 'Número de Casos']
 
             fig = px.treemap(
@@ -111,4 +109,4 @@ def render(df, ano, rocket_palette, controller):
             height=450
         )
 
-    st.plotly_chart(fig, use_container_width=True)
+    exibir_grafico(fig, use_container_width=True)
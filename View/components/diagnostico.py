@@ -0,0 +1,59 @@
+import json
+import streamlit as st
+from suporte.Instrumentacao import instrumentacao
+
+# Chave do checkbox do painel; o index.py a lê no início da execução para
+# saber se deve medir
+CHAVE_DIAGNOSTICO = "mostrar_diagnostico"
+
+
+def diagnostico_aberto():
+    return bool(st.session_state.get(CHAVE_DIAGNOSTICO, False))
+
+
+def render_diagnostico(registro, cache=None):
+    # Painel na barra lateral com as medições da execução que acabou de
+    # terminar: tempo por categoria, as medições mais demoradas e o JSON;
+    # cache: estatísticas do cache de dados do processo (desde que subiu)
+    with st.sidebar:
+        st.markdown("---")
+        if not st.checkbox("Diagnóstico de desempenho", key=CHAVE_DIAGNOSTICO):
+            return
+        if registro is None:
+            return
+
+        st.metric("Tempo desta execução", f"{registro['duracao_ms']:,.0f} ms".replace(",", "."))
+        por_categoria = instrumentacao.resumir(registro, por="categoria")
+        fora = registro["duracao_ms"] - por_categoria["proprio_ms"].sum()
+        st.caption(f"Fora das medições (Streamlit, widgets e o restante das páginas): {fora:,.0f} ms"
+                   .replace(",", "."))
+        st.dataframe(por_categoria[["categoria", "chamadas", "proprio_ms"]].rename(columns={
+            "categoria": "Categoria", "chamadas": "Chamadas", "proprio_ms": "Tempo (ms)"}),
+            hide_index=True, use_container_width=True)
+
+        with st.expander("Medições por nome"):
+            detalhe = instrumentacao.resumir(registro)
+            detalhe["bytes"] = detalhe["bytes"] / 1024
+            st.dataframe(detalhe.rename(columns={
+                "categoria": "Categoria", "nome": "Nome", "chamadas": "Chamadas", "total_ms": "Total (ms)",
+                "proprio_ms": "Próprio (ms)", "linhas": "Linhas", "bytes": "KB"}).round(1),
+                hide_index=True, use_container_width=True)
+
+        if cache is not None:
+            with st.expander("Cache de dados"):
+                pedidos = cache["acertos"] + cache["falhas"]
+                st.dataframe([
+                    {"Estatística": "Itens", "Valor": f"{cache['itens']}"},
+                    {"Estatística": "Memória (MB)", "Valor": f"{cache['bytes_em_uso'] / 2 ** 20:.1f} de "
+                                                             f"{cache['orcamento_bytes'] / 2 ** 20:.0f}"
+                                                             .replace(".", ",")},
+                    {"Estatística": "Acertos", "Valor": f"{cache['acertos']}"},
+                    {"Estatística": "Falhas", "Valor": f"{cache['falhas']}"},
+                    {"Estatística": "Taxa de acerto",
+                     "Valor": f"{cache['acertos'] / pedidos:.0%}" if pedidos else "-"},
+                    {"Estatística": "Remoções (orçamento cheio)", "Valor": f"{cache['remocoes']}"},
+                ], hide_index=True, use_container_width=True)
+
+        st.download_button(
+            "Baixar medições (JSON)", json.dumps(registro, ensure_ascii=False, indent=2),
+            file_name=f"diagnostico_{registro['momento'].replace(':', '')}.json", mime="application/json")
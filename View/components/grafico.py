@@ -0,0 +1,9 @@
+import streamlit as st
+from suporte.Instrumentacao import instrumentacao
+
+
+def exibir_grafico(figura, **kwargs):
+    # st.plotly_chart medido no painel de diagnóstico (é onde a figura é
+    # serializada para o navegador), com o título do gráfico como nome
+    with instrumentacao.medir("grafico", figura.layout.title.text or "gráfico sem título"):
+        st.plotly_chart(figura, **kwargs)
@@ -0,0 +1,67 @@
+import streamlit as st
+import plotly.express as px
+from controller.AgregacaoEspacial import agregacao_espacial
+from suporte.Instrumentacao import instrumentacao
+
+# Zoom inicial dos mapas (o Pará inteiro) e o maior zoom do controle de
+# detalhe. O zoom feito no próprio mapa (roda do mouse) não volta para o
+# Python, por isso a resolução das células vem do controle, não do mapa.
+ZOOM_MAPA = 4
+ZOOM_MAXIMO = 12
+
+
+@instrumentacao.instrumentar("grafico", "mapa")
+def render_mapa(df_mapa, titulo, rocket_palette, altura=500, cor=None, hover_data=None, zoom=ZOOM_MAPA):
+    # Até o limite de pontos mostra um marcador por acidente; acima dele, as
+    # células da agregação espacial no tamanho do zoom escolhido, para que o
+    # navegador não receba um marcador por acidente de todos os anos do mapa
+    somas = [c for c in ["mortos", "feridos_graves"] if c in df_mapa.columns]
+
+    if not agregacao_espacial.precisa_agrupar(df_mapa):
+        mapa = px.scatter_mapbox(
+            df_mapa,
+            lat="latitude",
+            lon="longitude",
+            hover_name="municipio" if "municipio" in df_mapa.columns else None,
+            hover_data=hover_data if hover_data is not None else {c: True for c in somas},
+            zoom=zoom,
+            height=altura,
+            color=cor,
+            color_discrete_sequence=rocket_palette["discrete"] if cor else ["#590B7E"],
+            title=titulo
+        )
+    else:
+        # O mapa abre no zoom escolhido, com células do tamanho certo para ele
+        zoom = st.slider("Zoom do mapa (tamanho das áreas):", zoom, max(zoom, ZOOM_MAXIMO), zoom,
+                         key=f"zoom_{titulo}")
+        # Com `cor` (o ano, na Análise Geral) cada área é separada por valor
+        # e mantém a cor dos pontos; sem ela, a cor mostra a quantidade
+        celulas = agregacao_espacial.agrupar(df_mapa, zoom, forma="hexagono", somas=somas, por=cor)
+        if agregacao_espacial.celulas_demais(celulas):
+            st.warning(
+                f"Com este zoom o mapa tem {len(celulas):,} áreas e pode ficar lento no navegador; "
+                f"diminua o zoom para áreas maiores.".replace(",", "."))
+        st.caption(
+            f"{len(df_mapa):,} acidentes agrupados em {len(celulas):,} áreas; o tamanho "
+            f"de cada círculo indica a quantidade de acidentes".replace(",", ".")
+            + (f" e a cor, o valor de '{cor}'." if cor else ", também mostrada pela cor."))
+        mapa = px.scatter_mapbox(
+            celulas,
+            lat="latitude",
+            lon="longitude",
+            size="total_acidentes",
+            color=cor if cor else "total_acidentes",
+            hover_data={"latitude": False, "longitude": False, "total_acidentes": True,
+                        **({cor: True} if cor else {}), **{c: True for c in somas}},
+            labels={"total_acidentes": "Acidentes", "mortos": "Mortos", "feridos_graves": "Feridos graves"},
+            color_continuous_scale=rocket_palette["continuous"],
+            color_discrete_sequence=rocket_palette["discrete"],
+            category_orders={cor: sorted(celulas[cor].unique().tolist())} if cor else None,
+            size_max=30,
+            zoom=zoom,
+            height=altura,
+            title=titulo
+        )
+
+    mapa.update_layout(mapbox_style="open-street-map")
+    st.plotly_chart(mapa, use_container_width=True)
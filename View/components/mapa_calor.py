@@ -0,0 +1,20 @@
+import streamlit as st
+import plotly.express as px
+from suporte.Instrumentacao import instrumentacao
+
+
+@instrumentacao.instrumentar("grafico", "mapa de calor")
+def render_mapa_calor(matriz, titulo, rocket_palette, rotulo="Acidentes"):
+    # matriz: dias da semana nas linhas e horas (0 a 23) nas colunas, como
+    # devolvida por controller.mapa_calor
+    fig = px.imshow(
+        matriz,
+        labels={"x": "Hora do dia", "y": "Dia da semana", "color": rotulo},
+        x=[f"{hora:02d}h" for hora in matriz.columns],
+        y=list(matriz.index),
+        color_continuous_scale=rocket_palette["continuous"],
+        aspect="auto",
+        title=titulo,
+        template="plotly_dark"
+    )
+    st.plotly_chart(fig, use_container_width=True)
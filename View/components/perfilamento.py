@@ -0,0 +1,67 @@
+import streamlit as st
+from suporte.Perfilador import PERFILAMENTO_ATIVO
+
+CHAVE_PERFILAR = "perfilar_proxima_execucao"
+CHAVE_PERFIL = "ultimo_perfil"
+
+
+def modo_perfilamento():
+    return PERFILAMENTO_ATIVO or st.query_params.get("perfilar") == "1"
+
+
+def perfilar_esta_execucao():
+    # Verdadeiro só na execução seguinte ao clique em "Perfilar esta página"
+    return modo_perfilamento() and st.session_state.pop(CHAVE_PERFILAR, False)
+
+
+def _pedir_perfil():
+    st.session_state[CHAVE_PERFILAR] = True
+
+
+def render_perfilamento(perfil, pagina):
+    # Botão na barra lateral e, abaixo da página perfilada, as tabelas dos
+    # pontos quentes e os arquivos para baixar. O último perfil fica na sessão
+    # para que os downloads (que reexecutam a página) não o percam.
+    if not modo_perfilamento():
+        return
+    if perfil.get("ocupado"):
+        st.warning("Outro perfilamento está em andamento; tente novamente em instantes.")
+    elif perfil:
+        st.session_state[CHAVE_PERFIL] = {**perfil, "pagina": pagina}
+
+    with st.sidebar:
+        st.markdown("---")
+        st.button("Perfilar esta página", on_click=_pedir_perfil,
+                  help="Executa a página de novo medindo CPU (cProfile) e alocações (tracemalloc).")
+
+    ultimo = st.session_state.get(CHAVE_PERFIL)
+    if ultimo is None or ultimo["pagina"] != pagina:
+        return
+
+    st.markdown("---")
+    st.subheader("Perfil da Execução")
+    st.caption(
+        f"Execução de {ultimo['momento'].replace('T', ' ')}: {ultimo['duracao_ms']:,.0f} ms, "
+        f"pico de {ultimo['pico_mb']:,.1f} MB e {ultimo['alocado_mb']:,.1f} MB ainda alocados ao final. "
+        "O cProfile deixa a execução mais lenta; compare os tempos entre si, não com a página sem o perfil.")
+
+    cpu_proprio, cpu_acumulado, alocacoes = st.tabs(["CPU (tempo próprio)", "CPU (acumulado)", "Alocações"])
+    colunas_cpu = {"funcao": "Função", "chamadas": "Chamadas", "proprio_ms": "Próprio (ms)",
+                   "acumulado_ms": "Acumulado (ms)"}
+    with cpu_proprio:
+        st.dataframe(ultimo["cpu_proprio"].rename(columns=colunas_cpu).round(2),
+                     hide_index=True, use_container_width=True)
+    with cpu_acumulado:
+        st.dataframe(ultimo["cpu_acumulado"].rename(columns=colunas_cpu).round(2),
+                     hide_index=True, use_container_width=True)
+    with alocacoes:
+        st.dataframe(ultimo["alocacoes"].rename(columns={"linha": "Linha", "kb": "KB", "blocos": "Blocos"})
+                     .round(1), hide_index=True, use_container_width=True)
+
+    sufixo = f"{pagina}_{ultimo['momento']}".replace(" ", "_").replace(":", "")
+    col1, col2 = st.columns(2)
+    if ultimo["arquivo_cpu"] is not None:
+        col1.download_button("Baixar perfil de CPU (.prof)", ultimo["arquivo_cpu"],
+                             file_name=f"perfil_{sufixo}.prof", mime="application/octet-stream")
+    col2.download_button("Baixar alocações (tracemalloc)", ultimo["arquivo_memoria"],
+                         file_name=f"alocacoes_{sufixo}.pickle", mime="application/octet-stream")
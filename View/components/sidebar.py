@@ -2,13 +2,14 @@
 import streamlit as st
 from streamlit_option_menu import option_menu
 from controller.AcidenteController import AcidenteController
-import pandas as pd
+from controller.DadosAno import DadosAno
 import re
 
 
 def render_sidebar():
-
-    df = pd.DataFrame()
+    # Devolve o ano escolhido como um DadosAno, que só lê o banco quando a
+    # página pede alguma coluna ou agregação (None sem ano selecionado)
+    dados = None
     ano_selecionado = "Nenhum"
 
     with st.sidebar:
@@ -37,9 +38,10 @@ def render_sidebar():
         selected_page = option_menu(
             menu_title="Projeto Big Data",
             options=["Home", "Análise de dados", "Visualização de Dados",
-                     "Acidentes por município", "Classificações", "Período", "Análise Geral"],
+                     "Acidentes por município", "Trechos críticos", "Classificações", "Período",
+                     "Análise Geral"],
             icons=["house", "cloud-upload",
-                   "bar-chart", "map", "list", "calendar", "globe"],
+                   "bar-chart", "map", "signpost-split", "list", "calendar", "globe"],
             menu_icon="cast",
             default_index=0,
             styles=styles
@@ -57,14 +59,14 @@ def render_sidebar():
                 nome_banco_selecionado = st.selectbox(
                     "Selecione o ano para Análise:",
                     options=bancos_de_dados,
+                    key="nome_banco_selecionado",
                     format_func=lambda x: f"Analisar {re.search(r'\d{4}', x).group(0) if re.search(r'\d{4}', x) else x}"
                 )
 
                 if nome_banco_selecionado:
-                    df = controller.listar_dados_por_banco(
-                        nome_banco_selecionado)
                     ano_selecionado = re.search(r'\d{4}', nome_banco_selecionado).group(
                         0) if re.search(r'\d{4}', nome_banco_selecionado) else "Ano Desconhecido"
+                    dados = DadosAno(controller, nome_banco_selecionado, ano_selecionado)
 
     rocket_palette = {
         "discrete": [
@@ -75,4 +77,4 @@ def render_sidebar():
         ]
     }
 
-    return selected_page, df, ano_selecionado, rocket_palette
+    return selected_page, dados, ano_selecionado, rocket_palette
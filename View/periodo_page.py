@@ -1,12 +1,19 @@
 import streamlit as st
 import plotly.express as px
-import pandas as pd
+from View.components.mapa_calor import render_mapa_calor
+from View.components.grafico import exibir_grafico
 
+FREQUENCIAS = {"Dia": "dia", "Semana": "semana", "Mês": "mes"}
+MESES = {
+    1: "Janeiro", 2: "Fevereiro", 3: "Março", 4: "Abril", 5: "Maio", 6: "Junho",
+    7: "Julho", 8: "Agosto", 9: "Setembro", 10: "Outubro", 11: "Novembro", 12: "Dezembro"
+}
 
-def render(df, ano, rocket_palette):
+
+def render(dados, ano, rocket_palette, controller):
     st.header("Análise de Acidentes por Período")
 
-    if df.empty:
+    if dados is None or dados.vazio:
         st.warning(
             "Não há dados para exibir. Selecione um ano na barra lateral ou carregue dados primeiro.")
         return
@@ -15,15 +22,11 @@ def render(df, ano, rocket_palette):
         f"Esta seção apresenta uma análise dos acidentes de trânsito no Pará para o ano de {ano}, categorizados pelo decorrer do tempo.")
 
     st.subheader("Distribuição de Acidentes por tipo de intervalo")
-    if 'data_inversa' in df.columns:
+    if 'data_inversa' in dados.colunas:
         try:
-            df_periodo = df.copy()
-            df_periodo['data_inversa'] = pd.to_datetime(
-                df_periodo['data_inversa'])
-            df_periodo['mes'] = df_periodo['data_inversa'].dt.month
-
-            acidentes_por_mes = df_periodo.groupby(
-                'mes').size().reset_index(name='Total de Acidentes')
+            acidentes_por_mes = dados.agregar(
+                ['mes'], ordenar_por='mes', crescente=True)
+            acidentes_por_mes.columns = ['mes', 'Total de Acidentes']
 
             meses_pt = {
                 1: "Jan", 2: "Fev", 3: "Mar", 4: "Abr", 5: "Mai", 6: "Jun",
@@ -40,13 +43,13 @@ def render(df, ano, rocket_palette):
                                   'Mês': 'Mês', 'Total de Acidentes': 'Total de Acidentes'},
                               color_discrete_sequence=["#590B7E"])
             fig_mes.update_layout(template='plotly_dark')
-            st.plotly_chart(fig_mes, use_container_width=True)
+            exibir_grafico(fig_mes, use_container_width=True)
         except Exception as e:
             st.error(f"Erro ao analisar data_inversa: {e}")
     else:
         st.warning("Coluna 'data_inversa' não encontrada para análise por mês.")
 
-    if 'dia_semana' in df.columns:
+    if 'dia_semana' in dados.colunas:
         dias_ordem = ['segunda-feira', 'terça-feira', 'quarta-feira',
                       'quinta-feira', 'sexta-feira', 'sábado', 'domingo']
         dias_pt = {
@@ -54,8 +57,8 @@ def render(df, ano, rocket_palette):
             'quinta-feira': 'Quinta', 'sexta-feira': 'Sexta', 'sábado': 'Sábado', 'domingo': 'Domingo'
         }
 
-        acidentes_por_dia = df['dia_semana'].value_counts().reindex(
-            dias_ordem).reset_index()
+        acidentes_por_dia = dados.agregar(['dia_semana']).set_index(
+            'dia_semana')['total_acidentes'].reindex(dias_ordem).reset_index()
         acidentes_por_dia.columns = ['Dia da Semana', 'Total de Acidentes']
         acidentes_por_dia['Dia da Semana'] = acidentes_por_dia['Dia da Semana'].map(
             dias_pt)
@@ -68,16 +71,16 @@ def render(df, ano, rocket_palette):
             category_orders={'Dia da Semana': list(dias_pt.values())}
         )
         fig_dia.update_layout(template='plotly_dark')
-        st.plotly_chart(fig_dia, use_container_width=True)
+        exibir_grafico(fig_dia, use_container_width=True)
     else:
         st.warning(
             "Coluna 'dia_semana' não encontrada para análise por dia da semana.")
 
-    def grafico_condicao_meteorologica_area(df):
-        df["hora"] = df["horario"].str.slice(0, 2)
-
-        cond_horario = df.groupby(
-            ["hora", "condicao_metereologica"]).size().reset_index(name="total")
+    def grafico_condicao_meteorologica_area():
+        cond_horario = dados.agregar(
+            ["hora", "condicao_metereologica"],
+            ordenar_por="hora", crescente=True)
+        cond_horario.columns = ["hora", "condicao_metereologica", "total"]
 
         fig = px.area(
             cond_horario,
@@ -89,11 +92,61 @@ def render(df, ano, rocket_palette):
             color_discrete_sequence=rocket_palette['discrete']
         )
 
-        st.plotly_chart(fig, use_container_width=True)
-    if 'condicao_metereologica' in df.columns and 'horario' in df.columns:
-        grafico_condicao_meteorologica_area(df)
+        exibir_grafico(fig, use_container_width=True)
+    if 'condicao_metereologica' in dados.colunas and 'horario' in dados.colunas:
+        grafico_condicao_meteorologica_area()
     else:
         st.warning(
             "Colunas 'condicao_metereologica' ou 'horario' não encontradas para análise meteorológica.")
 
-   
\ No newline at end of file
+    st.markdown("---")
+    st.subheader("Série Temporal de Acidentes")
+    st.text("As séries vêm das contagens por dia e município gravadas no upload, sem reler as datas do ano.")
+
+    col1, col2, col3 = st.columns([2, 2, 1])
+    with col1:
+        municipio = st.selectbox("Município:", ["Todos os municípios"] + dados.municipios(), key="serie_municipio")
+    with col2:
+        frequencia = FREQUENCIAS[st.radio("Agrupar por:", list(FREQUENCIAS), index=1, horizontal=True)]
+    with col3:
+        comparar = st.checkbox("Comparar os anos")
+    municipio = None if municipio == "Todos os municípios" else municipio
+    local = municipio or "Pará"
+
+    if comparar:
+        # Todos os anos no mesmo calendário, uma linha por ano
+        serie = controller.serie_temporal(None, frequencia, municipio, alinhar=True)
+        fig_serie = px.line(
+            serie, x="periodo", y="total_acidentes", color="ano",
+            title=f"Acidentes por {frequencia.replace('mes', 'mês')} em {local}, comparação entre os anos",
+            labels={"periodo": "Data", "total_acidentes": "Acidentes", "ano": "Ano"},
+            color_discrete_sequence=rocket_palette["discrete"]
+        )
+        fig_serie.update_xaxes(tickformat="%d/%m" if frequencia != "mes" else "%b")
+    else:
+        serie = dados.serie_temporal(frequencia, municipio)
+        fig_serie = px.line(
+            serie, x="periodo", y=["total_acidentes", "mortos", "feridos_graves"],
+            title=f"Acidentes e vítimas por {frequencia.replace('mes', 'mês')} em {local} ({ano})",
+            labels={"periodo": "Data", "value": "Quantidade", "variable": ""},
+            color_discrete_sequence=rocket_palette["discrete"][::3]
+        )
+        fig_serie.for_each_trace(lambda t: t.update(name={
+            "total_acidentes": "Acidentes", "mortos": "Mortos", "feridos_graves": "Feridos Graves"}[t.name]))
+    fig_serie.update_layout(template="plotly_dark")
+    exibir_grafico(fig_serie, use_container_width=True)
+
+    mes = st.selectbox("Mês em detalhe:", list(MESES), format_func=MESES.get, key="serie_mes")
+    dias = dados.serie_temporal("dia", municipio, mes=mes)
+    fig_dias = px.bar(
+        dias, x="periodo", y="total_acidentes",
+        title=f"Acidentes por dia em {MESES[mes].lower()} de {ano} ({local})",
+        labels={"periodo": "Dia", "total_acidentes": "Acidentes"},
+        hover_data={"mortos": True, "feridos_graves": True},
+        color_discrete_sequence=["#590B7E"]
+    )
+    fig_dias.update_layout(template="plotly_dark")
+    exibir_grafico(fig_dias, use_container_width=True)
+
+    render_mapa_calor(dados.mapa_calor(municipio),
+                      f"Acidentes por dia da semana e hora em {local} ({ano})", rocket_palette)
@@ -0,0 +1,100 @@
+import streamlit as st
+import plotly.express as px
+from controller.RankingTrechos import PESOS_PADRAO
+from View.components.mapa import render_mapa
+from View.components.grafico import exibir_grafico
+
+# Zoom do mapa dos acidentes de um trecho (alguns quilômetros de rodovia)
+ZOOM_TRECHO = 11
+
+
+def render(dados, ano, rocket_palette, controller):
+    st.header("Trechos Críticos das Rodovias")
+
+    st.write(
+        "Esta seção classifica os trechos das rodovias federais no Pará pela gravidade dos acidentes "
+        "registrados. Cada trecho é uma janela de alguns quilômetros que percorre a rodovia de 1 em 1 km; "
+        "o índice de gravidade soma os acidentes e as vítimas com pesos "
+        f"(acidente: {PESOS_PADRAO['total_acidentes']}, ferido leve: {PESOS_PADRAO['feridos_leves']}, "
+        f"ferido grave: {PESOS_PADRAO['feridos_graves']}, morto: {PESOS_PADRAO['mortos']}).")
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        opcoes_periodo = ["Todos os anos"] if dados is None else [f"Ano de {ano}", "Todos os anos"]
+        periodo = st.radio("Período:", opcoes_periodo)
+    bancos = dados.nome_banco if dados is not None and periodo != "Todos os anos" else None
+
+    trechos = controller.trechos(bancos)
+    if trechos.empty or trechos["br_numero"].isna().all():
+        st.warning(
+            "Não há dados de rodovia (br e km) para exibir. Carregue dados na página 'Análise de dados' primeiro.")
+        return
+
+    brs = sorted(int(br) for br in trechos["br_numero"].dropna().unique())
+    with col2:
+        br = st.selectbox("Rodovia:", ["Todas"] + brs,
+                          format_func=lambda b: b if b == "Todas" else f"BR-{b:03d}")
+    with col3:
+        janela_km = st.slider("Tamanho do trecho (km):", 1, 10, 1)
+    with col4:
+        top_n = st.slider("Quantidade de trechos:", 5, 30, 10)
+
+    por_ano = bancos is None and st.checkbox("Ranking separado para cada ano")
+    ranking = controller.trechos_criticos(
+        bancos, janela_km, top_n, br=None if br == "Todas" else br, por_ano=por_ano)
+    if ranking.empty:
+        st.info("Nenhum trecho com acidentes para os filtros escolhidos.")
+        return
+
+    ranking["trecho"] = ranking.apply(
+        lambda linha: f"BR-{int(linha['br_numero']):03d} km {linha['km_inicio']}–{linha['km_fim']}", axis=1)
+    ranking["rotulo"] = ranking["trecho"] + (" (" + ranking["ano"].astype(str) + ")" if por_ano else "")
+    titulo_periodo = "todos os anos" if bancos is None else ano
+
+    fig = px.bar(
+        ranking.iloc[::-1],
+        x="indice_gravidade",
+        y="rotulo",
+        orientation="h",
+        color="ano" if por_ano else "indice_gravidade",
+        color_continuous_scale=rocket_palette["continuous"],
+        color_discrete_sequence=rocket_palette["discrete"],
+        hover_data={"total_acidentes": True, "mortos": True, "feridos_graves": True, "feridos_leves": True},
+        labels={"indice_gravidade": "Índice de gravidade", "rotulo": "Trecho", "ano": "Ano",
+                "total_acidentes": "Acidentes", "mortos": "Mortos", "feridos_graves": "Feridos graves",
+                "feridos_leves": "Feridos leves"},
+        title=f"Trechos de {janela_km} km mais críticos ({titulo_periodo})",
+        height=max(400, 28 * len(ranking)),
+        template="plotly_dark"
+    )
+    exibir_grafico(fig, use_container_width=True)
+
+    tabela = ranking[(["ano"] if por_ano else []) + ["posicao", "trecho", "total_acidentes", "mortos",
+                                                     "feridos_graves", "feridos_leves", "indice_gravidade"]]
+    st.dataframe(tabela.rename(columns={
+        "ano": "Ano", "posicao": "Posição", "trecho": "Trecho", "total_acidentes": "Acidentes",
+        "mortos": "Mortos", "feridos_graves": "Feridos Graves", "feridos_leves": "Feridos Leves",
+        "indice_gravidade": "Índice de Gravidade"}), hide_index=True, use_container_width=True)
+
+    st.markdown("---")
+    st.subheader("Acidentes no Trecho")
+    indice = st.selectbox("Selecione o trecho:", ranking.index,
+                          format_func=lambda i: f"{ranking.loc[i, 'posicao']}º - {ranking.loc[i, 'rotulo']}")
+    escolhido = ranking.loc[indice]
+    bancos_trecho = bancos
+    if por_ano:
+        bancos_trecho = [b for b in controller.listar_bancos_de_dados()
+                         if controller.extrair_ano_do_nome(b) == escolhido["ano"]]
+
+    acidentes = controller.acidentes_no_trecho(
+        bancos_trecho, escolhido["br_numero"], escolhido["km_inicio"], escolhido["km_fim"],
+        ["data_inversa", "horario", "municipio", "km", "causa_acidente", "tipo_acidente",
+         "mortos", "feridos_graves", "latitude", "longitude"])
+
+    no_mapa = acidentes.dropna(subset=["latitude", "longitude"])
+    if not no_mapa.empty:
+        render_mapa(no_mapa, f"Acidentes em {escolhido['trecho']}", rocket_palette, altura=400, zoom=ZOOM_TRECHO)
+    st.dataframe(acidentes.drop(columns=["latitude", "longitude"]).rename(columns={
+        "data_inversa": "Data", "horario": "Horário", "municipio": "Município", "km": "Km",
+        "causa_acidente": "Causa", "tipo_acidente": "Tipo", "mortos": "Mortos",
+        "feridos_graves": "Feridos Graves", "ano": "Ano"}), hide_index=True, use_container_width=True)
@@ -1,5 +1,20 @@
 import streamlit as st
 import os
+from controller.AgendadorIngestao import agendador_ingestao
+
+# Intervalo (segundos) entre as atualizações do progresso das cargas em andamento
+INTERVALO_PROGRESSO = 1.0
+
+# Hash de cada upload (pelo file_id do Streamlit), para que os reruns enquanto
+# a confirmação está pendente não leiam o arquivo inteiro de novo
+CHAVE_HASHES = "hashes_uploads"
+
+
+def hash_do_upload(controller, arquivo):
+    hashes = st.session_state.setdefault(CHAVE_HASHES, {})
+    if arquivo.file_id not in hashes:
+        hashes[arquivo.file_id], _ = controller.calcular_hash(arquivo)
+    return hashes[arquivo.file_id]
 
 def render(controller):
     st.header(" Área de Análise e Carregamento de Dados")
@@ -15,6 +30,10 @@ def render(controller):
                     (.csv ou .xlsx) contendo os registros de acidentes.
                 2.  **Geração do Banco:** O sistema irá processar os dados, filtrar pelo Pará (PA)
                     e salvar um arquivo de banco de dados (`.db`) na pasta `data/` para cada ano.
+                    As planilhas são processadas em segundo plano, em paralelo, e você pode
+                    navegar pelas outras páginas enquanto isso.
+                    Se o ano já tiver dados, você pode sobrescrevê-los ou atualizar apenas os
+                    registros novos e alterados (pelo `id` do acidente).
                 3.  **Visualize as Análises:** Use as outras abas no menu lateral 
                     (Visualização de Dados, Municípios, etc.) para ver os gráficos.
             """
@@ -30,6 +49,9 @@ def render(controller):
     if "uploads" not in st.session_state:
         st.session_state["uploads"] = [None]
 
+    if "tarefas_ingestao" not in st.session_state:
+        st.session_state["tarefas_ingestao"] = []
+
     novos_uploads = []
 
     for i, file in enumerate(st.session_state.get("uploads", [None])):
@@ -51,24 +73,39 @@ def render(controller):
             db_path_esperado = f"data/acidentes_{ano}.db"
             db_existe = os.path.exists(db_path_esperado)
 
-            def processar_arquivo(arquivo_para_processar):
-                with st.spinner(f"Processando e salvando dados de {ano}..."):
-                    try:
-                        df_pa, db_path = controller.processar_planilha(arquivo_para_processar)
-                        st.success(f"Sucesso! Dados para o ano de {ano} foram salvos em '{db_path}'.")
-                        with st.expander("Ver amostra dos dados carregados (UF=PA)"):
-                            st.dataframe(df_pa.head())
-                    except Exception as e:
-                        st.error(e)
+            def processar_arquivo(arquivo_para_processar, incremental=False):
+                # A carga roda em segundo plano; o andamento aparece no fim da página
+                try:
+                    arquivo_para_processar.seek(0)
+                    id_tarefa = agendador_ingestao.enviar(
+                        arquivo_para_processar.name, arquivo_para_processar, ano, incremental=incremental)
+                    st.session_state["tarefas_ingestao"].append(id_tarefa)
+                except Exception as e:
+                    st.error(e)
             
+            carga_identica = None
             if db_existe and st.session_state.confirmation_state.get(i) is None:
-                st.warning(f"⚠️ Já existem dados para o ano de {ano}. Deseja sobrescrevê-los com o arquivo '{uploaded_file.name}'?")
-                col1, col2 = st.columns([1, 4])
+                # Arquivo igual ao último carregado para o ano: nada a reprocessar
+                hash_arquivo = hash_do_upload(controller, uploaded_file)
+                carga_identica = controller.carga_identica(db_path_esperado, hash_arquivo)
+
+            if carga_identica is not None:
+                st.success(f"O arquivo '{uploaded_file.name}' é idêntico ao carregado em "
+                           f"{carga_identica['fim']}; os dados de {ano} já estão atualizados.")
+                st.session_state.confirmation_state[i] = 'done'
+
+            elif db_existe and st.session_state.confirmation_state.get(i) is None:
+                st.warning(f"⚠️ Já existem dados para o ano de {ano}. Deseja sobrescrevê-los ou atualizá-los com o arquivo '{uploaded_file.name}'?")
+                col1, col2, col3 = st.columns([1, 1, 3])
                 with col1:
                     if st.button("Sim, sobrescrever", key=f"overwrite_{i}"):
                         st.session_state.confirmation_state[i] = 'overwrite'
                         st.rerun()
                 with col2:
+                    if st.button("Atualizar (incremental)", key=f"incremental_{i}"):
+                        st.session_state.confirmation_state[i] = 'incremental'
+                        st.rerun()
+                with col3:
                     if st.button("Não, cancelar", key=f"cancel_{i}"):
                         st.session_state.confirmation_state[i] = 'cancel'
                         st.rerun()
@@ -76,6 +113,10 @@ def render(controller):
             elif st.session_state.confirmation_state.get(i) == 'overwrite':
                 processar_arquivo(uploaded_file)
                 st.session_state.confirmation_state[i] = 'done'
+
+            elif st.session_state.confirmation_state.get(i) == 'incremental':
+                processar_arquivo(uploaded_file, incremental=True)
+                st.session_state.confirmation_state[i] = 'done'
             
             elif st.session_state.confirmation_state.get(i) == 'cancel':
                 st.info(f"Operação para o arquivo '{uploaded_file.name}' cancelada.")
@@ -89,8 +130,62 @@ def render(controller):
         if i >= len(novos_uploads) or novos_uploads[i] is None:
             del st.session_state.confirmation_state[i]
 
+    # Esquece os hashes dos arquivos que saíram da página
+    presentes = {arquivo.file_id for arquivo in novos_uploads if arquivo is not None}
+    for file_id in list(st.session_state.get(CHAVE_HASHES, {})):
+        if file_id not in presentes:
+            del st.session_state[CHAVE_HASHES][file_id]
+
     if len(st.session_state.get("uploads", [])) > 0 and st.session_state["uploads"][-1] is not None:
         if len(st.session_state["uploads"]) < 3:
             novos_uploads.append(None)
 
-    st.session_state["uploads"] = novos_uploads
\ No newline at end of file
+    st.session_state["uploads"] = novos_uploads
+
+    acompanhar_cargas(st.session_state["tarefas_ingestao"])
+
+
+def acompanhar_cargas(ids_tarefas):
+    if not ids_tarefas:
+        return
+
+    ativo = agendador_ingestao.em_andamento(ids_tarefas)
+
+    # Enquanto houver carga em andamento só este trecho é reexecutado, a cada
+    # INTERVALO_PROGRESSO segundos; o usuário pode trocar de página à vontade
+    @st.fragment(run_every=INTERVALO_PROGRESSO if ativo else None)
+    def painel():
+        st.markdown("---")
+        st.subheader("Cargas")
+        for tarefa in agendador_ingestao.tarefas(ids_tarefas):
+            lidas = f"{tarefa['linhas_lidas']:,}".replace(",", ".")
+            mantidas = f"{tarefa['linhas_mantidas']:,}".replace(",", ".")
+            linhas = f"{lidas} linhas lidas, {mantidas} mantidas (UF=PA)"
+
+            if tarefa["estado"] in ("recebendo", "na fila"):
+                st.info(f"'{tarefa['arquivo']}': aguardando um processo livre...")
+            elif tarefa["estado"] == "processando":
+                st.info(f"Processando e salvando dados de {tarefa['ano']} ('{tarefa['arquivo']}')...")
+                st.caption(f"Bloco {tarefa['bloco']}: {linhas}")
+            elif tarefa["estado"] == "concluído" and tarefa["resumo"] and tarefa["resumo"].get("identica"):
+                st.info(f"'{tarefa['arquivo']}' é idêntico ao carregado em {tarefa['resumo']['identica']}; "
+                        f"os dados de {tarefa['ano']} não foram alterados.")
+            elif tarefa["estado"] == "concluído":
+                st.success(f"Sucesso! Dados para o ano de {tarefa['ano']} foram salvos em '{tarefa['db_path']}'. {linhas}.")
+                resumo = tarefa["resumo"]
+                if resumo and tarefa["incremental"]:
+                    inseridas, atualizadas, inalteradas = (
+                        f"{resumo[chave]:,}".replace(",", ".")
+                        for chave in ("inseridas", "atualizadas", "inalteradas"))
+                    st.caption(f"{inseridas} inseridas, {atualizadas} atualizadas e {inalteradas} "
+                               f"inalteradas em {resumo['segundos']:.1f} s")
+                with st.expander(f"Ver amostra dos dados carregados de {tarefa['ano']} (UF=PA)"):
+                    st.dataframe(tarefa["amostra"].head())
+            else:
+                st.error(f"'{tarefa['arquivo']}': {tarefa['erro']}")
+
+        if ativo and not agendador_ingestao.em_andamento(ids_tarefas):
+            # Tudo concluído: recarrega a página inteira para parar a atualização
+            st.rerun()
+
+    painel()
\ No newline at end of file
@@ -0,0 +1,94 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from benchmarks.benchmark_mmap import multiplicar_linhas
+from benchmarks.benchmark_snapshot import preparar_copia
+
+# Ponto de referência das buscas (centro de Belém)
+LATITUDE = -1.4558
+LONGITUDE = -48.4902
+
+
+def medir(funcao, repeticoes):
+    # Primeira chamada (com a leitura dos dados, se houver) e mediana das seguintes
+    inicio = time.perf_counter()
+    funcao()
+    primeira = time.perf_counter() - inicio
+    medidas = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        medidas.append(time.perf_counter() - inicio)
+    return primeira * 1000, statistics.median(medidas) * 1000, len(resultado)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compara as buscas por área, raio e vizinhos mais próximos pelo índice "
+                    "espacial com o filtro sobre todas as linhas do ano.")
+    parser.add_argument("--dados", default=os.path.join(RAIZ, "data"),
+                        help="Pasta com os bancos acidentes_<ano>.db (padrão: data/)")
+    parser.add_argument("--multiplicar", type=int, default=1,
+                        help="Repete as linhas do último banco N vezes (padrão: 1)")
+    parser.add_argument("--raio-km", type=float, default=10)
+    parser.add_argument("--vizinhos", type=int, default=10)
+    parser.add_argument("--repeticoes", type=int, default=10)
+    parser.add_argument("--json", help="Grava os resultados neste arquivo")
+    args = parser.parse_args()
+
+    destino_json = os.path.abspath(args.json) if args.json else None
+    with tempfile.TemporaryDirectory() as pasta:
+        bancos = preparar_copia(os.path.abspath(args.dados), pasta)
+        if args.multiplicar > 1:
+            multiplicar_linhas(bancos[-1], args.multiplicar)
+
+        from controller.AcidenteController import AcidenteController
+        from Model.AcidenteModel import AcidenteModel
+
+        controller = AcidenteController(consolidado=False)
+        linhas = sum(int(AcidenteModel(f"data/{b}").consultar("SELECT COUNT(*) AS n FROM acidentes")["n"][0])
+                     for b in bancos)
+        print(f"Bancos medidos: {len(bancos)} ({linhas:,} linhas)\n".replace(",", "."))
+
+        area = AcidenteController._caixa_do_raio(LATITUDE, LONGITUDE, args.raio_km)
+
+        colunas = ["latitude", "longitude"]
+
+        def filtro_completo():
+            # O que as páginas fariam sem o índice: todas as linhas e um filtro
+            df = controller.listar_dados_consolidados_todos_anos(colunas)
+            return df[df["latitude"].between(area[0], area[1]) &
+                      df["longitude"].between(area[2], area[3])]
+
+        consultas = [
+            ("filtro sem índice", filtro_completo),
+            ("área", lambda: controller.acidentes_na_area(bancos, *area, colunas=colunas)),
+            ("raio", lambda: controller.acidentes_no_raio(
+                bancos, LATITUDE, LONGITUDE, args.raio_km, colunas=colunas)),
+            ("vizinhos", lambda: controller.acidentes_mais_proximos(
+                bancos, LATITUDE, LONGITUDE, args.vizinhos, colunas=colunas)),
+        ]
+
+        resultados = []
+        print(f"{'consulta':<18} {'primeira':>12} {'mediana':>12} {'linhas':>8}")
+        for nome, funcao in consultas:
+            primeira, mediana, quantidade = medir(funcao, args.repeticoes)
+            resultados.append({"consulta": nome, "primeira_ms": primeira, "mediana_ms": mediana,
+                               "linhas": quantidade})
+            print(f"{nome:<18} {primeira:>9.2f} ms {mediana:>9.2f} ms {quantidade:>8}")
+
+    if destino_json:
+        with open(destino_json, "w") as arquivo:
+            json.dump(resultados, arquivo, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from benchmarks.benchmark_snapshot import preparar_copia
+
+# Consultas feitas pelas páginas; as duas últimas não são cobertas pelo cubo
+# e percorrem a tabela acidentes
+CONSULTAS = [
+    ("metricas_gerais", lambda c, b: c.metricas_gerais(b)),
+    ("listar_municipios", lambda c, b: c.listar_municipios(b)),
+    ("dados_por_municipio", lambda c, b: c.dados_por_municipio(b, "BELEM")),
+    ("agregar causa_acidente", lambda c, b: c.agregar(b, ["causa_acidente"])),
+    ("agregar mes/municipio", lambda c, b: c.agregar(b, ["mes"], filtros={"municipio": "BELEM"})),
+    ("agregar fase_dia", lambda c, b: c.agregar(b, ["fase_dia"])),
+    ("listar_geolocalizados", None),
+]
+
+# fria: cada consulta em conexão nova, com o arquivo fora do cache do sistema;
+# aquecida: igual, mas depois de controller.aquecer(); quente: conexão e cache
+# já usados (mediana de várias repetições)
+MODOS = ["fria", "aquecida", "quente"]
+
+
+def descartar_cache_do_sistema(caminho):
+    # Tira as páginas do arquivo do cache do sistema operacional (Linux)
+    if not hasattr(os, "posix_fadvise"):
+        return False
+    fd = os.open(caminho, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+    return True
+
+
+def medir(modo, nome_banco, repeticoes):
+    # Executado em um processo separado; o mmap vem de TRANSITO_MMAP_MB
+    from controller.AcidenteController import AcidenteController
+    from Model.AcidenteModel import AcidenteModel
+    from Model.GerenciadorConexoes import gerenciador_conexoes
+
+    controller = AcidenteController(consolidado=False)
+    db_path = f"data/{nome_banco}"
+    consultas = [(nome, funcao or (lambda c, b: AcidenteModel(f"data/{b}").listar_geolocalizados("PA")))
+                 for nome, funcao in CONSULTAS]
+
+    if modo == "aquecida":
+        descartar_cache_do_sistema(db_path)
+        controller.aquecer(nome_banco)
+
+    tempos = {}
+    for nome, consulta in consultas:
+        if modo == "quente":
+            consulta(controller, nome_banco)
+            medidas = []
+            for _ in range(repeticoes):
+                inicio = time.perf_counter()
+                consulta(controller, nome_banco)
+                medidas.append(time.perf_counter() - inicio)
+            tempos[nome] = statistics.median(medidas) * 1000
+        else:
+            gerenciador_conexoes.fechar_livres()
+            if modo == "fria":
+                descartar_cache_do_sistema(db_path)
+            inicio = time.perf_counter()
+            consulta(controller, nome_banco)
+            tempos[nome] = (time.perf_counter() - inicio) * 1000
+    return tempos
+
+
+def multiplicar_linhas(nome_banco, vezes):
+    # Aumenta o banco copiando as mesmas linhas, para medir com um volume
+    # próximo ao de vários anos de dados
+    import pandas as pd
+    from Model.AcidenteModel import AcidenteModel
+
+    with AcidenteModel(f"data/{nome_banco}", escrita=True) as model:
+        df = model.listar_acidentes()
+        model.inserir_dados(pd.concat([df] * vezes, ignore_index=True), substituir=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Mede a latência das consultas do controller com o banco frio, aquecido e "
+                    "quente, com e sem mmap.")
+    parser.add_argument("--dados", default=os.path.join(RAIZ, "data"),
+                        help="Pasta com os bancos acidentes_<ano>.db (padrão: data/)")
+    parser.add_argument("--multiplicar", type=int, default=1,
+                        help="Repete as linhas do banco medido N vezes (padrão: 1)")
+    parser.add_argument("--mmap-mb", type=int, default=256,
+                        help="Tamanho do mmap na medição com mmap (padrão: 256)")
+    parser.add_argument("--repeticoes", type=int, default=20)
+    parser.add_argument("--json", help="Grava os resultados neste arquivo")
+    parser.add_argument("--medir", nargs=2, metavar=("MODO", "BANCO"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.medir:
+        modo, nome_banco = args.medir
+        print(json.dumps(medir(modo, nome_banco, args.repeticoes)))
+        return
+
+    if not hasattr(os, "posix_fadvise"):
+        print("Aviso: sem posix_fadvise, a medição fria usa o cache do sistema.")
+
+    destino_json = os.path.abspath(args.json) if args.json else None
+    resultados = []
+    with tempfile.TemporaryDirectory() as pasta:
+        nome_banco = preparar_copia(os.path.abspath(args.dados), pasta)[-1]
+        if args.multiplicar > 1:
+            multiplicar_linhas(nome_banco, args.multiplicar)
+        tamanho_mb = os.path.getsize(os.path.join(pasta, "data", nome_banco)) / 1024 ** 2
+        print(f"Banco medido: {nome_banco} ({tamanho_mb:.1f} MB)\n")
+
+        nomes = [nome for nome, _ in CONSULTAS]
+        print(f"{'modo':<9} {'mmap':>6}  " + "  ".join(f"{n[:22]:>22}" for n in nomes))
+        for modo in MODOS:
+            for mmap_mb in (0, args.mmap_mb):
+                ambiente = dict(os.environ, TRANSITO_MMAP_MB=str(mmap_mb))
+                saida = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "--repeticoes", str(args.repeticoes),
+                     "--medir", modo, nome_banco],
+                    capture_output=True, text=True, check=True, cwd=pasta, env=ambiente)
+                tempos = json.loads(saida.stdout)
+                resultados.append({"modo": modo, "mmap_mb": mmap_mb, "tempos_ms": tempos})
+                print(f"{modo:<9} {mmap_mb:>6}  " + "  ".join(f"{tempos[n]:>19.2f} ms" for n in nomes))
+
+    if destino_json:
+        with open(destino_json, "w") as arquivo:
+            json.dump(resultados, arquivo, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+import argparse
+import json
+import os
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+# Colunas usadas pelo mapa das páginas, para medir a leitura com projeção
+COLUNAS_MAPA = ["latitude", "longitude", "municipio", "mortos", "feridos_graves", "veiculos"]
+
+FORMATOS = [
+    ("sqlite", None),
+    ("parquet", None),
+    ("sqlite", COLUNAS_MAPA),
+    ("parquet", COLUNAS_MAPA),
+]
+
+
+def rss_mb():
+    # Memória residente atual; fora do Linux usa o pico (ru_maxrss)
+    try:
+        with open("/proc/self/statm") as arquivo:
+            paginas = int(arquivo.read().split()[1])
+        return paginas * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def medir(formato, db_path, colunas, repeticoes):
+    # Executado em um processo separado para cada formato, importando só o que
+    # a leitura usa, para que o RSS reflita o processo inteiro daquele formato
+    # (bibliotecas carregadas + dados)
+    if formato == "parquet":
+        from Model.SnapshotModel import SnapshotModel
+        carregar = lambda: SnapshotModel(db_path).ler(colunas)
+    else:
+        from Model.AcidenteModel import AcidenteModel
+        carregar = lambda: AcidenteModel(db_path).listar_geolocalizados("PA", colunas)
+
+    inicio = time.perf_counter()
+    df = carregar()
+    tempos = [time.perf_counter() - inicio]
+    rss_carregado = rss_mb()
+
+    for _ in range(repeticoes - 1):
+        inicio = time.perf_counter()
+        carregar()
+        tempos.append(time.perf_counter() - inicio)
+
+    return {
+        "linhas": len(df),
+        "colunas": len(df.columns),
+        "tempo_ms": statistics.median(tempos) * 1000,
+        "rss_mb": rss_carregado,
+        "memoria_df_mb": df.memory_usage(deep=True).sum() / 1024 ** 2,
+    }
+
+
+def preparar_copia(origem, destino):
+    # Trabalha sobre uma cópia de data/ para não alterar os bancos do projeto;
+    # atualizar_bancos() converte a cópia para o schema atual e grava os Parquet
+    from controller.AcidenteController import AcidenteController
+
+    os.makedirs(os.path.join(destino, "data"))
+    for nome in sorted(os.listdir(origem)):
+        if nome.endswith(".db"):
+            shutil.copy2(os.path.join(origem, nome), os.path.join(destino, "data", nome))
+
+    os.chdir(destino)
+    AcidenteController().atualizar_bancos()
+    return sorted(f for f in os.listdir("data") if f.endswith(".db"))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compara a leitura de cada ano pelo SQLite e pela cópia Parquet.")
+    parser.add_argument("--dados", default=os.path.join(RAIZ, "data"),
+                        help="Pasta com os bancos acidentes_<ano>.db (padrão: data/)")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--json", help="Grava os resultados neste arquivo")
+    parser.add_argument("--medir", nargs=3, metavar=("FORMATO", "BANCO", "COLUNAS"),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.medir:
+        formato, db_path, colunas = args.medir
+        colunas = colunas.split(",") if colunas != "-" else None
+        print(json.dumps(medir(formato, db_path, colunas, args.repeticoes)))
+        return
+
+    from Model.SnapshotModel import SnapshotModel
+    if not SnapshotModel.suportado():
+        sys.exit("O pyarrow não está instalado; instale com `pip install pyarrow`.")
+
+    destino_json = os.path.abspath(args.json) if args.json else None
+    resultados = []
+    with tempfile.TemporaryDirectory() as pasta:
+        bancos = preparar_copia(os.path.abspath(args.dados), pasta)
+
+        print(f"{'banco':<20} {'formato':<8} {'colunas':<8} {'linhas':>7} "
+              f"{'tempo (ms)':>11} {'RSS (MB)':>9} {'DataFrame (MB)':>15}")
+        for nome_banco in bancos:
+            for formato, colunas in FORMATOS:
+                saida = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "--repeticoes", str(args.repeticoes),
+                     "--medir", formato, f"data/{nome_banco}", ",".join(colunas) if colunas else "-"],
+                    capture_output=True, text=True, check=True, cwd=pasta)
+                medida = json.loads(saida.stdout)
+                medida.update(banco=nome_banco, formato=formato,
+                              projecao="mapa" if colunas else "todas")
+                resultados.append(medida)
+
+                print(f"{nome_banco:<20} {formato:<8} {medida['projecao']:<8} {medida['linhas']:>7} "
+                      f"{medida['tempo_ms']:>11.1f} {medida['rss_mb']:>9.1f} "
+                      f"{medida['memoria_df_mb']:>15.2f}")
+
+    if destino_json:
+        with open(destino_json, "w") as arquivo:
+            json.dump(resultados, arquivo, indent=2)
+
+
+if __name__ == "__main__":
+    main()
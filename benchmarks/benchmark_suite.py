@@ -0,0 +1,235 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from benchmarks import streamlit_simulado
+from benchmarks.dados_sinteticos import gravar_planilhas
+
+# O substituto do streamlit precisa estar no lugar antes de importar View/
+st = streamlit_simulado.instalar()
+
+import pandas as pd
+from controller.AcidenteController import AcidenteController
+from controller.CacheDados import cache_dados
+from View import dashboard_page, municipio_page, trechos_page, classificacao_page, periodo_page, analise_geral_page
+from View.components.sidebar import render_sidebar
+
+# Páginas executadas sem servidor: opção do menu da barra lateral e render
+PAGINAS = {
+    "dashboard": ("Visualização de Dados", dashboard_page.render),
+    "municipio": ("Acidentes por município", municipio_page.render),
+    "trechos": ("Trechos críticos", trechos_page.render),
+    "classificacao": ("Classificações", classificacao_page.render),
+    "periodo": ("Período", periodo_page.render),
+    "analise_geral": ("Análise Geral",
+                      lambda dados, ano, paleta, controller: analise_geral_page.render(controller, paleta)),
+}
+
+# Campos comparados entre duas execuções e o piso abaixo do qual uma
+# diferença é tratada como ruído (argumento de linha de comando)
+CAMPOS_COMPARADOS = {"mediana_ms": "minimo_ms", "pico_mb": "minimo_mb"}
+
+# Ponto das buscas por raio (centro de Belém)
+LATITUDE = -1.4558
+LONGITUDE = -48.4902
+
+
+def medir(funcao, repeticoes, preparar=cache_dados.invalidar, sempre_fria=False):
+    # Primeira chamada (fria: preparar esvazia o cache), mediana das seguintes
+    # (também frias com sempre_fria) e o pico de memória alocada (tracemalloc)
+    # numa chamada fria à parte, para que o rastreamento não pese nos tempos
+    preparar()
+    inicio = time.perf_counter()
+    funcao()
+    primeira = (time.perf_counter() - inicio) * 1000
+    tempos = []
+    for _ in range(repeticoes):
+        if sempre_fria:
+            preparar()
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+
+    preparar()
+    tracemalloc.start()
+    try:
+        funcao()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"primeira_ms": primeira, "mediana_ms": statistics.median(tempos) if tempos else primeira,
+            "pico_mb": pico / 1024 ** 2}
+
+
+def consultas_controller(controller):
+    bancos = controller.listar_bancos_de_dados()
+    ultimo = bancos[-1]
+    municipio = controller.listar_municipios(ultimo)[0]
+    return {
+        "listar_dados_por_banco": lambda: controller.listar_dados_por_banco(ultimo),
+        "listar_dados_consolidados_todos_anos": lambda: controller.listar_dados_consolidados_todos_anos(),
+        "metricas_gerais": lambda: controller.metricas_gerais(None),
+        "agregar": lambda: controller.agregar(None, ["ano", "municipio"], top_n=10),
+        "listar_municipios": lambda: controller.listar_municipios(ultimo),
+        "dados_por_municipio": lambda: controller.dados_por_municipio(ultimo, municipio),
+        "trechos_criticos": lambda: controller.trechos_criticos(None, janela_km=5, por_ano=True),
+        "serie_temporal": lambda: controller.serie_temporal(None, "semana", alinhar=True),
+        "mapa_calor": lambda: controller.mapa_calor(ultimo, municipio),
+        "acidentes_no_raio": lambda: controller.acidentes_no_raio(ultimo, LATITUDE, LONGITUDE, 20),
+    }
+
+
+def renderizar(pagina, controller):
+    # Barra lateral (que escolhe o último ano) seguida da página, como no index.py
+    opcao, render = PAGINAS[pagina]
+    st.reiniciar()
+    st.respostas["Projeto Big Data"] = opcao
+    _, dados, ano, paleta = render_sidebar()
+    render(dados, ano, paleta, controller)
+
+
+def ambiente():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        alterado = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=RAIZ,
+                                  capture_output=True, text=True, check=True).stdout.strip()
+        commit += "+alterado" if alterado else ""
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"commit": commit, "python": platform.python_version(), "pandas": pd.__version__,
+            "plataforma": platform.platform()}
+
+
+def comparar(anterior, atual, limite, pisos):
+    # Tabela das medidas presentes nas duas execuções; devolve as regressões:
+    # aumento acima de `limite` (fração) e acima do piso de ruído do campo
+    if anterior.get("parametros") != atual["parametros"]:
+        print("Atenção: as execuções usaram parâmetros diferentes; a comparação pode não valer.\n")
+    regressoes = []
+    print(f"{'medida':<48} {'campo':<11} {'anterior':>10} {'atual':>10} {'variação':>9}")
+    for nome, medidas in atual["medidas"].items():
+        base = anterior.get("medidas", {}).get(nome)
+        if base is None:
+            continue
+        for campo, piso in CAMPOS_COMPARADOS.items():
+            if campo not in base:
+                continue
+            antes, depois = base[campo], medidas[campo]
+            variacao = depois / antes - 1 if antes else 0.0
+            regrediu = variacao > limite and depois - antes > pisos[piso]
+            if regrediu:
+                regressoes.append((nome, campo, variacao))
+            print(f"{nome:<48} {campo:<11} {antes:>10.2f} {depois:>10.2f} {variacao:>+8.1%}"
+                  f"{'  <- regressão' if regrediu else ''}")
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Mede a ingestão, os métodos do controller e as páginas (sem servidor) sobre "
+                    "planilhas sintéticas no formato da PRF e grava os resultados em JSON para "
+                    "comparar entre commits.")
+    parser.add_argument("--linhas", type=int, default=50000, help="Linhas por ano (padrão: 50000)")
+    parser.add_argument("--anos", default="2022,2023,2024", help="Anos separados por vírgula")
+    parser.add_argument("--sujas", type=float, default=0.05,
+                        help="Fração de linhas com coordenadas sujas (padrão: 0.05)")
+    parser.add_argument("--fracao-pa", type=float, default=0.5,
+                        help="Fração de linhas do Pará (padrão: 0.5)")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--repeticoes", type=int, default=5,
+                        help="Chamadas medidas após a primeira (padrão: 5)")
+    parser.add_argument("--repeticoes-ingestao", type=int, default=1)
+    parser.add_argument("--json", help="Grava os resultados neste arquivo")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior para comparar")
+    parser.add_argument("--limite", type=float, default=0.25,
+                        help="Aumento máximo aceito em relação à execução anterior (padrão: 0.25)")
+    parser.add_argument("--minimo-ms", type=float, default=5,
+                        help="Diferenças de tempo menores que isso são ignoradas (padrão: 5)")
+    parser.add_argument("--minimo-mb", type=float, default=1,
+                        help="Diferenças de memória menores que isso são ignoradas (padrão: 1)")
+    args = parser.parse_args()
+
+    anos = [int(ano) for ano in args.anos.split(",")]
+    destino_json = os.path.abspath(args.json) if args.json else None
+    anterior = None
+    if args.comparar:
+        with open(args.comparar) as arquivo:
+            anterior = json.load(arquivo)
+
+    parametros = {"linhas": args.linhas, "anos": anos, "sujas": args.sujas, "fracao_pa": args.fracao_pa,
+                  "semente": args.semente, "repeticoes": args.repeticoes,
+                  "repeticoes_ingestao": args.repeticoes_ingestao}
+    resultado = {"ambiente": ambiente(), "parametros": parametros, "medidas": {}}
+    medidas = resultado["medidas"]
+
+    def registrar(nome, medida):
+        medidas[nome] = medida
+        extra = f" {medida['graficos']:>3} gráficos" if "graficos" in medida else ""
+        print(f"{nome:<48} {medida['primeira_ms']:>10.1f} {medida['mediana_ms']:>10.1f} "
+              f"{medida['pico_mb']:>9.1f}{extra}")
+
+    with tempfile.TemporaryDirectory() as pasta:
+        inicio = time.perf_counter()
+        planilhas = gravar_planilhas(os.path.join(pasta, "planilhas"), args.linhas, anos,
+                                     args.sujas, args.fracao_pa, args.semente)
+        print(f"{len(planilhas)} planilhas sintéticas com {args.linhas:,} linhas geradas em "
+              f"{time.perf_counter() - inicio:.1f} s\n".replace(",", "."))
+        print(f"{'medida':<48} {'primeira ms':>10} {'mediana ms':>10} {'pico MB':>9}")
+
+        controller = AcidenteController()
+        rodadas = iter(range(args.repeticoes_ingestao + 2))
+
+        def nova_pasta():
+            # Cada ingestão começa sem bancos; a última pasta fica para as consultas
+            trabalho = os.path.join(pasta, f"trabalho_{next(rodadas)}")
+            os.makedirs(os.path.join(trabalho, "data"))
+            os.chdir(trabalho)
+            cache_dados.invalidar()
+
+        def ingerir():
+            for caminho in planilhas:
+                with open(caminho, "rb") as arquivo:
+                    controller.processar_planilha(arquivo, nome_arquivo=os.path.basename(caminho))
+
+        registrar("ingestao", medir(ingerir, args.repeticoes_ingestao, nova_pasta, sempre_fria=True))
+
+        bruto = pd.read_csv(planilhas[-1], sep=";", encoding="latin1", dtype=str)
+        registrar("limpeza_coordenadas", medir(lambda: controller._limpar_coordenadas(bruto), args.repeticoes))
+
+        for nome, funcao in consultas_controller(controller).items():
+            registrar(f"controller.{nome}", medir(funcao, args.repeticoes))
+
+        st.respostas["Selecione o ano para Análise:"] = controller.listar_bancos_de_dados()[-1]
+        for pagina in PAGINAS:
+            medida = medir(lambda: renderizar(pagina, controller), args.repeticoes)
+            medida.update(graficos=st.graficos, kb_graficos=st.bytes_graficos / 1024)
+            registrar(f"pagina.{pagina}", medida)
+        os.chdir(RAIZ)
+
+    if destino_json:
+        with open(destino_json, "w") as arquivo:
+            json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+
+    if anterior is not None:
+        print()
+        regressoes = comparar(anterior, resultado, args.limite,
+                              {"minimo_ms": args.minimo_ms, "minimo_mb": args.minimo_mb})
+        if regressoes:
+            print(f"\n{len(regressoes)} regressão(ões) acima de {args.limite:.0%}.")
+            sys.exit(1)
+        print(f"\nNenhuma regressão acima de {args.limite:.0%}.")
+
+
+if __name__ == "__main__":
+    main()
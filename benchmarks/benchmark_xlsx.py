@@ -0,0 +1,117 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from controller.AcidenteController import AcidenteController
+from Model.AcidenteModel import AcidenteModel
+
+UFS = ["AC", "AL", "AM", "AP", "BA", "CE", "DF", "ES", "GO", "MA", "MG", "MS", "MT", "PA",
+       "PB", "PE", "PI", "PR", "RJ", "RN", "RO", "RR", "RS", "SC", "SE", "SP", "TO"]
+
+# Fração aproximada das linhas do Pará nas planilhas nacionais da PRF
+FRACAO_PA = 0.05
+
+
+def gerar_planilhas(pasta_dados, linhas, destino, semente=42):
+    # Planilha nacional sintética: linhas dos bancos em data/ sorteadas com
+    # reposição e espalhadas entre as UFs, gravadas como .xlsx e como .csv
+    from openpyxl import Workbook
+
+    base = pd.concat([AcidenteModel(os.path.join(pasta_dados, f)).listar_acidentes()
+                      for f in sorted(os.listdir(pasta_dados)) if f.endswith(".db")],
+                     ignore_index=True)
+    if "hora" in base.columns:
+        base = base.drop(columns="hora")
+
+    gerador = np.random.default_rng(semente)
+    df = base.iloc[gerador.integers(0, len(base), linhas)].reset_index(drop=True)
+    outras = [uf for uf in UFS if uf != "PA"]
+    df["uf"] = np.where(gerador.random(linhas) < FRACAO_PA, "PA",
+                        gerador.choice(outras, linhas))
+    df["id"] = np.arange(1, linhas + 1)
+
+    caminho_csv = os.path.join(destino, "nacional_2030.csv")
+    df.to_csv(caminho_csv, sep=";", encoding="latin1", errors="replace", index=False)
+
+    caminho_xlsx = os.path.join(destino, "nacional_2030.xlsx")
+    livro = Workbook(write_only=True)
+    aba = livro.create_sheet()
+    aba.append(list(df.columns))
+    for linha in df.astype(object).where(df.notna(), None).itertuples(index=False):
+        aba.append(list(linha))
+    livro.save(caminho_xlsx)
+
+    return caminho_xlsx, caminho_csv
+
+
+def cronometrar(funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return time.perf_counter() - inicio, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compara a ingestão de uma planilha nacional sintética em .xlsx e em .csv.")
+    parser.add_argument("--linhas", type=int, default=70000,
+                        help="Linhas da planilha sintética (padrão: 70000, um ano nacional)")
+    parser.add_argument("--dados", default=os.path.join(RAIZ, "data"),
+                        help="Pasta com os bancos usados como base (padrão: data/)")
+    parser.add_argument("--json", help="Grava os resultados neste arquivo")
+    args = parser.parse_args()
+
+    pasta_dados = os.path.abspath(args.dados)
+    destino_json = os.path.abspath(args.json) if args.json else None
+    controller = AcidenteController(consolidado=False)
+    resultados = {"linhas": args.linhas}
+
+    with tempfile.TemporaryDirectory() as pasta:
+        tempo, (caminho_xlsx, caminho_csv) = cronometrar(
+            lambda: gerar_planilhas(pasta_dados, args.linhas, pasta))
+        print(f"Planilhas sintéticas com {args.linhas} linhas geradas em {tempo:.1f} s "
+              f"(xlsx: {os.path.getsize(caminho_xlsx) / 1024 ** 2:.1f} MB, "
+              f"csv: {os.path.getsize(caminho_csv) / 1024 ** 2:.1f} MB)")
+        os.chdir(pasta)
+
+        def ler_todos(caminho):
+            return sum(len(bloco) for _, bloco in controller._ler_em_blocos(
+                caminho, os.path.basename(caminho), 20000))
+
+        def ingerir(caminho):
+            with open(caminho, "rb") as arquivo:
+                controller.processar_planilha(arquivo, nome_arquivo=os.path.basename(caminho))
+
+        def converter_e_ingerir():
+            caminho = os.path.join(pasta, "convertida_2030.csv")
+            controller.converter_xlsx_para_csv(caminho_xlsx, caminho)
+            ingerir(caminho)
+
+        medicoes = [
+            ("leitura xlsx: pd.read_excel (caminho anterior)", lambda: len(pd.read_excel(caminho_xlsx))),
+            ("leitura xlsx: streaming somente leitura", lambda: ler_todos(caminho_xlsx)),
+            ("leitura csv", lambda: ler_todos(caminho_csv)),
+            ("ingestão completa xlsx", lambda: ingerir(caminho_xlsx)),
+            ("ingestão completa csv", lambda: ingerir(caminho_csv)),
+            ("ingestão xlsx convertida para csv", converter_e_ingerir),
+        ]
+        for nome, funcao in medicoes:
+            tempo, _ = cronometrar(funcao)
+            resultados[nome] = tempo
+            print(f"{nome:<50} {tempo:>8.2f} s")
+
+    if destino_json:
+        with open(destino_json, "w") as arquivo:
+            json.dump(resultados, arquivo, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
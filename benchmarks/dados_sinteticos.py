@@ -0,0 +1,139 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Planilhas sintéticas no formato das planilhas de acidentes da PRF (mesmas
+# colunas, números com vírgula decimal, horário HH:MM:SS), sem depender dos
+# bancos em data/. A mesma semente gera sempre os mesmos arquivos.
+
+COLUNAS_PRF = [
+    "id", "data_inversa", "dia_semana", "horario", "uf", "br", "km", "municipio",
+    "causa_acidente", "tipo_acidente", "classificacao_acidente", "fase_dia", "sentido_via",
+    "condicao_metereologica", "tipo_pista", "tracado_via", "uso_solo", "pessoas", "mortos",
+    "feridos_leves", "feridos_graves", "ilesos", "ignorados", "feridos", "veiculos",
+    "latitude", "longitude", "regional", "delegacia", "uop",
+]
+
+UFS = ["AC", "AL", "AM", "AP", "BA", "CE", "DF", "ES", "GO", "MA", "MG", "MS", "MT",
+       "PB", "PE", "PI", "PR", "RJ", "RN", "RO", "RR", "RS", "SC", "SE", "SP", "TO"]
+
+# Municípios do Pará cortados por rodovias federais, com a br principal e a
+# coordenada aproximada da sede
+MUNICIPIOS = {
+    "BELEM": (316, -1.4558, -48.4902),
+    "ANANINDEUA": (316, -1.3656, -48.3722),
+    "MARITUBA": (316, -1.3553, -48.3421),
+    "CASTANHAL": (316, -1.2939, -47.9261),
+    "SANTA MARIA DO PARA": (316, -1.3503, -47.5756),
+    "CAPANEMA": (308, -1.1956, -47.1806),
+    "PARAGOMINAS": (10, -2.9967, -47.3528),
+    "DOM ELISEU": (10, -4.2850, -47.5553),
+    "ULIANOPOLIS": (10, -3.7500, -47.4892),
+    "MARABA": (230, -5.3686, -49.1178),
+    "ITUPIRANGA": (230, -5.1347, -49.3267),
+    "ALTAMIRA": (230, -3.2033, -52.2064),
+    "ITAITUBA": (230, -4.2761, -55.9836),
+    "NOVO PROGRESSO": (163, -7.1478, -55.3797),
+    "SANTAREM": (163, -2.4431, -54.7083),
+    "REDENCAO": (155, -8.0253, -50.0317),
+    "XINGUARA": (155, -7.0983, -49.9436),
+    "ELDORADO DOS CARAJAS": (155, -6.1039, -49.3553),
+    "SAO GERALDO DO ARAGUAIA": (153, -6.4006, -48.5550),
+    "TUCURUI": (422, -3.7661, -49.6725),
+}
+
+CATEGORIAS = {
+    "causa_acidente": ["Reação tardia ou ineficiente do condutor", "Ausência de reação do condutor",
+                       "Velocidade Incompatível", "Ingestão de álcool pelo condutor",
+                       "Acessar a via sem observar a presença dos outros veículos",
+                       "Transitar na contramão", "Pista esburacada", "Condutor Dormindo"],
+    "tipo_acidente": ["Colisão traseira", "Colisão frontal", "Colisão transversal", "Saída de leito carroçável",
+                      "Tombamento", "Atropelamento de Pedestre", "Queda de ocupante de veículo",
+                      "Colisão lateral mesmo sentido", "Engavetamento"],
+    "fase_dia": ["Pleno dia", "Plena Noite", "Anoitecer", "Amanhecer"],
+    "sentido_via": ["Crescente", "Decrescente"],
+    "condicao_metereologica": ["Céu Claro", "Nublado", "Chuva", "Garoa/Chuvisco", "Nevoeiro/Neblina"],
+    "tipo_pista": ["Simples", "Dupla", "Múltipla"],
+    "tracado_via": ["Reta", "Curva", "Interseção de vias", "Aclive", "Declive"],
+    "uso_solo": ["Sim", "Não"],
+}
+
+DIAS_SEMANA = ["segunda-feira", "terça-feira", "quarta-feira", "quinta-feira",
+               "sexta-feira", "sábado", "domingo"]
+
+# Formas de coordenada suja encontradas nas planilhas: vazia, texto, fora da
+# faixa válida, ponto decimal em vez de vírgula e rótulo antes do número
+COORDENADAS_SUJAS = ["", "NA", "sem informação", "999,0", "{:.5f}", "lat: {:.5f}"]
+
+
+def gerar_acidentes(linhas, ano, fracao_sujas=0.05, fracao_pa=0.5, semente=42):
+    # DataFrame com as colunas da PRF, tudo como texto. fracao_sujas: parte das
+    # linhas com latitude e longitude em algum formato de COORDENADAS_SUJAS;
+    # fracao_pa: parte das linhas do Pará (o resto fica espalhado pelas UFs)
+    gerador = np.random.default_rng([semente, int(ano)])
+    nomes = list(MUNICIPIOS)
+    municipio = gerador.integers(0, len(nomes), linhas)
+    brs = np.array([MUNICIPIOS[n][0] for n in nomes])[municipio]
+    latitude = np.array([MUNICIPIOS[n][1] for n in nomes])[municipio] + gerador.normal(0, 0.08, linhas)
+    longitude = np.array([MUNICIPIOS[n][2] for n in nomes])[municipio] + gerador.normal(0, 0.08, linhas)
+
+    datas = pd.Timestamp(f"{ano}-01-01") + pd.to_timedelta(
+        gerador.integers(0, 365 + pd.Timestamp(f"{ano}-12-31").is_leap_year, linhas), unit="D")
+    segundos = gerador.integers(0, 24 * 3600, linhas)
+
+    feridos_leves = gerador.poisson(0.8, linhas)
+    feridos_graves = gerador.binomial(2, 0.1, linhas)
+    mortos = gerador.binomial(2, 0.03, linhas)
+    # Todo acidente tem ao menos uma pessoa envolvida
+    ilesos = gerador.poisson(1.0, linhas) + (feridos_leves + feridos_graves + mortos == 0)
+    classificacao = np.where(mortos > 0, "Com Vítimas Fatais",
+                             np.where(feridos_leves + feridos_graves > 0, "Com Vítimas Feridas", "Sem Vítimas"))
+
+    df = pd.DataFrame({
+        "id": ano * 10 ** 7 + np.arange(1, linhas + 1),
+        "data_inversa": datas.strftime("%Y-%m-%d"),
+        "dia_semana": np.array(DIAS_SEMANA)[datas.weekday],
+        "horario": [f"{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}" for s in segundos],
+        "uf": np.where(gerador.random(linhas) < fracao_pa, "PA", gerador.choice(UFS, linhas)),
+        "br": brs.astype(str),
+        "km": pd.Series(gerador.uniform(0, 700, linhas).round(1)).map("{:.1f}".format).str.replace(".", ","),
+        "municipio": np.array(nomes)[municipio],
+        "classificacao_acidente": classificacao,
+        "pessoas": feridos_leves + feridos_graves + mortos + ilesos,
+        "mortos": mortos,
+        "feridos_leves": feridos_leves,
+        "feridos_graves": feridos_graves,
+        "ilesos": ilesos,
+        "ignorados": 0,
+        "feridos": feridos_leves + feridos_graves,
+        "veiculos": gerador.integers(1, 4, linhas),
+        "regional": "SPRF-PA",
+        "delegacia": "DEL01-PA",
+        "uop": "UOP01-DEL01-PA",
+    })
+    for coluna, valores in CATEGORIAS.items():
+        df[coluna] = gerador.choice(valores, linhas)
+    df["latitude"] = _coordenadas(latitude, gerador, fracao_sujas)
+    df["longitude"] = _coordenadas(longitude, gerador, fracao_sujas)
+    return df[COLUNAS_PRF]
+
+
+def _coordenadas(valores, gerador, fracao_sujas):
+    texto = pd.Series(valores).map("{:.6f}".format).str.replace(".", ",")
+    sujas = np.flatnonzero(gerador.random(len(valores)) < fracao_sujas)
+    formatos = gerador.choice(COORDENADAS_SUJAS, len(sujas))
+    texto.iloc[sujas] = [formato.format(valor) for formato, valor in zip(formatos, valores[sujas])]
+    return texto
+
+
+def gravar_planilhas(destino, linhas, anos, fracao_sujas=0.05, fracao_pa=0.5, semente=42):
+    # Uma planilha acidentes_<ano>.csv (separador ";", latin-1) por ano
+    os.makedirs(destino, exist_ok=True)
+    caminhos = []
+    for ano in anos:
+        caminho = os.path.join(destino, f"acidentes_{ano}.csv")
+        gerar_acidentes(linhas, ano, fracao_sujas, fracao_pa, semente).to_csv(
+            caminho, sep=";", encoding="latin1", errors="replace", index=False)
+        caminhos.append(caminho)
+    return caminhos
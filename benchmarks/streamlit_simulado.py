@@ -0,0 +1,122 @@
+import sys
+import types
+
+# Substituto do streamlit para executar as páginas sem servidor nem navegador.
+# Os widgets devolvem o valor padrão (ou o de `respostas`, pelo rótulo), os
+# contêineres (colunas, expanders, sidebar) aceitam qualquer chamada e os
+# gráficos são serializados como o streamlit faria antes de enviá-los.
+
+
+class _Elemento:
+    # Qualquer atributo ou chamada devolve o próprio elemento, que também serve
+    # de contexto (with col1: ...)
+    def __init__(self, simulado):
+        self._simulado = simulado
+
+    def __getattr__(self, nome):
+        metodo = getattr(StreamlitSimulado, nome, None)
+        if callable(metodo) and not nome.startswith("_"):
+            return getattr(self._simulado, nome)
+        return self
+
+    def __call__(self, *args, **kwargs):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        return False
+
+
+class StreamlitSimulado(types.ModuleType):
+    def __init__(self):
+        super().__init__("streamlit")
+        self.session_state = {}
+        self.respostas = {}
+        self.graficos = 0
+        self.bytes_graficos = 0
+        self.sidebar = _Elemento(self)
+
+    def __getattr__(self, nome):
+        # header, write, metric, warning, markdown...: sem efeito
+        if nome.startswith("__"):
+            raise AttributeError(nome)
+        return _Elemento(self)
+
+    def reiniciar(self):
+        self.session_state.clear()
+        self.graficos = 0
+        self.bytes_graficos = 0
+
+    def _resposta(self, rotulo, padrao):
+        return self.respostas.get(rotulo, padrao)
+
+    def columns(self, spec, **kwargs):
+        quantidade = spec if isinstance(spec, int) else len(spec)
+        return [_Elemento(self) for _ in range(quantidade)]
+
+    def tabs(self, nomes):
+        return [_Elemento(self) for _ in nomes]
+
+    def selectbox(self, rotulo, options, index=0, **kwargs):
+        opcoes = list(options)
+        padrao = opcoes[index] if opcoes and index is not None else None
+        return self._resposta(rotulo, padrao)
+
+    radio = selectbox
+
+    def multiselect(self, rotulo, options, default=None, **kwargs):
+        return self._resposta(rotulo, list(default or []))
+
+    def slider(self, rotulo, min_value=None, max_value=None, value=None, *args, **kwargs):
+        return self._resposta(rotulo, value if value is not None else min_value)
+
+    def checkbox(self, rotulo, value=False, **kwargs):
+        return self._resposta(rotulo, value)
+
+    toggle = checkbox
+
+    def text_input(self, rotulo, value="", **kwargs):
+        return self._resposta(rotulo, value)
+
+    def number_input(self, rotulo, min_value=None, max_value=None, value=None, **kwargs):
+        return self._resposta(rotulo, value if value is not None else min_value)
+
+    def button(self, rotulo, *args, **kwargs):
+        return self._resposta(rotulo, False)
+
+    def file_uploader(self, rotulo, *args, **kwargs):
+        return self._resposta(rotulo, None)
+
+    def get_option(self, nome):
+        return None
+
+    def plotly_chart(self, figura, *args, **kwargs):
+        self.graficos += 1
+        self.bytes_graficos += len(figura.to_json())
+
+    def fragment(self, funcao=None, **kwargs):
+        # @st.fragment e @st.fragment(run_every=...)
+        return funcao if funcao is not None else (lambda f: f)
+
+    def cache_data(self, funcao=None, **kwargs):
+        return funcao if funcao is not None else (lambda f: f)
+
+    cache_resource = cache_data
+
+    def rerun(self):
+        pass
+
+
+def instalar():
+    # Registra o substituto no lugar do streamlit (e do streamlit_option_menu,
+    # cujo menu devolve a opção de `respostas` pelo título ou a padrão); deve
+    # ser chamado antes de importar qualquer módulo de View/
+    simulado = StreamlitSimulado()
+    menu = types.ModuleType("streamlit_option_menu")
+    menu.option_menu = lambda menu_title, options, default_index=0, **kwargs: \
+        simulado.respostas.get(menu_title, options[default_index])
+    sys.modules["streamlit"] = simulado
+    sys.modules["streamlit_option_menu"] = menu
+    return simulado
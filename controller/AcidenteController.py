@@ -1,13 +1,94 @@
 import pandas as pd
+import numpy as np
 import re
 import os
+import math
+import csv
+import time
+import hashlib
 import logging
-from Model.AcidenteModel import AcidenteModel
+import threading
+from Model.AcidenteModel import AcidenteModel, VERSAO_SCHEMA, VERSAO_TIPADA, COLUNAS_ACIDENTES, COLUNAS_CONTROLE
+from Model.CuboModel import CUBOS, MEDIDAS_CUBO, DIMENSOES_DERIVADAS, CONDICAO_CUBO
+from Model.ConsolidadoModel import ConsolidadoModel, CAMINHO_CONSOLIDADO
+from Model.SnapshotModel import SnapshotModel, COLUNAS_CATEGORICAS
+from controller.CacheDados import cache_dados
+from controller.DicionarioCategorias import dicionario_categorias
+from controller.RankingTrechos import ranking_trechos, JANELA_PADRAO_KM, TOP_N_PADRAO
+from controller.SeriesTemporais import series_temporais
+from suporte.Instrumentacao import instrumentacao
+
+# Com o modo consolidado ativo, além de um banco por ano é mantido um banco único
+# com todos os anos (partições por ano) para as análises entre anos
+USAR_BANCO_CONSOLIDADO = os.environ.get("TRANSITO_BANCO_CONSOLIDADO", "0") == "1"
+
+# Com o aquecimento ativo, ao subir o servidor o banco do ano carregado mais
+# recentemente é lido em segundo plano (páginas do SQLite e dados do mapa)
+AQUECER_NA_INICIALIZACAO = os.environ.get("TRANSITO_AQUECER", "0") == "1"
+_trava_aquecimento = threading.Lock()
+
+# Quantidade de linhas lidas por vez durante a ingestão das planilhas
+TAMANHO_BLOCO_PADRAO = 20000
+# Bytes lidos por vez ao calcular o hash de um arquivo enviado
+TAMANHO_BLOCO_HASH = 1024 * 1024
+TAMANHO_AMOSTRA = 5
+
+COLUNAS_CONTAGEM = ["pessoas", "mortos", "feridos_leves", "feridos_graves",
+                    "ilesos", "ignorados", "feridos", "veiculos"]
+
+FUNCOES_AGREGACAO = ["contagem", "soma", "media"]
+
+# Nos quadros mantidos em memória, além das colunas categóricas do snapshot,
+# datas, horários e o ano (poucos valores repetidos) também viram category
+COLUNAS_CATEGORICAS_MEMORIA = COLUNAS_CATEGORICAS + ["data_inversa", "horario", "ano"]
+COLUNAS_COORDENADAS = ["latitude", "longitude"]
+
+# Buscas espaciais: raio da Terra (o mesmo da distância haversine), folga do
+# retângulo de candidatos (arredondamentos) e os raios usados na busca dos
+# acidentes mais próximos
+RAIO_TERRA_KM = 6371.0088
+FOLGA_CAIXA_GRAUS = 1e-5
+RAIO_INICIAL_KM = 2
+RAIO_MAXIMO_KM = 20000
+
+# Medidas somadas por trecho de rodovia, com os nomes usados pelo ranking
+MEDIDAS_TRECHOS = {
+    "total_acidentes": ("contagem", None),
+    "feridos_leves": ("soma", "feridos_leves"),
+    "feridos_graves": ("soma", "feridos_graves"),
+    "mortos": ("soma", "mortos"),
+}
+
+# Medidas das séries temporais e do mapa de calor por dia da semana e hora
+MEDIDAS_SERIES = {
+    "total_acidentes": ("contagem", None),
+    "mortos": ("soma", "mortos"),
+    "feridos_graves": ("soma", "feridos_graves"),
+    "feridos": ("soma", "feridos"),
+}
+
+CONSULTA_MUNICIPIOS = "SELECT DISTINCT municipio FROM acidentes WHERE uf = 'PA' ORDER BY municipio ASC"
+
+# Detalhamento de um município, com os nomes usados pela página
+MEDIDAS_MUNICIPIO = {
+    "total_acidentes": ("contagem", None),
+    "total_feridos_graves": ("soma", "feridos_graves"),
+    "total_mortos": ("soma", "mortos"),
+    "total_veiculos": ("soma", "veiculos"),
+}
+
+MEDIDAS_METRICAS = {
+    "total_acidentes": ("contagem", None),
+    "total_mortos": ("soma", "mortos"),
+    "total_feridos_graves": ("soma", "feridos_graves"),
+    "total_veiculos": ("soma", "veiculos"),
+    "media_veiculos": ("media", "veiculos"),
+}
 
 
 class AcidenteController:
-    def __init__(self):
-        pass
+    def __init__(self, consolidado=USAR_BANCO_CONSOLIDADO):
+        self.consolidado = consolidado
 
     def extrair_ano_do_nome(self, nome_arquivo):
         match = re.search(r'\d{4}', nome_arquivo)
@@ -15,38 +96,290 @@ class AcidenteController:
             return match.group(0)
         return None
 
-    def processar_planilha(self, arquivo):
+    @instrumentacao.instrumentar("controller")
+    def processar_planilha(self, arquivo, tamanho_bloco=TAMANHO_BLOCO_PADRAO, progresso=None,
+                           nome_arquivo=None, incremental=False):
+        # nome_arquivo: nome original, quando o arquivo foi salvo com outro nome;
+        # incremental: mescla a planilha com os dados do ano (pelo id da PRF)
+        # em vez de substituí-los. Devolve (amostra, db_path, resumo da carga).
         try:
-            ano = self.extrair_ano_do_nome(arquivo.name)
+            nome_arquivo = nome_arquivo or arquivo.name
+            ano = self.extrair_ano_do_nome(nome_arquivo)
             if not ano:
                 raise Exception(
-                    f"Nome de arquivo inválido. O nome '{arquivo.name}' deve conter um ano com 4 dígitos.")
+                    f"Nome de arquivo inválido. O nome '{nome_arquivo}' deve conter um ano com 4 dígitos.")
 
             db_path = f"data/acidentes_{ano}.db"
-            model = AcidenteModel(db_path=db_path)
+            inicio = time.perf_counter()
+            hash_arquivo, tamanho_bytes = self.calcular_hash(arquivo)
+            carga = self.carga_identica(db_path, hash_arquivo, incremental)
+            if carga is not None:
+                # O mesmo arquivo já foi o último aplicado ao ano: nada muda
+                logging.info("%s: '%s' é idêntico à carga de %s; ignorado.",
+                             db_path, nome_arquivo, carga["fim"])
+                resumo = {"inseridas": 0, "atualizadas": 0, "inalteradas": carga["linhas_mantidas"],
+                          "segundos": time.perf_counter() - inicio, "identica": carga["fim"]}
+                return pd.DataFrame(), db_path, resumo
 
-            if arquivo.name.endswith(".csv"):
-                df = pd.read_csv(arquivo, encoding="latin1", sep=";")
-            else:
-                df = pd.read_excel(arquivo)
+            if incremental and os.path.exists(db_path) and \
+                    AcidenteModel(db_path).versao_schema() < VERSAO_SCHEMA:
+                # A mesclagem usa as colunas de controle da versão atual
+                self.atualizar_banco(os.path.basename(db_path))
 
-            df.columns = [re.sub(r"\s+", "_", str(c).strip().lower())
-                          for c in df.columns]
+            resumo = {"inseridas": 0, "atualizadas": 0, "inalteradas": 0, "segundos": 0.0}
+            with AcidenteModel(db_path, escrita=True) as model:
+                amostra = []
+                linhas_amostra = 0
+                linhas_lidas = 0
+                linhas_mantidas = 0
+                carga_iniciada = False
 
-            if "uf" not in df.columns:
-                raise Exception(
-                    f"A coluna 'uf' é obrigatória e não foi encontrada.")
+                try:
+                    blocos = self._ler_em_blocos(arquivo, nome_arquivo, tamanho_bloco)
+                    for numero_bloco, (lidas_no_bloco, bloco_pa) in enumerate(blocos, start=1):
+                        linhas_lidas += lidas_no_bloco
+                        linhas_mantidas += len(bloco_pa)
+
+                        if not bloco_pa.empty:
+                            # Os dados do ano só são substituídos quando há linhas do Pará
+                            if not carga_iniciada:
+                                model.iniciar_carga(substituir=not incremental)
+                                carga_iniciada = True
+                            bloco_pa = self._preparar_dados(bloco_pa)
+                            if incremental:
+                                model.mesclar_bloco(bloco_pa)
+                            else:
+                                model.inserir_bloco(bloco_pa)
+
+                            if linhas_amostra < TAMANHO_AMOSTRA:
+                                amostra.append(bloco_pa.head(TAMANHO_AMOSTRA - linhas_amostra))
+                                linhas_amostra += len(amostra[-1])
+
+                        if progresso is not None:
+                            progresso(numero_bloco, linhas_lidas, linhas_mantidas)
+                except Exception:
+                    if carga_iniciada:
+                        model.cancelar_carga()
+                    raise
 
-            df_pa = df[df["uf"].str.upper() == "PA"]
+                if carga_iniciada:
+                    resumo = model.concluir_carga({
+                        "hash_arquivo": hash_arquivo, "nome_arquivo": nome_arquivo,
+                        "tamanho_bytes": tamanho_bytes, "linhas_lidas": linhas_lidas,
+                        "linhas_mantidas": linhas_mantidas})
+                    logging.info("%s: %d inseridas, %d atualizadas, %d inalteradas em %.2f s "
+                                 "(%.0f linhas/s)", db_path, resumo["inseridas"], resumo["atualizadas"],
+                                 resumo["inalteradas"], resumo["segundos"],
+                                 linhas_mantidas / max(resumo["segundos"], 1e-9))
+                    # O snapshot é gravado depois do manifesto, com a versão dos
+                    # dados já confirmada; sem mudança nas linhas ele continua valendo
+                    if resumo["inseridas"] or resumo["atualizadas"] or \
+                            not SnapshotModel(db_path).atualizado(model.versao_dados()):
+                        self._gravar_snapshot(model, db_path)
 
-            if not df_pa.empty:
-                model.inserir_dados(df_pa)
+            if carga_iniciada and self.consolidado:
+                self.sincronizar_consolidado()
 
-            return df_pa, db_path
+            df_pa = pd.concat(amostra, ignore_index=True) if amostra else pd.DataFrame()
+            return df_pa.drop(columns=COLUNAS_CONTROLE, errors="ignore"), db_path, resumo
 
         except Exception as e:
             raise Exception(f"Erro ao processar a planilha: {e}")
 
+    @staticmethod
+    def calcular_hash(arquivo):
+        # SHA-256 do conteúdo, lido em blocos; devolve (hash, bytes) e volta o
+        # arquivo para o início
+        hash_arquivo = hashlib.sha256()
+        tamanho = 0
+        arquivo.seek(0)
+        for bloco in iter(lambda: arquivo.read(TAMANHO_BLOCO_HASH), b""):
+            hash_arquivo.update(bloco)
+            tamanho += len(bloco)
+        arquivo.seek(0)
+        return hash_arquivo.hexdigest(), tamanho
+
+    def carga_identica(self, db_path, hash_arquivo, incremental=False):
+        # Registro do manifesto da carga do mesmo arquivo, se reenviá-lo não
+        # mudaria os dados do ano (None caso contrário)
+        if not os.path.exists(db_path):
+            return None
+        return AcidenteModel(db_path).carga_identica(hash_arquivo, substituir=not incremental)
+
+    @staticmethod
+    def _normalizar_nome_coluna(nome):
+        return re.sub(r"\s+", "_", str(nome).strip().lower())
+
+    def _ler_em_blocos(self, arquivo, nome_arquivo, tamanho_bloco):
+        # Gera (linhas lidas no bloco, linhas do bloco com UF=PA), lendo só as
+        # colunas que são gravadas no banco
+        if nome_arquivo.endswith(".xlsx"):
+            yield from self._ler_xlsx_em_blocos(arquivo, tamanho_bloco)
+            return
+
+        leitor = pd.read_csv(
+            arquivo, encoding="latin1", sep=";", chunksize=tamanho_bloco,
+            usecols=lambda c: self._normalizar_nome_coluna(c) in COLUNAS_ACIDENTES)
+
+        for bloco in leitor:
+            bloco.columns = [self._normalizar_nome_coluna(c) for c in bloco.columns]
+            if "uf" not in bloco.columns:
+                raise Exception(
+                    f"A coluna 'uf' é obrigatória e não foi encontrada.")
+            yield len(bloco), self._linhas_do_para(bloco)
+
+    def _ler_xlsx_em_blocos(self, arquivo, tamanho_bloco):
+        # Percorre a primeira aba linha a linha (modo somente leitura do
+        # openpyxl), sem montar a planilha inteira em memória, e já descarta as
+        # linhas de outras UFs e as colunas que não são gravadas
+        from openpyxl import load_workbook
+
+        livro = load_workbook(arquivo, read_only=True, data_only=True)
+        try:
+            linhas = livro.worksheets[0].iter_rows(values_only=True)
+            cabecalho = [self._normalizar_nome_coluna(c) for c in next(linhas, ())]
+            if "uf" not in cabecalho:
+                raise Exception(
+                    f"A coluna 'uf' é obrigatória e não foi encontrada.")
+
+            posicoes = [i for i, c in enumerate(cabecalho) if c in COLUNAS_ACIDENTES]
+            colunas = [cabecalho[i] for i in posicoes]
+            posicao_uf = cabecalho.index("uf")
+
+            lidas = 0
+            mantidas = []
+            for linha in linhas:
+                lidas += 1
+                uf = linha[posicao_uf] if posicao_uf < len(linha) else None
+                if isinstance(uf, str) and uf.strip().upper() == "PA":
+                    mantidas.append(tuple(linha[i] if i < len(linha) else None for i in posicoes))
+
+                if lidas == tamanho_bloco:
+                    yield lidas, self._linhas_do_para(
+                        pd.DataFrame.from_records(mantidas, columns=colunas).infer_objects())
+                    lidas = 0
+                    mantidas = []
+
+            if lidas:
+                yield lidas, self._linhas_do_para(
+                    pd.DataFrame.from_records(mantidas, columns=colunas).infer_objects())
+        finally:
+            livro.close()
+
+    @staticmethod
+    def _linhas_do_para(df):
+        # Linhas com uf PA, sem diferenciar maiúsculas nem espaços em volta; a
+        # coluna volta normalizada, como as consultas (uf = 'PA') a filtram
+        uf = df["uf"].astype("string").str.strip().str.upper()
+        return df[(uf == "PA").fillna(False)].assign(uf="PA")
+
+    def converter_xlsx_para_csv(self, arquivo, destino):
+        # Copia a primeira aba de uma planilha .xlsx para um CSV no formato das
+        # planilhas da PRF (';', latin1), só com as colunas gravadas no banco,
+        # para que ela possa ser processada (e reprocessada) pelo caminho do CSV
+        from openpyxl import load_workbook
+
+        livro = load_workbook(arquivo, read_only=True, data_only=True)
+        try:
+            linhas = livro.worksheets[0].iter_rows(values_only=True)
+            cabecalho = [self._normalizar_nome_coluna(c) for c in next(linhas, ())]
+            posicoes = [i for i, c in enumerate(cabecalho) if c in COLUNAS_ACIDENTES]
+
+            with open(destino, "w", encoding="latin1", errors="replace", newline="") as saida:
+                escritor = csv.writer(saida, delimiter=";")
+                escritor.writerow([cabecalho[i] for i in posicoes])
+                total = 0
+                for linha in linhas:
+                    escritor.writerow(["" if i >= len(linha) or linha[i] is None else linha[i]
+                                       for i in posicoes])
+                    total += 1
+        finally:
+            livro.close()
+        return total
+
+    @instrumentacao.instrumentar("controller")
+    def _preparar_dados(self, df):
+        # Toda a limpeza é feita uma única vez, antes de gravar no banco, para
+        # que a leitura seja apenas um SELECT nos tipos corretos
+        df = df.copy()
+
+        for col, limite in (("latitude", 90), ("longitude", 180)):
+            if col in df.columns:
+                valores = self._normalizar_numerico(df[col])
+                df[col] = valores.where(valores.between(-limite, limite))
+
+        for col in COLUNAS_CONTAGEM:
+            if col in df.columns:
+                df[col] = self._para_inteiro(df[col])
+
+        if "id" in df.columns:
+            df["id"] = pd.to_numeric(df["id"], errors="coerce").astype("Int64")
+
+        if "br" in df.columns:
+            df["br_numero"] = self._para_br(df["br"])
+        if "km" in df.columns:
+            df["km_numero"] = self._para_km(df["km"])
+
+        if "data_inversa" in df.columns:
+            df["data_inversa"] = self._para_data_iso(df["data_inversa"])
+
+        if "horario" in df.columns:
+            # Planilhas .xlsx podem trazer o horário como datetime.time
+            df["horario"] = df["horario"].where(df["horario"].isna(), df["horario"].astype(str))
+            hora = df["horario"].astype(str).str.extract(r'^\s*(\d{1,2})', expand=False)
+            df["hora"] = pd.to_numeric(hora, errors="coerce").astype("Int64")
+
+        return self._calcular_chaves(df)
+
+    @staticmethod
+    def _calcular_chaves(df):
+        # hash_linha: hash do conteúdo já limpo, com os valores como texto para
+        # não depender do tipo lido (a br vem como número do CSV e como texto do
+        # banco); chave: o id da PRF ou, sem ele, o próprio hash
+        conteudo = df.reindex(columns=[c for c in COLUNAS_ACIDENTES if c not in COLUNAS_CONTROLE])
+        hashes = pd.util.hash_pandas_object(conteudo.astype("string"), index=False)
+        df["hash_linha"] = hashes.to_numpy().view("int64")
+
+        chave = pd.Series("h" + hashes.map("{:016x}".format), index=df.index)
+        if "id" in df.columns:
+            chave = df["id"].astype("string").fillna(chave)
+        df["chave"] = chave.astype(object)
+        return df
+
+    @staticmethod
+    def _para_inteiro(serie):
+        if serie.dtype.kind in "iufb":
+            return serie.fillna(0).astype("int64")
+        texto = serie.astype(str).str.replace(",", ".").str.replace(" ", "")
+        return pd.to_numeric(texto, errors="coerce").fillna(0).astype("int64")
+
+    @staticmethod
+    def _para_br(serie):
+        # "316", 316.0 ou "BR-316" viram 316; sem número, nulo
+        numero = serie.astype(str).str.extract(r'(\d+)', expand=False)
+        numero = pd.to_numeric(numero, errors="coerce")
+        return numero.where(numero > 0).astype("Int64")
+
+    @staticmethod
+    def _para_km(serie):
+        # "86,5" ou 86.5 viram 86.5; km negativo ou sem número, nulo
+        km = AcidenteController._normalizar_numerico(serie)
+        return km.where(km >= 0)
+
+    @staticmethod
+    def _para_data_iso(serie):
+        if pd.api.types.is_datetime64_any_dtype(serie):
+            datas = serie
+        else:
+            # As planilhas da PRF já usaram tanto AAAA-MM-DD quanto DD/MM/AAAA
+            texto = serie.astype(str).str.strip()
+            datas = pd.to_datetime(texto.str.slice(0, 10), format="%Y-%m-%d", errors="coerce")
+            faltantes = datas.isna()
+            if faltantes.any():
+                datas[faltantes] = pd.to_datetime(
+                    texto[faltantes].str.slice(0, 10), format="%d/%m/%Y", errors="coerce")
+        return datas.dt.strftime("%Y-%m-%d")
+
     def listar_bancos_de_dados(self):
         data_dir = "data"
         if not os.path.exists(data_dir):
@@ -55,17 +388,47 @@ class AcidenteController:
             ".db") or f.endswith(".csv")]
         return sorted(files)
 
-    def listar_dados_por_banco(self, nome_banco):
+    @instrumentacao.instrumentar("controller")
+    def listar_dados_por_banco(self, nome_banco, colunas=None):
+        # colunas: lê só as colunas pedidas (None para todas)
         db_path = f"data/{nome_banco}"
 
         if not os.path.exists(db_path):
             return pd.DataFrame()
 
-        # Se for banco .db → usa o model normal
+        df = cache_dados.obter(("banco", db_path), [db_path],
+                               lambda pedidas: self._compactar(self._carregar_banco(nome_banco, pedidas), db_path),
+                               self._versoes_dados([db_path]), colunas)
+        return dicionario_categorias.alinhar(df)
+
+    @staticmethod
+    def _versoes_dados(caminhos):
+        # Versão dos dados (do manifesto) de cada banco anual, usada pelos caches
+        # de leitura; bancos sem manifesto ficam de fora e valem pelo mtime
+        versoes = {}
+        for caminho in caminhos:
+            if caminho.endswith(".db") and os.path.exists(caminho):
+                versoes[caminho] = AcidenteModel(caminho).versao_dados()
+        return versoes
+
+    @instrumentacao.instrumentar("controller")
+    def _carregar_banco(self, nome_banco, colunas=None):
+        db_path = f"data/{nome_banco}"
+
         if nome_banco.endswith(".db"):
             model = AcidenteModel(db_path)
-            df = model.listar_por_uf("PA")
-            return self._limpar_coordenadas(df)
+            snapshot = SnapshotModel(db_path)
+            if snapshot.atualizado(model.versao_dados()):
+                return snapshot.ler(colunas)
+
+            if not snapshot.suportado() and model.versao_schema() >= VERSAO_TIPADA:
+                return model.listar_geolocalizados("PA", colunas)
+
+            # Sem cópia colunar atualizada (banco antigo ou gravado sem o pyarrow):
+            # lê tudo uma vez do SQLite e já deixa a cópia pronta para as próximas
+            df = self._ler_banco(model)
+            self._gravar_snapshot(model, db_path, df)
+            return df if colunas is None else df[[c for c in colunas if c in df.columns]]
 
         if nome_banco.endswith(".csv"):
             try:
@@ -77,17 +440,14 @@ class AcidenteController:
                 df.columns = [re.sub(r"\s+", "_", str(c).strip().lower())
                               for c in df.columns]
 
-                def _to_int_series(series):
-                    return pd.to_numeric(series.astype(str).str.replace(",", ".").str.replace(" ", ""), errors="coerce").fillna(0).astype(int)
-
                 for num_col in ["mortos", "feridos", "feridos_graves", "veiculos", "pessoas"]:
                     if num_col in df.columns:
-                        df[num_col] = _to_int_series(df[num_col])
+                        df[num_col] = self._para_inteiro(df[num_col])
                     else:
                         df[num_col] = 0
 
                 if "uf" in df.columns:
-                    df = df[df["uf"].str.upper() == "PA"]
+                    df = self._linhas_do_para(df)
 
                 df = self._limpar_coordenadas(df)
                 return df
@@ -97,42 +457,106 @@ class AcidenteController:
 
         return pd.DataFrame()
 
-    def _limpar_coordenadas(self, df):
+    def _ler_banco(self, model):
+        if model.versao_schema() >= VERSAO_TIPADA:
+            return model.listar_geolocalizados("PA")
 
-        def _clean_numeric_string(val):
-            if pd.isna(val) or val == "":
-                return None
-            s = str(val).strip()
-            s = s.replace(",", ".")
-            m = re.search(r'-?\d+\.\d+', s)
-            if m:
-                try:
-                    return float(m.group(0))
-                except:
-                    return None
-            m2 = re.search(r'-?\d+', s)
-            if m2:
-                try:
-                    return float(m2.group(0))
-                except:
-                    return None
-            return None
+        # Banco gravado antes do schema tipado: limpa na leitura
+        return self._limpar_coordenadas(model.listar_por_uf("PA"))
+
+    def _gravar_snapshot(self, model, db_path, df=None):
+        snapshot = SnapshotModel(db_path)
+        if not snapshot.suportado():
+            return
+        try:
+            snapshot.gravar(self._ler_banco(model) if df is None else df, model.versao_dados())
+        except OSError as e:
+            logging.warning("Não foi possível gravar '%s': %s", snapshot.caminho, e)
+
+    def atualizar_bancos(self):
+        resultados = []
+        for nome_banco in self.listar_bancos_de_dados():
+            if nome_banco.endswith(".db"):
+                resultados.append(self.atualizar_banco(nome_banco))
+        if resultados and self.consolidado:
+            self.sincronizar_consolidado()
+        return resultados
+
+    def atualizar_banco(self, nome_banco):
+        db_path = f"data/{nome_banco}"
+        with AcidenteModel(db_path, escrita=True) as model:
+            versao_anterior = model.versao_schema()
 
+            if versao_anterior >= VERSAO_SCHEMA:
+                model.atualizar_cubo()
+                model.criar_indices()
+                self._gravar_snapshot(model, db_path)
+                return nome_banco, versao_anterior, None
+
+            df = self._preparar_dados(model.listar_acidentes())
+            model.inserir_dados(df, substituir=True,
+                                registro={"modo": "atualizacao", "linhas_mantidas": len(df)})
+            self._gravar_snapshot(model, db_path)
+            return nome_banco, versao_anterior, len(df)
+
+    def listar_manifesto(self, nome_banco):
+        db_path = f"data/{nome_banco}"
+        if not os.path.exists(db_path):
+            return []
+        return AcidenteModel(db_path).listar_manifesto()
+
+    def explicar_consultas(self, nome_banco):
+        # Plano de execução (EXPLAIN QUERY PLAN) de cada consulta feita pelas páginas
+        model = AcidenteModel(f"data/{nome_banco}")
+        colunas = model.colunas()
+
+        consultas = [
+            ("listar_dados_por_banco", AcidenteModel.CONSULTA_GEOLOCALIZADOS, ("PA",)),
+            ("listar_municipios", CONSULTA_MUNICIPIOS, ()),
+        ]
+
+        exemplos_agregacao = [
+            ("metricas_gerais", [], MEDIDAS_METRICAS, {}),
+            ("dados_por_municipio", ["municipio"], MEDIDAS_MUNICIPIO, {"municipio": "BELEM"}),
+            ("agregar mes/municipio", ["mes"], None, {"municipio": "BELEM"}),
+            ("trechos", ["br_numero", "km_trecho"], MEDIDAS_TRECHOS, {}),
+            ("serie_temporal", ["data_inversa"], MEDIDAS_SERIES, {"municipio": "BELEM"}),
+            ("mapa_calor", ["dia_semana_numero", "hora"], MEDIDAS_SERIES, {}),
+        ]
+        for dimensao in ["municipio", "causa_acidente", "tipo_acidente", "classificacao_acidente",
+                         "tipo_pista", "dia_semana", "veiculos", "mes"]:
+            exemplos_agregacao.append((f"agregar {dimensao}", [dimensao], None, {}))
+
+        for nome, agrupar_por, medidas, filtros in exemplos_agregacao:
+            medidas = dict(medidas or {"total_acidentes": ("contagem", None)})
+            cubo = self._escolher_cubo(model, agrupar_por, medidas, filtros)
+            query, params = self._montar_agregacao(
+                colunas, nome_banco, agrupar_por, medidas, filtros, None, False, None, cubo)
+            consultas.append((nome if cubo is None else f"{nome} [{cubo}]", query, params))
+
+        return [(nome, query, model.explicar(query, params)) for nome, query, params in consultas]
+
+    @instrumentacao.instrumentar("controller")
+    def _limpar_coordenadas(self, df):
         lat_cols = [c for c in df.columns if 'lat' in c.lower()]
         lon_cols = [c for c in df.columns if 'lon' in c.lower()
                     or 'long' in c.lower()]
 
-        if lat_cols:
-            for col in lat_cols:
-                df[col] = df[col].apply(_clean_numeric_string)
-                df = df[df[col].notna()]
-                df = df[(df[col] >= -90) & (df[col] <= 90)]
+        valido = pd.Series(True, index=df.index)
+        limpas = {}
+
+        for col in lat_cols:
+            limpas[col] = self._normalizar_numerico(limpas.get(col, df[col]))
+            valido &= limpas[col].between(-90, 90)
 
-        if lon_cols:
-            for col in lon_cols:
-                df[col] = df[col].apply(_clean_numeric_string)
-                df = df[df[col].notna()]
-                df = df[(df[col] >= -180) & (df[col] <= 180)]
+        for col in lon_cols:
+            limpas[col] = self._normalizar_numerico(limpas.get(col, df[col]))
+            valido &= limpas[col].between(-180, 180)
+
+        if limpas:
+            df = df[valido].copy()
+            for col, valores in limpas.items():
+                df[col] = valores[valido]
 
         if lat_cols and lat_cols[0] not in ['latitude']:
             df.rename(columns={lat_cols[0]: 'latitude'}, inplace=True)
@@ -140,24 +564,19 @@ class AcidenteController:
             df.rename(columns={lon_cols[0]: 'longitude'}, inplace=True)
 
         if "coords" in df.columns and ("latitude" not in df.columns or "longitude" not in df.columns):
-            def _extract_lat_lon(s):
-                if pd.isna(s) or s == "":
-                    return (None, None)
-                txt = str(s).replace(",", ".")
-                parts = re.findall(r'-?\d+\.\d+', txt)
-                if len(parts) >= 2:
-                    lat = float(parts[0])
-                    lon = float(parts[1])
-                    if -90 <= lat <= 90 and -180 <= lon <= 180:
-                        return (lat, lon)
-                return (None, None)
-
-            latitudes = []
-            longitudes = []
-            for s in df["coords"]:
-                lat, lon = _extract_lat_lon(s)
-                latitudes.append(lat)
-                longitudes.append(lon)
+            coords = df["coords"].reset_index(drop=True)
+            texto = coords[coords.notna()].astype(str).str.replace(",", ".", regex=False)
+            partes = texto.str.extractall(r'(-?\d+\.\d+)')[0].unstack()
+
+            latitudes = np.full(len(coords), np.nan)
+            longitudes = np.full(len(coords), np.nan)
+            if 0 in partes.columns and 1 in partes.columns:
+                lat = partes[0].astype("float64")
+                lon = partes[1].astype("float64")
+                ok = lat.between(-90, 90) & lon.between(-180, 180)
+                latitudes[lat.index[ok]] = lat[ok]
+                longitudes[lon.index[ok]] = lon[ok]
+
             df["latitude"] = latitudes
             df["longitude"] = longitudes
 
@@ -165,14 +584,82 @@ class AcidenteController:
 
         return df
 
+    @staticmethod
+    def _normalizar_numerico(serie):
+        # Converte textos como "-1,4567" ou "lat: -1.45" no primeiro número encontrado
+        resultado = pd.Series(np.nan, index=serie.index, dtype="float64")
+        pendente = serie.notna().to_numpy()
+
+        if serie.dtype.kind in "iu" or serie.dtype == "float64":
+            numeros = serie.to_numpy(dtype="float64", na_value=np.nan)
+            absoluto = np.abs(numeros)
+            # Floats fora dessa faixa são escritos em notação científica por str()
+            # e seguem pelo caminho textual para manter o mesmo resultado
+            direto = np.isfinite(numeros) & (
+                (absoluto == 0) | ((absoluto >= 1e-4) & (absoluto < 1e16)))
+            resultado[direto] = numeros[direto]
+            pendente = pendente & ~direto
+
+        if pendente.any():
+            texto = serie[pendente].astype(str).to_numpy(dtype=str)
+            valores, simples = AcidenteController._converter_decimais(texto)
+
+            # Textos fora do formato "-123,456" seguem pela busca por regex
+            if not simples.all():
+                restante = pd.Series(texto[~simples]).str.replace(",", ".", regex=False)
+                valor = restante.str.extract(r'(-?\d+\.\d+)', expand=False)
+                sem_decimal = valor.isna()
+                valor[sem_decimal] = restante[sem_decimal].str.extract(r'(-?\d+)', expand=False)
+                valores[~simples] = valor.astype("float64").to_numpy()
+
+            resultado[pendente] = valores
+
+        return resultado
+
+    @staticmethod
+    def _converter_decimais(texto):
+        # Converte em lote textos no formato -?\d+([.,]\d*)? lendo os dígitos como
+        # uma matriz de code points; com até 15 dígitos a mantissa e a potência de
+        # 10 são exatas em float64 e a divisão produz o mesmo valor que float()
+        n = len(texto)
+        largura = max(texto.dtype.itemsize // 4, 1)
+        codigos = np.ascontiguousarray(texto).view(np.uint32).reshape(n, largura)
+
+        digito = (codigos >= 48) & (codigos <= 57)
+        ponto = (codigos == 44) | (codigos == 46)
+        menos = codigos == 45
+
+        simples = (digito | ponto | menos | (codigos == 0)).all(axis=1)
+        simples &= ~menos[:, 1:].any(axis=1)
+        simples &= ponto.sum(axis=1) <= 1
+        simples &= digito[np.arange(n), np.minimum(menos[:, 0], largura - 1)]
+        simples &= digito.sum(axis=1) <= 15
+
+        mantissa = np.zeros(n, dtype=np.int64)
+        casas_decimais = np.zeros(n, dtype=np.int64)
+        apos_ponto = np.zeros(n, dtype=bool)
+        for j in range(largura):
+            d = digito[:, j]
+            mantissa = np.where(d, mantissa * 10 + (codigos[:, j].astype(np.int64) - 48), mantissa)
+            casas_decimais += d & apos_ponto
+            apos_ponto |= ponto[:, j]
+
+        valores = mantissa / 10.0 ** casas_decimais
+        valores = np.where(menos[:, 0], -valores, valores)
+        return np.where(simples, valores, np.nan), simples
+
+    @instrumentacao.instrumentar("controller")
     def get_dados_agrupados(self, df, coluna, top_n=10):
         if coluna not in df.columns:
             return pd.DataFrame()
 
-        dados = df[coluna].value_counts().nlargest(top_n).reset_index()
+        contagem = df[coluna].value_counts()
+        # Colunas category contam também as categorias sem nenhuma linha neste quadro
+        dados = contagem[contagem > 0].nlargest(top_n).reset_index()
         dados.columns = [coluna, 'total_acidentes']
         return dados
 
+    @instrumentacao.instrumentar("controller")
     def get_metricas_gerais(self, df):
         if df.empty:
             return {
@@ -188,53 +675,585 @@ class AcidenteController:
         }
         return metricas
 
+    @instrumentacao.instrumentar("controller")
+    def metricas_gerais(self, bancos):
+        resultado = self.agregar(bancos, medidas=MEDIDAS_METRICAS)
+        if resultado.empty:
+            return {chave: 0 for chave in MEDIDAS_METRICAS}
+
+        linha = resultado.iloc[0]
+        metricas = {chave: int(linha[chave]) for chave in MEDIDAS_METRICAS}
+        metricas["media_veiculos"] = float(linha["media_veiculos"])
+        return metricas
+
+    @instrumentacao.instrumentar("controller")
+    def agregar(self, bancos=None, agrupar_por=(), medidas=None, filtros=None,
+                top_n=None, ordenar_por=None, crescente=False):
+        # Agrega direto no SQLite (fontes .csv, no pandas) e devolve só o
+        # resultado (poucas linhas).
+        # bancos: nome de um banco, lista de nomes ou None para todos os anos;
+        # medidas: {"alias": (função, coluna)} com função em FUNCOES_AGREGACAO;
+        # filtros: {"coluna": valor} ou {"coluna": [valores]} para IN.
+        bancos = self._resolver_bancos(bancos, csv=True)
+        planilhas = [b for b in bancos if not b.endswith(".db")]
+        bancos = [b for b in bancos if b.endswith(".db")]
+        agrupar_por = list(agrupar_por)
+        medidas = dict(medidas or {"total_acidentes": ("contagem", None)})
+        filtros = dict(filtros or {})
+
+        for nome in agrupar_por + list(medidas):
+            if not re.fullmatch(r"[a-z_][a-z0-9_]*", nome):
+                raise ValueError(f"Nome inválido na agregação: '{nome}'.")
+
+        ordenar_por = ordenar_por or next(iter(medidas))
+        media_na_ordem = medidas.get(ordenar_por, (None,))[0] == "media"
+
+        # Cada ano é respondido pelo seu cubo de agregados quando algum cubo
+        # cobre a consulta; senão, pela tabela acidentes
+        fontes = []
+        for nome_banco in bancos:
+            model = AcidenteModel(f"data/{nome_banco}")
+            cubo = self._escolher_cubo(model, agrupar_por, medidas, filtros)
+            fontes.append((model, nome_banco, filtros, cubo))
+
+        if self.consolidado and len(bancos) > 1 and any(f[3] is None for f in fontes) and \
+                self.consolidado_atualizado():
+            # Entre anos: uma única consulta no banco consolidado
+            anos = [self.extrair_ano_do_nome(b) or "Desconhecido" for b in bancos]
+            fontes = [(ConsolidadoModel(), None, {**filtros, "ano": anos}, None)]
+
+        limite_sql = top_n if len(fontes) == 1 and not planilhas and not media_na_ordem else None
+
+        partes = []
+        for model, nome_banco, filtros_fonte, cubo in fontes:
+            query, params = self._montar_agregacao(
+                model.colunas(), nome_banco, agrupar_por, medidas, filtros_fonte,
+                ordenar_por if not media_na_ordem else None, crescente, limite_sql, cubo)
+            partes.append(model.consultar(query, params))
+        for nome_banco in planilhas:
+            # Fontes .csv não têm banco: agrega as linhas já carregadas do ano
+            parte = self._agregar_planilha(nome_banco, agrupar_por, medidas, filtros)
+            if parte is not None:
+                partes.append(parte)
+
+        if not partes:
+            return pd.DataFrame(columns=agrupar_por + list(medidas))
+
+        resultado = pd.concat(partes, ignore_index=True)
+        if len(partes) > 1:
+            if agrupar_por:
+                resultado = resultado.groupby(
+                    agrupar_por, dropna=False, sort=False).sum().reset_index()
+            else:
+                resultado = resultado.sum().to_frame().T
+
+        for alias, (funcao, coluna) in medidas.items():
+            if funcao == "media":
+                quantidade = resultado.pop(f"_qtd_{alias}")
+                soma = resultado.pop(f"_soma_{alias}")
+                resultado[alias] = (soma / quantidade.where(quantidade > 0)).fillna(0)
+
+        if len(partes) > 1 or planilhas or media_na_ordem:
+            chaves = [ordenar_por] + [d for d in agrupar_por if d != ordenar_por]
+            resultado = resultado.sort_values(
+                chaves, ascending=[crescente] + [True] * (len(chaves) - 1))
+            if top_n is not None:
+                resultado = resultado.head(top_n)
+
+        return resultado[agrupar_por + list(medidas)].reset_index(drop=True)
+
+    def _resolver_bancos(self, bancos, csv=False):
+        # csv: inclui as fontes .csv da pasta data (só a agregação as atende)
+        extensoes = (".db", ".csv") if csv else (".db",)
+        if bancos is None:
+            return [b for b in self.listar_bancos_de_dados() if b.endswith(extensoes)]
+        if isinstance(bancos, str):
+            bancos = [bancos]
+        return [b for b in bancos if b.endswith(extensoes) and os.path.exists(f"data/{b}")]
+
+    def _agregar_planilha(self, nome_banco, agrupar_por, medidas, filtros):
+        # Mesma agregação de _montar_agregacao (sem ordenar nem limitar), feita
+        # no pandas sobre as linhas do Pará com coordenadas lidas do .csv
+        df = self.listar_dados_por_banco(nome_banco).copy()
+        if df.empty:
+            return None
+        if "data_inversa" in df.columns:
+            df["data_inversa"] = self._para_data_iso(df["data_inversa"].astype(str))
+        derivadas = {
+            "mes": lambda: pd.to_datetime(df["data_inversa"], errors="coerce").dt.month,
+            "hora": lambda: pd.to_numeric(df["horario"].astype(str).str.slice(0, 2), errors="coerce"),
+            "km_trecho": lambda: np.floor(self._para_km(df["km"])),
+            "dia_semana_numero": lambda: (pd.to_datetime(df["data_inversa"], errors="coerce")
+                                          .dt.dayofweek + 1) % 7,
+        }
+        colunas = set(df.columns)
+
+        for dim in agrupar_por:
+            if dim in colunas:
+                continue
+            if dim == "ano":
+                df["ano"] = self.extrair_ano_do_nome(nome_banco) or "Desconhecido"
+            elif dim in derivadas:
+                df[dim] = derivadas[dim]().astype("Int64")
+            else:
+                raise ValueError(f"Dimensão desconhecida: '{dim}'.")
+
+        for coluna, valor in filtros.items():
+            if coluna not in colunas:
+                raise ValueError(f"Coluna desconhecida no filtro: '{coluna}'.")
+            if valor is None:
+                df = df[df[coluna].isna()]
+            elif isinstance(valor, (list, tuple, set)):
+                df = df[df[coluna].isin(list(valor))]
+            else:
+                df = df[df[coluna] == valor]
+
+        # (nome no resultado, coluna, função do pandas), com a média levada como
+        # soma e quantidade, como na consulta SQL
+        df["_linha"] = 1
+        agregacoes = []
+        for alias, (funcao, coluna) in medidas.items():
+            if funcao not in FUNCOES_AGREGACAO:
+                raise ValueError(f"Função de agregação desconhecida: '{funcao}'.")
+            if funcao == "contagem" and coluna is None:
+                agregacoes.append((alias, "_linha", "sum"))
+                continue
+            if coluna not in colunas:
+                raise ValueError(f"Coluna desconhecida: '{coluna}'.")
+            if funcao != "contagem" and df[coluna].dtype.kind not in "iufb":
+                df[coluna] = pd.to_numeric(df[coluna].astype(str).str.replace(",", "."), errors="coerce")
+            if funcao == "contagem":
+                agregacoes.append((alias, coluna, "count"))
+            elif funcao == "soma":
+                agregacoes.append((alias, coluna, "sum"))
+            else:
+                agregacoes.append((f"_soma_{alias}", coluna, "sum"))
+                agregacoes.append((f"_qtd_{alias}", coluna, "count"))
+
+        if not agrupar_por:
+            return pd.DataFrame([{nome: df[coluna].agg(funcao) for nome, coluna, funcao in agregacoes}])
+        return df.groupby(agrupar_por, dropna=False, observed=True).agg(
+            **{nome: (coluna, funcao) for nome, coluna, funcao in agregacoes}).reset_index()
+
+    def _escolher_cubo(self, model, agrupar_por, medidas, filtros):
+        # Menor cubo que tem todas as dimensões e filtros da consulta, desde que
+        # as medidas sejam contagem de linhas ou somas guardadas no cubo
+        for funcao, coluna in medidas.values():
+            if coluna is None:
+                if funcao != "contagem":
+                    return None
+            elif funcao == "contagem" or coluna not in MEDIDAS_CUBO:
+                return None
+
+        colunas = model.colunas()
+        necessarias = {d for d in agrupar_por if d != "ano" or d in colunas} | set(filtros)
+        candidatos = [nome for nome, dimensoes in CUBOS.items() if necessarias <= set(dimensoes)]
+        if not candidatos:
+            return None
+
+        candidatos = [nome for nome in candidatos if nome in model.cubos_disponiveis()]
+        if not candidatos:
+            return None
+        return min(candidatos, key=lambda nome: len(CUBOS[nome]))
+
+    def _montar_agregacao(self, colunas, nome_banco, agrupar_por, medidas, filtros,
+                          ordenar_por, crescente, limite, cubo=None):
+        # Com cubo, a consulta soma as linhas da tabela de resumo em vez de
+        # percorrer acidentes; sem ele, acidentes é filtrada como o cubo (só
+        # acidentes do Pará com coordenadas)
+        if cubo is not None:
+            colunas = CUBOS[cubo]
+
+        selecao = []
+        params = []
+
+        for dim in agrupar_por:
+            if dim in colunas:
+                selecao.append(dim)
+            elif dim == "ano":
+                selecao.append("? AS ano")
+                params.append(self.extrair_ano_do_nome(nome_banco) or "Desconhecido")
+            elif dim in DIMENSOES_DERIVADAS:
+                selecao.append(f"{DIMENSOES_DERIVADAS[dim]} AS {dim}")
+            else:
+                raise ValueError(f"Dimensão desconhecida: '{dim}'.")
+
+        for alias, (funcao, coluna) in medidas.items():
+            if funcao not in FUNCOES_AGREGACAO:
+                raise ValueError(f"Função de agregação desconhecida: '{funcao}'.")
+            if cubo is not None:
+                if funcao == "contagem":
+                    selecao.append(f"COALESCE(SUM(total_acidentes), 0) AS {alias}")
+                elif funcao == "soma":
+                    selecao.append(f"COALESCE(SUM(soma_{coluna}), 0) AS {alias}")
+                else:
+                    selecao.append(f"COALESCE(SUM(soma_{coluna}), 0) AS _soma_{alias}")
+                    selecao.append(f"COALESCE(SUM(total_acidentes), 0) AS _qtd_{alias}")
+                continue
+            if funcao == "contagem" and coluna is None:
+                selecao.append(f"COUNT(*) AS {alias}")
+                continue
+            if coluna not in colunas:
+                raise ValueError(f"Coluna desconhecida: '{coluna}'.")
+            if funcao == "contagem":
+                selecao.append(f"COUNT({coluna}) AS {alias}")
+            elif funcao == "soma":
+                selecao.append(f"COALESCE(SUM({coluna}), 0) AS {alias}")
+            else:
+                # Média é levada como soma e quantidade para poder juntar vários anos
+                selecao.append(f"COALESCE(SUM({coluna}), 0) AS _soma_{alias}")
+                selecao.append(f"COUNT({coluna}) AS _qtd_{alias}")
+
+        condicoes = []
+        if cubo is None:
+            condicoes.append(CONDICAO_CUBO)
+        for coluna, valor in filtros.items():
+            if coluna not in colunas:
+                raise ValueError(f"Coluna desconhecida no filtro: '{coluna}'.")
+            if valor is None:
+                condicoes.append(f"{coluna} IS NULL")
+            elif isinstance(valor, (list, tuple, set)):
+                valor = list(valor)
+                condicoes.append(f"{coluna} IN ({', '.join('?' * len(valor))})")
+                params.extend(valor)
+            else:
+                condicoes.append(f"{coluna} = ?")
+                params.append(valor)
+
+        query = f"SELECT {', '.join(selecao)} FROM {cubo or 'acidentes'}"
+        if condicoes:
+            query += f" WHERE {' AND '.join(condicoes)}"
+        if agrupar_por:
+            query += f" GROUP BY {', '.join(agrupar_por)}"
+            if ordenar_por:
+                direcao = "ASC" if crescente else "DESC"
+                chaves = [ordenar_por] + [d for d in agrupar_por if d != ordenar_por]
+                query += f" ORDER BY {chaves[0]} {direcao}"
+                if len(chaves) > 1:
+                    query += f", {', '.join(chaves[1:])}"
+            if limite is not None:
+                query += " LIMIT ?"
+                params.append(int(limite))
+
+        return query, params
+
+    @instrumentacao.instrumentar("controller")
+    def acidentes_na_area(self, bancos, lat_min, lat_max, lon_min, lon_max, colunas=None):
+        # Acidentes dentro do retângulo, pelo índice espacial (R*Tree) de cada
+        # ano; bancos: nome de um banco, lista de nomes ou None para todos
+        partes = []
+        for nome_banco in self._resolver_bancos(bancos):
+            model = AcidenteModel(f"data/{nome_banco}")
+            if model.indice_espacial_atualizado():
+                df = model.buscar_retangulo(lat_min, lat_max, lon_min, lon_max, colunas)
+            else:
+                # Banco sem índice espacial (anterior a ele): filtra os dados do
+                # ano, lendo as coordenadas mesmo quando colunas não as pede
+                leitura = list(dict.fromkeys(list(colunas) + COLUNAS_COORDENADAS)) if colunas else None
+                df = self.listar_dados_por_banco(nome_banco, leitura)
+                df = df[df["latitude"].between(lat_min, lat_max) &
+                        df["longitude"].between(lon_min, lon_max)]
+                if colunas:
+                    df = df[list(colunas)]
+            partes.append(df.assign(ano=self.extrair_ano_do_nome(nome_banco) or "Desconhecido"))
+
+        partes = [df for df in partes if not df.empty]
+        if not partes:
+            return pd.DataFrame(columns=list(colunas or COLUNAS_COORDENADAS) + ["ano"])
+        return pd.concat(partes, ignore_index=True)
+
+    @instrumentacao.instrumentar("controller")
+    def acidentes_no_raio(self, bancos, latitude, longitude, raio_km, colunas=None):
+        # Acidentes a até raio_km do ponto, do mais próximo ao mais distante,
+        # com a coluna distancia_km
+        if colunas is not None:
+            colunas = list(dict.fromkeys(list(colunas) + COLUNAS_COORDENADAS))
+        df = self.acidentes_na_area(bancos, *self._caixa_do_raio(latitude, longitude, raio_km), colunas)
+
+        df["distancia_km"] = self._distancia_km(
+            latitude, longitude, df["latitude"].to_numpy(dtype="float64"),
+            df["longitude"].to_numpy(dtype="float64"))
+        return df[df["distancia_km"] <= raio_km].sort_values("distancia_km", ignore_index=True)
+
+    @instrumentacao.instrumentar("controller")
+    def acidentes_mais_proximos(self, bancos, latitude, longitude, k=10, colunas=None):
+        # Os k acidentes mais próximos do ponto: busca em raios crescentes até
+        # achar k acidentes (todos os de dentro do raio estão no resultado, então
+        # nenhum de fora pode estar mais perto)
+        raio_km = RAIO_INICIAL_KM
+        while True:
+            df = self.acidentes_no_raio(bancos, latitude, longitude, raio_km, colunas)
+            if len(df) >= k or raio_km >= RAIO_MAXIMO_KM:
+                return df.head(k)
+            raio_km *= 4
+
+    @staticmethod
+    def _caixa_do_raio(latitude, longitude, raio_km):
+        # Menor retângulo (lat_min, lat_max, lon_min, lon_max) que contém o
+        # círculo de raio_km na esfera usada por _distancia_km: a largura em
+        # longitude vem do ponto de tangência do círculo com o meridiano
+        # (asin(sin(r/R) / cos(lat))), maior que raio / km por grau fora do
+        # equador. Se o círculo alcança um polo, vale qualquer longitude.
+        angulo = raio_km / RAIO_TERRA_KM
+        graus_lat = math.degrees(angulo) + FOLGA_CAIXA_GRAUS
+        lat_min, lat_max = latitude - graus_lat, latitude + graus_lat
+        razao = math.sin(min(angulo, math.pi / 2)) / max(math.cos(math.radians(latitude)), 1e-12)
+        if lat_min <= -90 or lat_max >= 90 or razao >= 1:
+            return max(lat_min, -90), min(lat_max, 90), -180, 180
+        graus_lon = math.degrees(math.asin(razao)) + FOLGA_CAIXA_GRAUS
+        return lat_min, lat_max, max(longitude - graus_lon, -180), min(longitude + graus_lon, 180)
+
+    @staticmethod
+    def _distancia_km(latitude, longitude, latitudes, longitudes):
+        # Distância pelo círculo máximo (haversine), vetorizada
+        lat1, lon1 = np.radians(latitude), np.radians(longitude)
+        lat2, lon2 = np.radians(latitudes), np.radians(longitudes)
+        a = (np.sin((lat2 - lat1) / 2) ** 2 +
+             np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+        return 2 * RAIO_TERRA_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+    @instrumentacao.instrumentar("controller")
+    def trechos(self, bancos=None, br=None):
+        # Acidentes e vítimas por trecho de 1 km (br_numero, km_trecho) de cada
+        # ano, pelo cubo_trecho; br: só a rodovia pedida
+        filtros = {} if br is None else {"br_numero": int(br)}
+        atuais, antigos = [], []
+        for nome_banco in self._resolver_bancos(bancos):
+            colunas = AcidenteModel(f"data/{nome_banco}").colunas()
+            (atuais if "br_numero" in colunas else antigos).append(nome_banco)
+
+        partes = []
+        if atuais:
+            partes.append(self.agregar(atuais, ["ano", "br_numero", "km_trecho"],
+                                       medidas=MEDIDAS_TRECHOS, filtros=filtros))
+        for nome_banco in antigos:
+            # Banco anterior às colunas numéricas: normaliza br e km na leitura
+            partes.append(self._trechos_na_leitura(nome_banco, br))
+
+        partes = [df for df in partes if not df.empty]
+        if not partes:
+            return pd.DataFrame(columns=["ano", "br_numero", "km_trecho"] + list(MEDIDAS_TRECHOS))
+        return pd.concat(partes, ignore_index=True)
+
+    def _trechos_na_leitura(self, nome_banco, br=None):
+        model = AcidenteModel(f"data/{nome_banco}")
+        somas = [coluna for _, coluna in MEDIDAS_TRECHOS.values() if coluna is not None]
+        df = model.consultar(f"SELECT br, km, {', '.join(somas)} FROM acidentes WHERE {CONDICAO_CUBO}")
+        df = df.assign(br_numero=self._para_br(df["br"]),
+                       km_trecho=np.floor(self._para_km(df["km"])).astype("Int64"))
+        if br is not None:
+            df = df[df["br_numero"] == int(br)]
+        for coluna in somas:
+            df[coluna] = self._para_inteiro(df[coluna])
+
+        medidas = {alias: (coluna or "br", "count" if coluna is None else "sum")
+                   for alias, (_, coluna) in MEDIDAS_TRECHOS.items()}
+        resultado = df.groupby(["br_numero", "km_trecho"], dropna=False).agg(**medidas).reset_index()
+        resultado.insert(0, "ano", self.extrair_ano_do_nome(nome_banco) or "Desconhecido")
+        return resultado
+
+    @instrumentacao.instrumentar("controller")
+    def trechos_criticos(self, bancos=None, janela_km=JANELA_PADRAO_KM, top_n=TOP_N_PADRAO,
+                         br=None, por_ano=False, pesos=None):
+        # Os top_n trechos de janela_km km com maior índice de gravidade, somando
+        # os anos pedidos ou, com por_ano, um ranking para cada ano
+        return ranking_trechos.ranquear(self.trechos(bancos, br), janela_km, top_n, por_ano, pesos)
+
+    @instrumentacao.instrumentar("controller")
+    def acidentes_no_trecho(self, bancos, br, km_inicio, km_fim, colunas=None):
+        # Acidentes da br entre km_inicio e km_fim, pelo índice do trecho
+        partes = []
+        for nome_banco in self._resolver_bancos(bancos):
+            model = AcidenteModel(f"data/{nome_banco}")
+            if "br_numero" in model.colunas():
+                df = model.buscar_trecho(br, km_inicio, km_fim, colunas)
+            else:
+                # Banco anterior às colunas numéricas: filtra os dados do ano
+                pedidas = None if colunas is None else list(dict.fromkeys(list(colunas) + ["br", "km"]))
+                df = self.listar_dados_por_banco(nome_banco, pedidas)
+                if df.empty or "br" not in df.columns or "km" not in df.columns:
+                    continue
+                dentro = (self._para_br(df["br"]) == int(br)).fillna(False) & \
+                    self._para_km(df["km"]).between(km_inicio, km_fim, inclusive="left")
+                df = df[dentro]
+                if colunas is not None:
+                    df = df[[c for c in colunas if c in df.columns]]
+            partes.append(df.assign(ano=self.extrair_ano_do_nome(nome_banco) or "Desconhecido"))
+
+        partes = [df for df in partes if not df.empty]
+        if not partes:
+            return pd.DataFrame(columns=list(colunas or COLUNAS_COORDENADAS) + ["ano"])
+        return pd.concat(partes, ignore_index=True)
+
+    @instrumentacao.instrumentar("controller")
+    def serie_temporal(self, bancos=None, frequencia="dia", municipio=None, alinhar=False, mes=None):
+        # Série por dia, semana ou mês de cada ano, lida dos cubos por dia
+        # (cubo_dia ou, com município, cubo_municipio_dia); alinhar: anos no
+        # mesmo calendário; mes: só os dias desse mês (1 a 12)
+        bancos = self._resolver_bancos(bancos, csv=True)
+        filtros = {} if municipio is None else {"municipio": municipio}
+        if mes is not None:
+            # Os dias do mês em cada ano vão como filtro de igualdade, que o
+            # índice do cubo resolve sem percorrer o ano
+            dias = [dia for nome_banco in bancos
+                    for dia in self._dias_do_mes(self.extrair_ano_do_nome(nome_banco), mes)]
+            if not dias:
+                return pd.DataFrame(columns=["ano", "periodo"] + list(MEDIDAS_SERIES))
+            filtros["data_inversa"] = dias
+
+        diaria = self.agregar(bancos, ["ano", "data_inversa"], medidas=MEDIDAS_SERIES, filtros=filtros)
+        serie = series_temporais.reamostrar(diaria, frequencia, alinhar)
+        if mes is not None:
+            serie = serie[serie["periodo"].dt.month == int(mes)].reset_index(drop=True)
+        return serie
+
+    @staticmethod
+    def _dias_do_mes(ano, mes):
+        if not ano or not str(ano).isdigit():
+            return []
+        inicio = pd.Timestamp(year=int(ano), month=int(mes), day=1)
+        return pd.date_range(inicio, periods=inicio.days_in_month, freq="D").strftime("%Y-%m-%d").tolist()
+
+    @instrumentacao.instrumentar("controller")
+    def mapa_calor(self, bancos=None, municipio=None, medida="total_acidentes"):
+        # Matriz 7 x 24 (dia da semana x hora) da medida, pelo cubo_municipio_hora
+        filtros = {} if municipio is None else {"municipio": municipio}
+        contagens = self.agregar(bancos, ["dia_semana_numero", "hora"], medidas=MEDIDAS_SERIES, filtros=filtros)
+        return series_temporais.matriz_semana_hora(contagens, medida)
+
+    @instrumentacao.instrumentar("controller")
     def listar_municipios(self, nome_banco):
         db_path = f"data/{nome_banco}"
-        model = AcidenteModel(db_path)
+        if not os.path.exists(db_path):
+            return []
 
-        query = "SELECT DISTINCT municipio FROM acidentes WHERE uf = 'PA' ORDER BY municipio ASC"
-        df = pd.read_sql(query, model.conn)
+        df = AcidenteModel(db_path).consultar(CONSULTA_MUNICIPIOS)
         return df["municipio"].dropna().tolist()
 
+    @instrumentacao.instrumentar("controller")
     def dados_por_municipio(self, nome_banco, municipio):
-        db_path = f"data/{nome_banco}"
-        model = AcidenteModel(db_path)
-
-        query = """
-            SELECT 
-                municipio,
-                COUNT(*) AS total_acidentes,
-                SUM(CASE WHEN feridos_graves IS NOT NULL THEN feridos_graves ELSE 0 END) AS total_feridos_graves,
-                SUM(CASE WHEN mortos IS NOT NULL THEN mortos ELSE 0 END) AS total_mortos,
-                SUM(CASE WHEN veiculos IS NOT NULL THEN veiculos ELSE 0 END) AS total_veiculos
-            FROM acidentes
-            WHERE uf = 'PA' AND municipio = ?
-            GROUP BY municipio
-        """
-
-        return pd.read_sql(query, model.conn, params=(municipio,))
-
-    def listar_dados_consolidados_todos_anos(self):
+        # Mesma contagem dos gráficos da página (cubo_municipio quando existe)
+        return self.agregar(nome_banco, ["municipio"], medidas=MEDIDAS_MUNICIPIO,
+                            filtros={"municipio": municipio})
+
+    @instrumentacao.instrumentar("controller")
+    def listar_dados_consolidados_todos_anos(self, colunas=None):
         data_dir = "data"
         if not os.path.exists(data_dir):
             return pd.DataFrame()
 
-        db_files = [f for f in os.listdir(data_dir) if f.endswith(".db")]
-        
+        db_files = sorted(f for f in os.listdir(data_dir) if f.endswith(".db"))
+
         if not db_files:
             return pd.DataFrame()
 
+        if self.consolidado and self.consolidado_atualizado():
+            df = cache_dados.obter(("consolidado", CAMINHO_CONSOLIDADO), [CAMINHO_CONSOLIDADO],
+                                   lambda pedidas: self._compactar(ConsolidadoModel().listar_geolocalizados(
+                                       "PA", pedidas), CAMINHO_CONSOLIDADO), colunas=colunas)
+        else:
+            caminhos = [f"{data_dir}/{f}" for f in db_files]
+            df = cache_dados.obter(("consolidado", "anos"), caminhos,
+                                   lambda pedidas: self._carregar_consolidado(db_files, pedidas),
+                                   self._versoes_dados(caminhos), colunas)
+        return dicionario_categorias.alinhar(df)
+
+    def _versoes_anos(self):
+        # {ano: versão} que cada banco anual deveria ter no consolidado: schema
+        # e versão dos dados do manifesto, que só mudam quando as linhas mudam
+        # (ANALYZE, checkpoints e índices não contam). Bancos sem manifesto
+        # valem pelo mtime/tamanho do arquivo.
+        versoes = {}
+        for nome_banco in self._resolver_bancos(None):
+            db_path = f"data/{nome_banco}"
+            model = AcidenteModel(db_path)
+            versao = model.versao_dados()
+            if versao is None:
+                info = os.stat(db_path)
+                versao = f"arquivo {info.st_mtime_ns}/{info.st_size}"
+            ano = self.extrair_ano_do_nome(nome_banco) or "Desconhecido"
+            versoes[ano] = (db_path, f"{model.versao_schema()}:{versao}")
+        return versoes
+
+    def consolidado_atualizado(self):
+        # Só leitura: o consolidado tem exatamente os anos atuais, cada um na
+        # versão atual. Sem isso as leituras consultam os bancos de cada ano.
+        versoes = {ano: versao for ano, (_, versao) in self._versoes_anos().items()}
+        return bool(versoes) and ConsolidadoModel().versoes_particoes() == versoes
+
+    @instrumentacao.instrumentar("controller")
+    def sincronizar_consolidado(self):
+        # Copia para o banco consolidado os anos cujos dados mudaram desde a
+        # última cópia e remove os anos que não têm mais arquivo. Chamado ao
+        # fim de cada carga (e pelo comando consolidar), nunca nas leituras.
+        with ConsolidadoModel(escrita=True) as model:
+            particoes = model.versoes_particoes()
+            versoes = self._versoes_anos()
+
+            alterado = False
+            for ano, (db_path, versao) in versoes.items():
+                if particoes.get(ano) == versao:
+                    continue
+
+                origem = AcidenteModel(db_path)
+                if origem.versao_schema() < VERSAO_TIPADA:
+                    df = self._preparar_dados(origem.listar_acidentes())
+                    model.trocar_particao(ano, db_path, versao, df)
+                else:
+                    model.trocar_particao(ano, db_path, versao)
+                alterado = True
+
+            for ano in set(model.listar_particoes()["ano"]) - set(versoes):
+                model.remover_particao(ano)
+                alterado = True
+
+            if alterado:
+                model.criar_indices()
+        return ConsolidadoModel()
+
+    def iniciar_aquecimento(self):
+        # Só a primeira chamada do processo dispara o aquecimento (a trava
+        # nunca é liberada)
+        if not _trava_aquecimento.acquire(blocking=False):
+            return
+        threading.Thread(target=self.aquecer, daemon=True, name="aquecimento").start()
+
+    def aquecer(self, nome_banco=None):
+        # Sem nome, aquece o banco anual alterado por último (o último upload)
+        if nome_banco is None:
+            bancos = self._resolver_bancos(None)
+            if not bancos:
+                return None
+            nome_banco = max(bancos, key=lambda b: os.path.getmtime(f"data/{b}"))
+
+        inicio = time.perf_counter()
+        try:
+            objetos = AcidenteModel(f"data/{nome_banco}").aquecer()
+            self.listar_dados_por_banco(nome_banco)
+        except Exception as e:
+            logging.warning("Não foi possível aquecer %s: %s", nome_banco, e)
+            return None
+
+        segundos = time.perf_counter() - inicio
+        logging.info("%s aquecido em %.2f s (%d tabelas e índices)", nome_banco, segundos, objetos)
+        return nome_banco, segundos
+
+    def estatisticas_cache(self):
+        return cache_dados.estatisticas()
+
+    def _carregar_consolidado(self, db_files, colunas=None):
+        if colunas is not None:
+            # "ano" não existe nos bancos de cada ano; é preenchido abaixo
+            colunas = [c for c in colunas if c != "ano"]
+
         dfs = []
-        for db_file in sorted(db_files):
+        for db_file in db_files:
             try:
-                db_path = f"{data_dir}/{db_file}"
-                model = AcidenteModel(db_path)
-                df = model.listar_por_uf("PA")
-                
+                df = self.listar_dados_por_banco(db_file, colunas)
+
                 if not df.empty:
                     ano = self.extrair_ano_do_nome(db_file)
-                    df["ano"] = ano if ano else "Desconhecido"
-                    dfs.append(df)
+                    dfs.append(df.assign(ano=ano if ano else "Desconhecido"))
             except Exception as e:
                 logging.warning(f"Erro ao carregar {db_file}: {e}")
                 continue
@@ -242,9 +1261,31 @@ class AcidenteController:
         if not dfs:
             return pd.DataFrame()
 
-        df_consolidado = pd.concat(dfs, ignore_index=True)
-        
-        df_consolidado = self._limpar_coordenadas(df_consolidado)
-        
-        return df_consolidado
+        # Com as mesmas categorias em todos os anos o concat mantém o dtype category
+        df_consolidado = pd.concat([dicionario_categorias.alinhar(df) for df in dfs],
+                                   ignore_index=True)
 
+        return self._compactar(df_consolidado, "todos os anos")
+
+    def _compactar(self, df, origem):
+        # Representação usada em memória: texto de baixa cardinalidade como
+        # category (com o dicionário compartilhado entre os anos), contagens no
+        # menor inteiro que comporta os valores e coordenadas em float32
+        antes = df.memory_usage(deep=True).sum()
+
+        for col in COLUNAS_CATEGORICAS_MEMORIA:
+            if col in df.columns:
+                df[col] = dicionario_categorias.categorizar(df[col], col)
+
+        for col in df.columns:
+            if pd.api.types.is_integer_dtype(df[col].dtype):
+                df[col] = pd.to_numeric(df[col], downcast="integer")
+
+        for col in COLUNAS_COORDENADAS:
+            if col in df.columns and df[col].dtype == "float64":
+                df[col] = df[col].astype("float32")
+
+        depois = df.memory_usage(deep=True).sum()
+        logging.info("Dados de %s em memória: %.2f MB -> %.2f MB (%d linhas)",
+                     origem, antes / 1024 ** 2, depois / 1024 ** 2, len(df))
+        return df
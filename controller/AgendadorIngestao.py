@@ -0,0 +1,194 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import logging
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+
+# Quantidade de planilhas processadas ao mesmo tempo, cada uma em um processo.
+# Pode ser ajustada por servidor com a variável TRANSITO_PROCESSOS_INGESTAO.
+PROCESSOS_PADRAO = int(os.environ.get(
+    "TRANSITO_PROCESSOS_INGESTAO", str(min(3, os.cpu_count() or 1))))
+
+ESTADOS_ATIVOS = ("recebendo", "na fila", "processando")
+
+# Tarefas encerradas há mais tempo que isso (em segundos) deixam de ser guardadas
+RETENCAO_TAREFAS = 3600
+
+
+def _processar_em_trabalhador(id_tarefa, caminho, nome_arquivo, incremental, fila, conexao):
+    # Executado no processo trabalhador. O banco consolidado não é tocado aqui:
+    # ele é sincronizado pelo servidor quando a tarefa termina, evitando vários
+    # processos escrevendo no mesmo arquivo.
+    contagem = [0, 0]
+
+    def progresso(bloco, linhas_lidas, linhas_mantidas):
+        contagem[:] = [linhas_lidas, linhas_mantidas]
+        fila.put((id_tarefa, bloco, linhas_lidas, linhas_mantidas))
+
+    try:
+        from controller.AcidenteController import AcidenteController
+
+        fila.put((id_tarefa, 0, 0, 0))
+        with open(caminho, "rb") as arquivo:
+            amostra, db_path, resumo = AcidenteController(consolidado=False).processar_planilha(
+                arquivo, progresso=progresso, nome_arquivo=nome_arquivo, incremental=incremental)
+        # As contagens finais voltam com o resultado, pois a última mensagem
+        # da fila pode chegar depois dele
+        conexao.send(("concluído", (amostra, db_path, contagem[0], contagem[1], resumo)))
+    except Exception as e:
+        conexao.send(("erro", str(e)))
+    finally:
+        conexao.close()
+        shutil.rmtree(os.path.dirname(caminho), ignore_errors=True)
+
+
+# Processa as planilhas enviadas fora da thread do Streamlit, cada arquivo em
+# um processo próprio, com no máximo `processos` rodando ao mesmo tempo. Como
+# cada ano tem o seu banco, anos diferentes rodam em paralelo e só um arquivo
+# por ano é aceito por vez. Um processo por tarefa (em vez de um pool de
+# processos reaproveitados) faz com que a queda de um trabalhador afete só o
+# seu arquivo. O estado das tarefas fica no processo do servidor, então a carga
+# continua mesmo que o usuário navegue para outra página.
+class AgendadorIngestao:
+    def __init__(self, processos=PROCESSOS_PADRAO):
+        self.processos = max(1, processos)
+
+        self._tarefas = {}
+        self._lock = threading.Lock()
+        self._trava_consolidado = threading.Lock()
+        self._executor = None
+        self._fila = None
+        # spawn: o servidor do Streamlit tem várias threads, e fork a partir de
+        # um processo com threads pode deixar travas copiadas no trabalhador
+        self._contexto = multiprocessing.get_context("spawn")
+
+    def enviar(self, nome_arquivo, conteudo, ano, incremental=False):
+        # O ano é reservado sob a trava (a tarefa entra como "recebendo"), mas
+        # o arquivo é copiado fora dela, para não travar tarefas() e o
+        # progresso das outras cargas enquanto um upload grande é gravado
+        with self._lock:
+            agora = time.time()
+            for id_antiga in [t["id"] for t in self._tarefas.values()
+                              if t["fim"] is not None and agora - t["fim"] > RETENCAO_TAREFAS]:
+                del self._tarefas[id_antiga]
+
+            for tarefa in self._tarefas.values():
+                if tarefa["ano"] == ano and tarefa["estado"] in ESTADOS_ATIVOS:
+                    raise ValueError(
+                        f"Já existe uma carga em andamento para o ano de {ano} ('{tarefa['arquivo']}').")
+
+            id_tarefa = uuid.uuid4().hex
+            self._tarefas[id_tarefa] = {
+                "id": id_tarefa,
+                "arquivo": nome_arquivo,
+                "ano": ano,
+                "incremental": incremental,
+                "estado": "recebendo",
+                "bloco": 0,
+                "linhas_lidas": 0,
+                "linhas_mantidas": 0,
+                "db_path": None,
+                "amostra": None,
+                "resumo": None,
+                "erro": None,
+                "inicio": agora,
+                "fim": None,
+            }
+
+        # O conteúdo vai para um arquivo temporário, que o trabalhador lê e apaga
+        pasta = tempfile.mkdtemp(prefix="ingestao_")
+        caminho = os.path.join(pasta, os.path.basename(nome_arquivo))
+        try:
+            with open(caminho, "wb") as destino:
+                shutil.copyfileobj(conteudo, destino)
+        except Exception as e:
+            shutil.rmtree(pasta, ignore_errors=True)
+            with self._lock:
+                self._tarefas[id_tarefa].update(estado="erro", erro=str(e), fim=time.time())
+            raise
+
+        with self._lock:
+            self._tarefas[id_tarefa]["estado"] = "na fila"
+            self._obter_executor().submit(self._executar, id_tarefa, caminho, nome_arquivo, incremental)
+        return id_tarefa
+
+    def tarefas(self, ids=None):
+        with self._lock:
+            return [dict(t) for t in self._tarefas.values() if ids is None or t["id"] in ids]
+
+    def em_andamento(self, ids=None):
+        return any(t["estado"] in ESTADOS_ATIVOS for t in self.tarefas(ids))
+
+    def _obter_executor(self):
+        if self._executor is None:
+            self._fila = self._contexto.Queue()
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.processos, thread_name_prefix="ingestao")
+            threading.Thread(target=self._receber_progresso, daemon=True).start()
+        return self._executor
+
+    def _executar(self, id_tarefa, caminho, nome_arquivo, incremental):
+        # Roda em uma thread do executor: inicia o processo da tarefa e espera o resultado
+        receptor, emissor = self._contexto.Pipe(duplex=False)
+        processo = self._contexto.Process(
+            target=_processar_em_trabalhador, daemon=True,
+            args=(id_tarefa, caminho, nome_arquivo, incremental, self._fila, emissor))
+
+        try:
+            processo.start()
+            emissor.close()
+            try:
+                estado, resultado = receptor.recv()
+            except EOFError:
+                estado, resultado = "erro", "O processo da carga terminou inesperadamente."
+            processo.join()
+            if estado == "erro" and processo.exitcode:
+                resultado += f" (código de saída {processo.exitcode})"
+        except Exception as e:
+            logging.exception("Erro ao iniciar a carga da tarefa %s", id_tarefa)
+            shutil.rmtree(os.path.dirname(caminho), ignore_errors=True)
+            estado, resultado = "erro", str(e)
+        finally:
+            receptor.close()
+
+        if estado == "concluído":
+            amostra, db_path, linhas_lidas, linhas_mantidas, resumo = resultado
+            atualizacao = {"db_path": db_path, "amostra": amostra, "resumo": resumo,
+                           "linhas_lidas": linhas_lidas, "linhas_mantidas": linhas_mantidas}
+            self._sincronizar_consolidado()
+        else:
+            logging.warning("Carga de '%s' falhou: %s", nome_arquivo, resultado)
+            atualizacao = {"erro": resultado}
+
+        with self._lock:
+            self._tarefas[id_tarefa].update(atualizacao, estado=estado, fim=time.time())
+
+    def _sincronizar_consolidado(self):
+        # Uma sincronização por vez, mesmo com várias tarefas terminando juntas;
+        # uma falha aqui não desfaz a carga, que já está no banco do ano
+        from controller.AcidenteController import AcidenteController, USAR_BANCO_CONSOLIDADO
+
+        if not USAR_BANCO_CONSOLIDADO:
+            return
+        with self._trava_consolidado:
+            try:
+                AcidenteController().sincronizar_consolidado()
+            except Exception:
+                logging.exception("Não foi possível sincronizar o banco consolidado")
+
+    def _receber_progresso(self):
+        while True:
+            id_tarefa, bloco, linhas_lidas, linhas_mantidas = self._fila.get()
+            with self._lock:
+                tarefa = self._tarefas.get(id_tarefa)
+                if tarefa is None or tarefa["estado"] not in ESTADOS_ATIVOS:
+                    continue
+                tarefa.update(estado="processando", bloco=bloco,
+                              linhas_lidas=linhas_lidas, linhas_mantidas=linhas_mantidas)
+
+
+agendador_ingestao = AgendadorIngestao()
@@ -0,0 +1,126 @@
+import os
+import numpy as np
+import pandas as pd
+from suporte.Instrumentacao import instrumentacao
+
+# Acima desta quantidade de pontos os mapas mostram células agregadas em vez
+# de um marcador por acidente. Pode ser ajustada com TRANSITO_LIMITE_PONTOS_MAPA.
+LIMITE_PONTOS_PADRAO = int(os.environ.get("TRANSITO_LIMITE_PONTOS_MAPA", "5000"))
+
+# Acima desta quantidade de células o mapa avisa que o zoom escolhido deixa o
+# navegador lento (as células continuam no tamanho do zoom pedido)
+MAXIMO_CELULAS_PADRAO = 2000
+
+# Largura aproximada de cada célula na tela, em pixels, no zoom pedido
+TAMANHO_CELULA_PX = 24
+
+FORMAS = ["grade", "hexagono"]
+
+# Largura de um tile do mapa (em pixels) no zoom 0, que cobre os 2π de longitude
+PIXELS_TILE = 256
+LATITUDE_MAXIMA = 85.05112878
+
+
+# Agregação espacial dos acidentes para os mapas: os pontos são projetados em
+# Web Mercator (a projeção do mapa) e agrupados em células quadradas ou
+# hexagonais de largura fixa na tela para o zoom pedido, tudo vetorizado no
+# NumPy. Cada célula volta com a quantidade de acidentes e as somas pedidas,
+# no centro das suas coordenadas; com `por`, uma linha por célula e valor da
+# coluna (o ano, por exemplo), para o mapa manter a cor dos pontos.
+class AgregacaoEspacial:
+    def __init__(self, limite_pontos=LIMITE_PONTOS_PADRAO, maximo_celulas=MAXIMO_CELULAS_PADRAO,
+                 tamanho_celula_px=TAMANHO_CELULA_PX):
+        self.limite_pontos = limite_pontos
+        self.maximo_celulas = maximo_celulas
+        self.tamanho_celula_px = tamanho_celula_px
+
+    def precisa_agrupar(self, df):
+        return len(df) > self.limite_pontos
+
+    def celulas_demais(self, celulas):
+        return len(celulas) > self.maximo_celulas
+
+    def tamanho_celula(self, zoom):
+        # Largura da célula em unidades de Mercator (radianos no equador)
+        return 2 * np.pi / (PIXELS_TILE * 2 ** zoom) * self.tamanho_celula_px
+
+    @instrumentacao.instrumentar("controller")
+    def agrupar(self, df, zoom, forma="grade", somas=(), latitude="latitude", longitude="longitude",
+                por=None):
+        # Devolve um DataFrame com latitude/longitude do centro de cada célula,
+        # total_acidentes, as colunas de somas (com o mesmo nome) e a coluna por
+        if forma not in FORMAS:
+            raise ValueError(f"Forma desconhecida: '{forma}'. Use uma de {FORMAS}.")
+        somas = [c for c in somas if c in df.columns]
+        grupos = [] if por is None else [por]
+
+        lat = pd.to_numeric(df[latitude], errors="coerce").to_numpy(dtype="float64")
+        lon = pd.to_numeric(df[longitude], errors="coerce").to_numpy(dtype="float64")
+        validos = np.isfinite(lat) & np.isfinite(lon)
+        if not validos.any():
+            return pd.DataFrame(columns=[latitude, longitude] + grupos + ["total_acidentes"] + somas)
+
+        x, y = self._projetar(lat[validos], lon[validos])
+        pesos = {c: pd.to_numeric(df[c], errors="coerce").fillna(0).to_numpy(dtype="float64")[validos]
+                 for c in somas}
+        codigos, valores = pd.factorize(df[por].to_numpy()[validos], use_na_sentinel=False) if por is not None else (0, [None])
+        quantidade_valores = max(len(valores), 1)
+
+        tamanho = self.tamanho_celula(zoom)
+        a, b = self._celulas(x, y, tamanho, forma)
+        # Os dois índices da célula (e o código do valor de por) viram uma
+        # única chave inteira
+        menor_a, menor_b = a.min(), b.min()
+        largura = b.max() - menor_b + 1
+        chaves = ((a - menor_a) * largura + (b - menor_b)) * quantidade_valores + codigos
+        unicas, inverso = np.unique(chaves, return_inverse=True)
+        celulas = unicas // quantidade_valores
+
+        cx, cy = self._centros(celulas // largura + menor_a, celulas % largura + menor_b, tamanho, forma)
+        centro_lat, centro_lon = self._desprojetar(cx, cy)
+
+        resultado = pd.DataFrame({latitude: centro_lat, longitude: centro_lon})
+        if por is not None:
+            resultado[por] = np.asarray(valores, dtype=object)[unicas % quantidade_valores]
+        resultado["total_acidentes"] = np.bincount(inverso, minlength=len(unicas))
+        for coluna, peso in pesos.items():
+            resultado[coluna] = np.bincount(inverso, weights=peso, minlength=len(unicas)).round().astype("int64")
+        return resultado.sort_values("total_acidentes", ascending=False, ignore_index=True)
+
+    @staticmethod
+    def _projetar(lat, lon):
+        lat = np.radians(np.clip(lat, -LATITUDE_MAXIMA, LATITUDE_MAXIMA))
+        return np.radians(lon), np.log(np.tan(np.pi / 4 + lat / 2))
+
+    @staticmethod
+    def _desprojetar(x, y):
+        return np.degrees(2 * np.arctan(np.exp(y)) - np.pi / 2), np.degrees(x)
+
+    @staticmethod
+    def _celulas(x, y, tamanho, forma):
+        if forma == "grade":
+            return np.floor(x / tamanho).astype("int64"), np.floor(y / tamanho).astype("int64")
+
+        # Hexágonos com a ponta para cima e largura `tamanho`: coordenadas
+        # axiais (q, r), arredondadas pelo hexágono mais próximo (cúbicas)
+        raio = tamanho / np.sqrt(3)
+        q = (np.sqrt(3) / 3 * x - y / 3) / raio
+        r = (2 / 3 * y) / raio
+        s = -q - r
+        rq, rr, rs = np.round(q), np.round(r), np.round(s)
+        dq, dr, ds = np.abs(rq - q), np.abs(rr - r), np.abs(rs - s)
+        corrigir_q = (dq > dr) & (dq > ds)
+        corrigir_r = ~corrigir_q & (dr > ds)
+        rq = np.where(corrigir_q, -rr - rs, rq)
+        rr = np.where(corrigir_r, -rq - rs, rr)
+        return rq.astype("int64"), rr.astype("int64")
+
+    @staticmethod
+    def _centros(a, b, tamanho, forma):
+        if forma == "grade":
+            return (a + 0.5) * tamanho, (b + 0.5) * tamanho
+        raio = tamanho / np.sqrt(3)
+        return raio * np.sqrt(3) * (a + b / 2), raio * 1.5 * b
+
+
+agregacao_espacial = AgregacaoEspacial()
@@ -0,0 +1,150 @@
+import os
+import threading
+import logging
+from collections import OrderedDict
+
+# Memória máxima ocupada pelos DataFrames em cache. Pode ser ajustada por
+# servidor com a variável de ambiente TRANSITO_CACHE_MB.
+ORCAMENTO_PADRAO_MB = int(os.environ.get("TRANSITO_CACHE_MB", "512"))
+
+
+# Cache LRU de DataFrames compartilhado por todas as sessões do processo. Cada
+# item guarda a versão dos arquivos de onde foi lido (a versão dos dados do
+# manifesto do banco, quando informada, ou o mtime/tamanho); se alguma delas
+# mudar (um novo upload, por exemplo) o item é descartado e recarregado. Há um
+# único item por chave: pedidos de só algumas colunas são recortados dele, e
+# uma coluna que falta faz o item ser relido com as colunas antigas e as novas.
+class CacheDados:
+    def __init__(self, orcamento_mb=ORCAMENTO_PADRAO_MB):
+        self.orcamento_bytes = orcamento_mb * 1024 * 1024
+        self.bytes_em_uso = 0
+        self.acertos = 0
+        self.falhas = 0
+        self.remocoes = 0
+
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+        self._carregamentos = {}
+
+    @staticmethod
+    def assinatura(arquivos, versoes=None):
+        # versoes: caminho -> versão dos dados; sem versão, vale o mtime/tamanho
+        assinatura = []
+        for caminho in arquivos:
+            versao = (versoes or {}).get(caminho)
+            if versao is not None:
+                assinatura.append((caminho, versao))
+                continue
+            try:
+                info = os.stat(caminho)
+                assinatura.append((caminho, info.st_mtime_ns, info.st_size))
+            except OSError:
+                assinatura.append((caminho, None, None))
+        return tuple(assinatura)
+
+    def obter(self, chave, arquivos, carregar, versoes=None, colunas=None):
+        # carregar(colunas) lê as colunas pedidas (None para todas); colunas:
+        # as que o chamador quer agora (None para todas)
+        assinatura = self.assinatura(arquivos, versoes)
+
+        df = self._buscar(chave, assinatura, colunas)
+        if df is not None:
+            return self._recortar(df, colunas)
+
+        # Sessões concorrentes pedindo o mesmo item esperam um único
+        # carregamento; a trava da chave some quando ninguém mais a usa
+        with self._lock:
+            trava, usuarios = self._carregamentos.get(chave, (None, 0))
+            trava = trava or threading.Lock()
+            self._carregamentos[chave] = (trava, usuarios + 1)
+
+        try:
+            with trava:
+                df = self._buscar(chave, assinatura, colunas)
+                if df is None:
+                    with self._lock:
+                        self.falhas += 1
+                        item = self._itens.get(chave)
+                    # Relê junto as colunas já guardadas, para o item continuar
+                    # servindo os pedidos anteriores
+                    pedidas = None
+                    if colunas is not None:
+                        anteriores = [] if item is None else list(item[3])
+                        pedidas = list(dict.fromkeys(anteriores + list(colunas)))
+                    df = carregar(pedidas)
+                    self._guardar(chave, assinatura, df, pedidas)
+        finally:
+            with self._lock:
+                trava, usuarios = self._carregamentos[chave]
+                if usuarios == 1:
+                    del self._carregamentos[chave]
+                else:
+                    self._carregamentos[chave] = (trava, usuarios - 1)
+
+        return self._recortar(df, colunas)
+
+    @staticmethod
+    def _recortar(df, colunas):
+        if colunas is None:
+            return df.copy(deep=False)
+        return df[[c for c in colunas if c in df.columns]]
+
+    def invalidar(self, chave=None):
+        with self._lock:
+            chaves = list(self._itens) if chave is None else [chave]
+            for c in chaves:
+                if c in self._itens:
+                    self._remover(c)
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                "itens": len(self._itens),
+                "bytes_em_uso": self.bytes_em_uso,
+                "orcamento_bytes": self.orcamento_bytes,
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "remocoes": self.remocoes,
+            }
+
+    def _buscar(self, chave, assinatura, colunas=None):
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is not None and item[0] != assinatura:
+                self._remover(chave)
+                item = None
+
+            # O item só serve se tem todas as colunas pedidas (pedidas: as
+            # colunas com que foi lido, None para todas)
+            pedidas = None if item is None else item[3]
+            if item is None or (pedidas is not None and (colunas is None or not set(colunas) <= set(pedidas))):
+                return None
+
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return item[1]
+
+    def _guardar(self, chave, assinatura, df, pedidas=None):
+        tamanho = int(df.memory_usage(deep=True).sum())
+        if tamanho > self.orcamento_bytes:
+            logging.info("Item %s (%d bytes) maior que o orçamento do cache; não armazenado.",
+                         chave, tamanho)
+            return
+
+        with self._lock:
+            if chave in self._itens:
+                self._remover(chave)
+
+            while self._itens and self.bytes_em_uso + tamanho > self.orcamento_bytes:
+                self._remover(next(iter(self._itens)))
+                self.remocoes += 1
+
+            self._itens[chave] = (assinatura, df, tamanho, pedidas)
+            self.bytes_em_uso += tamanho
+
+    def _remover(self, chave):
+        tamanho = self._itens.pop(chave)[2]
+        self.bytes_em_uso -= tamanho
+
+
+cache_dados = CacheDados()
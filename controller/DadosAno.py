@@ -0,0 +1,88 @@
+import os
+from Model.AcidenteModel import AcidenteModel, COLUNAS_CONTROLE
+
+
+# Acesso preguiçoso aos dados do ano escolhido na barra lateral. Nada é lido
+# ao criar o objeto: cada página pede só as colunas, filtros e agregações de
+# que precisa, e cada resultado é guardado no próprio objeto, que vale por uma
+# execução da página (a barra lateral cria um novo a cada rerun). Os dados em
+# si continuam vindo do cache_dados e do banco, via controller.
+class DadosAno:
+    def __init__(self, controller, nome_banco, ano):
+        self.controller = controller
+        self.nome_banco = nome_banco
+        self.ano = ano
+        self.db_path = f"data/{nome_banco}"
+        self._resultados = {}
+
+    def _memorizar(self, chave, calcular):
+        if chave not in self._resultados:
+            self._resultados[chave] = calcular()
+        return self._resultados[chave]
+
+    @property
+    def colunas(self):
+        def calcular():
+            if not self.nome_banco.endswith(".db"):
+                return list(self.dados().columns)
+            return [c for c in AcidenteModel(self.db_path).colunas() if c not in COLUNAS_CONTROLE]
+        return self._memorizar(("colunas",), calcular)
+
+    @property
+    def vazio(self):
+        # Nos bancos anuais a contagem vem do cubo, sem ler as linhas
+        def calcular():
+            if not os.path.exists(self.db_path):
+                return True
+            if not self.nome_banco.endswith(".db"):
+                return self.dados().empty
+            return self.metricas()["total_acidentes"] == 0
+        return self._memorizar(("vazio",), calcular)
+
+    def dados(self, colunas=None, filtros=None):
+        # Linhas geolocalizadas do ano; colunas: só as pedidas (None para
+        # todas); filtros: {"coluna": valor} ou {"coluna": [valores]}
+        chave = ("dados", tuple(colunas) if colunas is not None else None,
+                 tuple(sorted((filtros or {}).items(), key=lambda item: item[0])))
+
+        def calcular():
+            pedidas = None if colunas is None else list(dict.fromkeys(list(colunas) + list(filtros or {})))
+            df = self.controller.listar_dados_por_banco(self.nome_banco, pedidas)
+            for coluna, valor in (filtros or {}).items():
+                if coluna not in df.columns:
+                    continue
+                if isinstance(valor, (list, tuple, set)):
+                    df = df[df[coluna].isin(list(valor))]
+                else:
+                    df = df[df[coluna] == valor]
+            if colunas is not None:
+                df = df[[c for c in colunas if c in df.columns]]
+            return df
+        return self._memorizar(chave, calcular)
+
+    def agregar(self, agrupar_por=(), medidas=None, filtros=None, top_n=None,
+                ordenar_por=None, crescente=False):
+        chave = ("agregar", tuple(agrupar_por), repr(medidas), repr(filtros), top_n, ordenar_por, crescente)
+        resultado = self._memorizar(chave, lambda: self.controller.agregar(
+            self.nome_banco, agrupar_por, medidas=medidas, filtros=filtros, top_n=top_n,
+            ordenar_por=ordenar_por, crescente=crescente))
+        # As páginas renomeiam as colunas do resultado; cada uma recebe a sua cópia
+        return resultado.copy()
+
+    def metricas(self):
+        return self._memorizar(("metricas",), lambda: self.controller.metricas_gerais(self.nome_banco))
+
+    def municipios(self):
+        return self._memorizar(("municipios",), lambda: self.controller.listar_municipios(self.nome_banco))
+
+    def dados_por_municipio(self, municipio):
+        return self._memorizar(("municipio", municipio),
+                               lambda: self.controller.dados_por_municipio(self.nome_banco, municipio)).copy()
+
+    def serie_temporal(self, frequencia="dia", municipio=None, mes=None):
+        return self._memorizar(("serie", frequencia, municipio, mes), lambda: self.controller.serie_temporal(
+            self.nome_banco, frequencia, municipio, mes=mes)).copy()
+
+    def mapa_calor(self, municipio=None, medida="total_acidentes"):
+        return self._memorizar(("mapa_calor", municipio, medida), lambda: self.controller.mapa_calor(
+            self.nome_banco, municipio, medida)).copy()
@@ -0,0 +1,48 @@
+import threading
+import pandas as pd
+
+
+# Categorias das colunas de texto compartilhadas por todos os anos carregados
+# no processo. Cada coluna só ganha valores novos no fim da lista, então os
+# códigos já atribuídos nunca mudam e quadros de anos diferentes podem ser
+# alinhados ao mesmo dtype e concatenados sem voltar a ser texto.
+class DicionarioCategorias:
+    def __init__(self):
+        self._categorias = {}
+        self._lock = threading.Lock()
+
+    def categorizar(self, serie, coluna):
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            valores = serie.cat.categories
+        else:
+            if serie.dtype.kind in "iuf":
+                # Bancos antigos guardam br como número; as categorias são sempre texto
+                serie = serie.astype("Int64").astype("string")
+            valores = serie.dropna().unique()
+        return serie.astype(self._registrar(coluna, valores))
+
+    def alinhar(self, df):
+        # Atualiza um quadro categorizado antes com a lista de categorias atual
+        for coluna in df.columns:
+            if coluna in self._categorias and isinstance(df[coluna].dtype, pd.CategoricalDtype):
+                categorias = self.categorias(coluna)
+                # Como a lista só cresce, mesmo tamanho significa mesmas categorias
+                if len(df[coluna].cat.categories) != len(categorias):
+                    df[coluna] = df[coluna].cat.set_categories(categorias)
+        return df
+
+    def categorias(self, coluna):
+        with self._lock:
+            return self._categorias.get(coluna, pd.Index([], dtype="str"))
+
+    def _registrar(self, coluna, valores):
+        with self._lock:
+            atuais = self._categorias.get(coluna, pd.Index([], dtype="str"))
+            novos = pd.Index(valores).astype("str").difference(atuais).sort_values()
+            if len(novos):
+                atuais = atuais.append(novos)
+                self._categorias[coluna] = atuais
+            return pd.CategoricalDtype(atuais)
+
+
+dicionario_categorias = DicionarioCategorias()
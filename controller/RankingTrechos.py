@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+
+# Peso de cada acidente e de cada vítima no índice de gravidade dos trechos
+PESOS_PADRAO = {
+    "total_acidentes": 1,
+    "feridos_leves": 2,
+    "feridos_graves": 5,
+    "mortos": 10,
+}
+
+JANELA_PADRAO_KM = 1
+TOP_N_PADRAO = 10
+
+
+# Ranking dos trechos críticos das rodovias a partir das contagens por trecho
+# de 1 km (br_numero, km_trecho), que vêm do cubo. Cada rodovia vira um vetor
+# com um valor por km e as janelas deslizantes (de janela_km km, andando 1 km
+# por vez) são somadas por soma acumulada no NumPy. Os trechos escolhidos não
+# se sobrepõem: uma janela que cobre um km de outra mais grave da mesma
+# rodovia é descartada, para que um único ponto crítico não ocupe o ranking.
+class RankingTrechos:
+    def __init__(self, pesos=None):
+        self.pesos = dict(pesos or PESOS_PADRAO)
+
+    def ranquear(self, trechos, janela_km=JANELA_PADRAO_KM, top_n=TOP_N_PADRAO, por_ano=False,
+                 pesos=None):
+        # trechos: br_numero, km_trecho, as colunas de PESOS_PADRAO e, com
+        # por_ano, a coluna ano (um ranking por ano; sem ela, os anos são somados)
+        janela_km = int(janela_km)
+        if janela_km < 1:
+            raise ValueError("A janela deve ter pelo menos 1 km.")
+        pesos = dict(pesos or self.pesos)
+        medidas = list(PESOS_PADRAO)
+        grupos = ["ano", "br_numero"] if por_ano else ["br_numero"]
+        colunas = grupos + ["km_inicio", "km_fim"] + medidas + ["indice_gravidade"]
+
+        trechos = trechos.dropna(subset=["br_numero", "km_trecho"])
+        if trechos.empty:
+            return pd.DataFrame(columns=colunas + ["posicao"])
+
+        trechos = trechos.astype({"br_numero": "int64", "km_trecho": "int64"})
+        trechos = trechos.groupby(grupos + ["km_trecho"], sort=True)[medidas].sum().reset_index()
+
+        partes = []
+        for chave, grupo in trechos.groupby(grupos, sort=False):
+            partes.append(self._janelas(grupo, janela_km, top_n, pesos, medidas)
+                          .assign(**dict(zip(grupos, chave if isinstance(chave, tuple) else (chave,)))))
+        resultado = pd.concat(partes, ignore_index=True)
+
+        ordem = ["indice_gravidade", "total_acidentes", "br_numero", "km_inicio"]
+        crescente = [False, False, True, True]
+        if por_ano:
+            ordem, crescente = ["ano"] + ordem, [True] + crescente
+        resultado = resultado.sort_values(ordem, ascending=crescente, ignore_index=True)
+        if por_ano:
+            resultado = resultado.groupby("ano", sort=False).head(top_n).reset_index(drop=True)
+            posicao = resultado.groupby("ano", sort=False).cumcount() + 1
+        else:
+            resultado = resultado.head(top_n)
+            posicao = np.arange(1, len(resultado) + 1)
+        return resultado[colunas].assign(posicao=posicao)
+
+    @staticmethod
+    def _janelas(grupo, janela_km, top_n, pesos, medidas):
+        # Janelas de uma rodovia: vetor denso do menor ao maior km com
+        # acidentes, somas por janela e a escolha gulosa sem sobreposição
+        km = grupo["km_trecho"].to_numpy()
+        inicio = km.min()
+        tamanho = km.max() - inicio + 1
+        posicoes = km - inicio
+
+        largura = max(tamanho - janela_km + 1, 1)
+        somas = {}
+        for medida in medidas:
+            denso = np.zeros(tamanho + janela_km, dtype="int64")
+            denso[posicoes] = grupo[medida].to_numpy(dtype="int64")
+            acumulado = np.concatenate(([0], np.cumsum(denso)))
+            somas[medida] = acumulado[janela_km:janela_km + largura] - acumulado[:largura]
+        indice = sum(pesos.get(m, 0) * somas[m] for m in medidas)
+
+        candidatas = np.flatnonzero(somas["total_acidentes"] > 0)
+        candidatas = candidatas[np.lexsort((candidatas, -somas["total_acidentes"][candidatas],
+                                            -indice[candidatas]))]
+        ocupado = np.zeros(largura + janela_km, dtype=bool)
+        escolhidas = []
+        for posicao in candidatas:
+            if ocupado[posicao:posicao + janela_km].any():
+                continue
+            ocupado[posicao:posicao + janela_km] = True
+            escolhidas.append(posicao)
+            if len(escolhidas) == top_n:
+                break
+
+        escolhidas = np.array(escolhidas, dtype="int64")
+        return pd.DataFrame({
+            "km_inicio": inicio + escolhidas,
+            "km_fim": inicio + escolhidas + janela_km,
+            **{m: somas[m][escolhidas] for m in medidas},
+            "indice_gravidade": indice[escolhidas],
+        })
+
+
+ranking_trechos = RankingTrechos()
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+FREQUENCIAS = ["dia", "semana", "mes"]
+
+# Ano bissexto em que as séries de anos diferentes são desenhadas quando
+# comparadas no mesmo calendário
+ANO_REFERENCIA = 2000
+
+# Rótulos das linhas do mapa de calor, na ordem de segunda a domingo, pelo
+# número do dia da semana do SQLite (0 = domingo)
+DIAS_SEMANA = {1: "Segunda", 2: "Terça", 3: "Quarta", 4: "Quinta", 5: "Sexta", 6: "Sábado", 0: "Domingo"}
+
+
+# Séries temporais a partir das contagens por dia que vêm dos cubos (no
+# máximo uma linha por dia e ano, nunca as linhas de acidentes). Os dias sem
+# acidente entram com zero, e cada ano é reamostrado por dia, semana ou mês.
+# Com alinhar=True as datas de todos os anos vão para o ANO_REFERENCIA, para
+# que os anos fiquem sobrepostos no mesmo eixo: dia pelo dia do mês, mês pelo
+# mês e semana pelos blocos de 7 dias contados a partir de 1º de janeiro.
+class SeriesTemporais:
+    def reamostrar(self, diaria, frequencia="dia", alinhar=False):
+        # diaria: ano, data_inversa (AAAA-MM-DD) e as medidas; devolve ano,
+        # periodo (data de início de cada dia, semana ou mês) e as medidas
+        if frequencia not in FREQUENCIAS:
+            raise ValueError(f"Frequência desconhecida: '{frequencia}'. Use uma de {FREQUENCIAS}.")
+        medidas = [c for c in diaria.columns if c not in ("ano", "data_inversa")]
+
+        datas = pd.to_datetime(diaria["data_inversa"], format="%Y-%m-%d", errors="coerce")
+        diaria = diaria.assign(data_inversa=datas).dropna(subset=["data_inversa"])
+        if diaria.empty:
+            return pd.DataFrame({"ano": pd.Series(dtype=object), "periodo": pd.Series(dtype="datetime64[ns]"),
+                                 **{m: pd.Series(dtype="int64") for m in medidas}})
+
+        partes = []
+        for ano, grupo in diaria.groupby("ano", sort=True):
+            serie = grupo.groupby("data_inversa")[medidas].sum()
+            calendario = pd.date_range(f"{serie.index.min().year}-01-01",
+                                       f"{serie.index.max().year}-12-31", freq="D")
+            serie = serie.reindex(calendario, fill_value=0)
+
+            periodo = self._periodos(serie.index, frequencia, alinhar)
+            serie = serie.groupby(periodo).sum()
+            partes.append(serie.rename_axis("periodo").reset_index().assign(ano=ano))
+
+        resultado = pd.concat(partes, ignore_index=True)
+        return resultado[["ano", "periodo"] + medidas]
+
+    @staticmethod
+    def _periodos(datas, frequencia, alinhar):
+        if frequencia == "semana" and alinhar:
+            # Blocos de 7 dias a partir de 1º de janeiro, pelo número do bloco,
+            # para que anos bissextos não desloquem as semanas
+            bloco = (datas.dayofyear - 1) // 7
+            return pd.Timestamp(f"{ANO_REFERENCIA}-01-01") + pd.to_timedelta(bloco * 7, unit="D")
+
+        if frequencia == "dia":
+            periodo = datas
+        elif frequencia == "mes":
+            periodo = datas.to_period("M").to_timestamp()
+        else:
+            # Semanas de segunda a domingo
+            periodo = datas - pd.to_timedelta(datas.weekday, unit="D")
+
+        if alinhar:
+            periodo = pd.DatetimeIndex(pd.to_datetime(
+                dict(year=ANO_REFERENCIA, month=periodo.month, day=periodo.day)))
+        return periodo
+
+    @staticmethod
+    def matriz_semana_hora(contagens, medida="total_acidentes"):
+        # contagens: dia_semana_numero, hora e a medida; devolve a matriz 7 x 24
+        # com os dias de segunda a domingo nas linhas e as horas nas colunas
+        matriz = np.zeros((len(DIAS_SEMANA), 24), dtype="int64")
+        linhas = {numero: i for i, numero in enumerate(DIAS_SEMANA)}
+        validas = contagens.dropna(subset=["dia_semana_numero", "hora"])
+        validas = validas[validas["hora"].between(0, 23)]
+        if not validas.empty:
+            np.add.at(matriz,
+                      (validas["dia_semana_numero"].astype("int64").map(linhas).to_numpy(),
+                       validas["hora"].astype("int64").to_numpy()),
+                      validas[medida].astype("int64").to_numpy())
+        return pd.DataFrame(matriz, index=list(DIAS_SEMANA.values()), columns=range(24))
+
+
+series_temporais = SeriesTemporais()
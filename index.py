@@ -1,7 +1,11 @@
-from View import home_page, upload_page, dashboard_page, municipio_page, classificacao_page, periodo_page, analise_geral_page
+from View import home_page, upload_page, dashboard_page, municipio_page, trechos_page, classificacao_page, periodo_page, analise_geral_page
 from View.components.sidebar import render_sidebar
+from View.components.diagnostico import render_diagnostico, diagnostico_aberto
+from View.components.perfilamento import render_perfilamento, perfilar_esta_execucao
 import streamlit as st
-from controller.AcidenteController import AcidenteController
+from controller.AcidenteController import AcidenteController, AQUECER_NA_INICIALIZACAO
+from suporte.Instrumentacao import instrumentacao
+from suporte.Perfilador import perfilador
 import os
 import re
 
@@ -11,28 +15,41 @@ st.set_page_config(
     layout="wide"
 )
 
-selected_page, df, ano, palette = render_sidebar()
+if AQUECER_NA_INICIALIZACAO:
+    AcidenteController().iniciar_aquecimento()
+
+# Mede esta execução com a instrumentação ativa ou com o painel de diagnóstico aberto
+instrumentacao.iniciar_execucao(forcar=diagnostico_aberto())
+
+selected_page, dados, ano, palette = render_sidebar()
 
 controller = AcidenteController()
 
-if selected_page == "Home":
-    home_page.render()
+# Com o modo de perfilamento, a execução pedida pelo botão da barra lateral é perfilada
+with perfilador.perfilar(perfilar_esta_execucao()) as perfil:
+    if selected_page == "Home":
+        home_page.render()
+
+    elif selected_page == "Análise de dados":
+        upload_page.render(controller)
 
-elif selected_page == "Análise de dados":
-    upload_page.render(controller)
+    elif selected_page == "Visualização de Dados":
+        dashboard_page.render(dados, ano, palette, controller)
 
-elif selected_page == "Visualização de Dados":
-    dashboard_page.render(df, ano, palette, controller)
+    elif selected_page == "Acidentes por município":
+        municipio_page.render(dados, ano, palette, controller)
 
-elif selected_page == "Acidentes por município":
-    municipio_page.render(df, ano, palette, controller)
+    elif selected_page == "Trechos críticos":
+        trechos_page.render(dados, ano, palette, controller)
 
-elif selected_page == "Classificações":
-    classificacao_page.render(df, ano, palette, controller)
+    elif selected_page == "Classificações":
+        classificacao_page.render(dados, ano, palette, controller)
 
-elif selected_page == "Período":
-    periodo_page.render(df, ano, palette)
+    elif selected_page == "Período":
+        periodo_page.render(dados, ano, palette, controller)
 
-elif selected_page == "Análise Geral":
-    analise_geral_page.render(controller, palette)
+    elif selected_page == "Análise Geral":
+        analise_geral_page.render(controller, palette)
 
+render_diagnostico(instrumentacao.finalizar_execucao(selected_page), controller.estatisticas_cache())
+render_perfilamento(perfil, selected_page)
@@ -0,0 +1,93 @@
+import argparse
+import os
+from controller.AcidenteController import AcidenteController
+
+
+def atualizar(controller, args):
+    resultados = controller.atualizar_bancos()
+    if not resultados:
+        print("Nenhum banco encontrado em data/.")
+
+    for nome_banco, versao_anterior, linhas in resultados:
+        if linhas is None:
+            print(f"{nome_banco}: já está na versão {versao_anterior}.")
+        else:
+            print(f"{nome_banco}: atualizado da versão {versao_anterior} ({linhas} linhas).")
+
+
+def explicar(controller, args):
+    bancos = [args.banco] if args.banco else [
+        b for b in controller.listar_bancos_de_dados() if b.endswith(".db")]
+
+    for nome_banco in bancos:
+        print(f"== {nome_banco}")
+        for nome, query, plano in controller.explicar_consultas(nome_banco):
+            print(f"-- {nome}")
+            print("   " + " ".join(query.split()))
+            for passo in plano:
+                print(f"   > {passo}")
+        print()
+
+
+def consolidar(controller, args):
+    model = controller.sincronizar_consolidado()
+    for particao in model.listar_particoes().itertuples():
+        print(f"{particao.ano}: {particao.linhas} linhas (origem {particao.origem})")
+
+
+def manifesto(controller, args):
+    bancos = [args.banco] if args.banco else [
+        b for b in controller.listar_bancos_de_dados() if b.endswith(".db")]
+
+    for nome_banco in bancos:
+        print(f"== {nome_banco}")
+        for carga in controller.listar_manifesto(nome_banco):
+            hash_arquivo = (carga["hash_arquivo"] or "-")[:12]
+            print(f"{carga['fim']}  {carga['modo']:<11} {hash_arquivo:<12} "
+                  f"{carga['nome_arquivo'] or '-'}: {carga['inseridas']} inseridas, "
+                  f"{carga['atualizadas']} atualizadas, {carga['inalteradas']} inalteradas "
+                  f"({carga['segundos']:.2f} s)")
+        print()
+
+
+def converter(controller, args):
+    destino = args.destino or os.path.splitext(args.planilha)[0] + ".csv"
+    linhas = controller.converter_xlsx_para_csv(args.planilha, destino)
+    print(f"{destino}: {linhas} linhas gravadas.")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Manutenção dos bancos de dados de acidentes salvos em data/.")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    comandos.add_parser(
+        "atualizar", help="Converte os bancos antigos para o schema tipado atual, no próprio arquivo."
+    ).set_defaults(executar=atualizar)
+
+    comando_explicar = comandos.add_parser(
+        "explicar", help="Mostra o EXPLAIN QUERY PLAN das consultas usadas pelas páginas.")
+    comando_explicar.add_argument("banco", nargs="?", help="Ex.: acidentes_2024.db (padrão: todos)")
+    comando_explicar.set_defaults(executar=explicar)
+
+    comandos.add_parser(
+        "consolidar", help="Cria/atualiza o banco consolidado com todos os anos (data/consolidado/)."
+    ).set_defaults(executar=consolidar)
+
+    comando_manifesto = comandos.add_parser(
+        "manifesto", help="Lista as cargas registradas no manifesto de cada banco.")
+    comando_manifesto.add_argument("banco", nargs="?", help="Ex.: acidentes_2024.db (padrão: todos)")
+    comando_manifesto.set_defaults(executar=manifesto)
+
+    comando_converter = comandos.add_parser(
+        "converter", help="Converte uma planilha .xlsx em CSV (';', latin1) com as colunas do banco.")
+    comando_converter.add_argument("planilha", help="Ex.: datatran2024.xlsx")
+    comando_converter.add_argument("destino", nargs="?", help="Padrão: mesmo nome com extensão .csv")
+    comando_converter.set_defaults(executar=converter)
+
+    args = parser.parse_args()
+    args.executar(AcidenteController(), args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import functools
+import json
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+
+# Com TRANSITO_INSTRUMENTAR=1 toda execução das páginas (cada rerun) é medida
+# e registrada no log como uma linha JSON; sem ela, só as execuções em que o
+# painel de diagnóstico da barra lateral está aberto são medidas
+INSTRUMENTACAO_ATIVA = os.environ.get("TRANSITO_INSTRUMENTAR", "0") == "1"
+# Arquivo do registro (uma linha JSON por execução); sem ele, vai para o stderr
+ARQUIVO_LOG = os.environ.get("TRANSITO_INSTRUMENTACAO_LOG")
+
+# Ordem das categorias no resumo: consultas ao SQLite, leitura das cópias
+# Parquet, métodos do controller (pandas) e montagem dos gráficos (Plotly)
+CATEGORIAS = ["banco", "parquet", "controller", "grafico"]
+
+logger = logging.getLogger("transito.instrumentacao")
+
+
+class _MedicaoNula:
+    # Devolvida quando não há execução sendo medida: não custa nada além da chamada
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, rastreamento):
+        return False
+
+    def registrar(self, resultado=None, linhas=None, tamanho_bytes=None):
+        pass
+
+
+_MEDICAO_NULA = _MedicaoNula()
+
+
+class Medicao:
+    __slots__ = ("execucao", "categoria", "nome", "inicio", "duracao_ms", "filhos_ms",
+                 "profundidade", "linhas", "bytes")
+
+    def __init__(self, execucao, categoria, nome):
+        self.execucao = execucao
+        self.categoria = categoria
+        self.nome = nome
+        self.filhos_ms = 0.0
+        self.linhas = None
+        self.bytes = None
+
+    def __enter__(self):
+        self.profundidade = len(self.execucao.pilha)
+        self.execucao.pilha.append(self)
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo, valor, rastreamento):
+        self.duracao_ms = (time.perf_counter() - self.inicio) * 1000
+        self.execucao.pilha.pop()
+        if self.execucao.pilha:
+            self.execucao.pilha[-1].filhos_ms += self.duracao_ms
+        self.execucao.medicoes.append(self)
+        return False
+
+    def registrar(self, resultado=None, linhas=None, tamanho_bytes=None):
+        # Linhas e bytes do que foi produzido; de um DataFrame vêm do próprio
+        # quadro (bytes sem contar o conteúdo dos textos)
+        if isinstance(resultado, pd.DataFrame):
+            linhas = len(resultado) if linhas is None else linhas
+            if tamanho_bytes is None:
+                tamanho_bytes = int(resultado.memory_usage(index=False).sum())
+        elif isinstance(resultado, (list, dict, pd.Series)):
+            linhas = len(resultado) if linhas is None else linhas
+        self.linhas = linhas
+        self.bytes = tamanho_bytes
+
+    def como_dict(self):
+        return {
+            "categoria": self.categoria,
+            "nome": self.nome,
+            "inicio_ms": round((self.inicio - self.execucao.inicio) * 1000, 3),
+            "duracao_ms": round(self.duracao_ms, 3),
+            # Tempo fora das medições internas (ex.: o pandas de um método do
+            # controller, sem as consultas que ele fez)
+            "proprio_ms": round(self.duracao_ms - self.filhos_ms, 3),
+            "profundidade": self.profundidade,
+            "linhas": self.linhas,
+            "bytes": self.bytes,
+        }
+
+
+class _Execucao:
+    def __init__(self):
+        self.momento = datetime.now()
+        self.inicio = time.perf_counter()
+        self.pilha = []
+        self.medicoes = []
+
+
+class _Local(threading.local):
+    # Sem execução em andamento na thread, execucao fica None (atributo de
+    # classe, lido sem o custo de uma exceção como no getattr com padrão)
+    execucao = None
+
+
+# Medições por execução das páginas. Cada sessão do Streamlit roda o script
+# em uma thread própria, então a execução em andamento fica em um
+# threading.local: as medições de uma sessão não se misturam às de outra, e o
+# que roda em outras threads (aquecimento, fila de ingestão) não é medido.
+# Sem execução em andamento, medir() devolve uma medição nula e os métodos
+# decorados com instrumentar() só chamam a função.
+class Instrumentacao:
+    def __init__(self, ativa=INSTRUMENTACAO_ATIVA):
+        self.ativa = ativa
+        self._local = _Local()
+        if ativa and not logger.handlers:
+            saida = logging.FileHandler(ARQUIVO_LOG, encoding="utf-8") if ARQUIVO_LOG else logging.StreamHandler()
+            saida.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(saida)
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+
+    def iniciar_execucao(self, forcar=False):
+        # forcar: mede esta execução mesmo com a instrumentação desligada
+        # (painel de diagnóstico aberto)
+        self._local.execucao = _Execucao() if self.ativa or forcar else None
+
+    def finalizar_execucao(self, pagina=None):
+        # Devolve o registro da execução (None se ela não foi medida) e, com
+        # a instrumentação ativa, grava-o no log
+        execucao = self._local.execucao
+        self._local.execucao = None
+        if execucao is None:
+            return None
+        registro = {
+            "pagina": pagina,
+            "momento": execucao.momento.isoformat(timespec="seconds"),
+            "duracao_ms": round((time.perf_counter() - execucao.inicio) * 1000, 3),
+            "medicoes": [m.como_dict() for m in sorted(execucao.medicoes, key=lambda m: m.inicio)],
+        }
+        if self.ativa:
+            logger.info(json.dumps(registro, ensure_ascii=False))
+        return registro
+
+    def medir(self, categoria, nome):
+        execucao = self._local.execucao
+        if execucao is None:
+            return _MEDICAO_NULA
+        return Medicao(execucao, categoria, nome)
+
+    def medir_consulta(self, db_path, query):
+        # Consultas ao SQLite, pelo banco e pela primeira tabela do FROM
+        execucao = self._local.execucao
+        if execucao is None:
+            return _MEDICAO_NULA
+        tabela = re.search(r"\bFROM\s+(\w+)", query, re.IGNORECASE)
+        nome = f"{os.path.basename(db_path)}: {tabela.group(1) if tabela else 'consulta'}"
+        return Medicao(execucao, "banco", nome)
+
+    def instrumentar(self, categoria, nome=None):
+        # Decorador: mede cada chamada da função e as linhas e bytes do resultado
+        def decorador(funcao):
+            rotulo = nome or funcao.__qualname__
+
+            @functools.wraps(funcao)
+            def medida(*args, **kwargs):
+                execucao = self._local.execucao
+                if execucao is None:
+                    return funcao(*args, **kwargs)
+                with Medicao(execucao, categoria, rotulo) as medicao:
+                    resultado = funcao(*args, **kwargs)
+                    medicao.registrar(resultado)
+                return resultado
+            return medida
+        return decorador
+
+    @staticmethod
+    def resumir(registro, por="nome"):
+        # Soma das medições por categoria ou por categoria e nome: chamadas,
+        # tempo total, tempo próprio (sem as medições internas), linhas e bytes
+        colunas = ["categoria"] + (["nome"] if por == "nome" else [])
+        medicoes = pd.DataFrame(registro["medicoes"] if registro else [],
+                                columns=["categoria", "nome", "duracao_ms", "proprio_ms", "linhas", "bytes"])
+        resumo = medicoes.groupby(colunas, sort=False).agg(
+            chamadas=("duracao_ms", "size"), total_ms=("duracao_ms", "sum"), proprio_ms=("proprio_ms", "sum"),
+            linhas=("linhas", lambda s: s.sum(min_count=1)),
+            bytes=("bytes", lambda s: s.sum(min_count=1))).reset_index()
+        ordem = {categoria: i for i, categoria in enumerate(CATEGORIAS)}
+        resumo["_ordem"] = resumo["categoria"].map(ordem).fillna(len(CATEGORIAS))
+        return (resumo.sort_values(["_ordem", "proprio_ms"], ascending=[True, False])
+                .drop(columns="_ordem").reset_index(drop=True))
+
+
+instrumentacao = Instrumentacao()
@@ -0,0 +1,123 @@
+import cProfile
+import marshal
+import os
+import pickle
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+# Com TRANSITO_PERFILAR=1 (ou ?perfilar=1 no endereço da página) a barra
+# lateral oferece o perfilamento da próxima execução da página
+PERFILAMENTO_ATIVO = os.environ.get("TRANSITO_PERFILAR", "0") == "1"
+
+TOP_N_PADRAO = 25
+# Quadros da pilha guardados pelo tracemalloc em cada alocação: o resumo é
+# por linha, e cada quadro a mais multiplica o custo do rastreamento
+QUADROS_TRACEMALLOC = 1
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BIBLIOTECA_PADRAO = os.path.dirname(os.__file__)
+
+
+# Perfil de CPU (cProfile) e das alocações (tracemalloc) de um trecho de
+# código, normalmente uma execução da página. Os dois valem para o processo
+# inteiro (o cProfile do Python 3.12 vê todas as threads e só admite um
+# perfilador ativo), então só um perfilamento roda por vez; enquanto ele
+# roda, as execuções das outras sessões também entram no perfil.
+class Perfilador:
+    def __init__(self, top_n=TOP_N_PADRAO):
+        self.top_n = top_n
+        self._trava = threading.Lock()
+
+    @contextmanager
+    def perfilar(self, ativo=True):
+        # O dicionário devolvido é preenchido ao fim do bloco (vazio quando
+        # ativo=False; com "ocupado" quando outro perfilamento estava rodando)
+        perfil = {}
+        if not ativo:
+            yield perfil
+            return
+        if not self._trava.acquire(blocking=False):
+            perfil["ocupado"] = True
+            yield perfil
+            return
+
+        ja_rastreando = tracemalloc.is_tracing()
+        if not ja_rastreando:
+            tracemalloc.start(QUADROS_TRACEMALLOC)
+        tracemalloc.reset_peak()
+        perfilador = cProfile.Profile()
+        momento = datetime.now()
+        inicio = time.perf_counter()
+        try:
+            perfilador.enable()
+            cpu_ativo = True
+        except ValueError:
+            # Outra ferramenta (depurador, profiler externo) já está ativa
+            cpu_ativo = False
+        try:
+            yield perfil
+        finally:
+            if cpu_ativo:
+                perfilador.disable()
+            duracao = time.perf_counter() - inicio
+            _, pico = tracemalloc.get_traced_memory()
+            foto = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                tracemalloc.Filter(False, "<unknown>"),
+            ))
+            if not ja_rastreando:
+                tracemalloc.stop()
+            self._trava.release()
+            perfil.update(self._resumir(perfilador if cpu_ativo else None, foto, momento, duracao, pico))
+
+    def _resumir(self, perfilador, foto, momento, duracao, pico):
+        # Tabelas dos top_n pontos quentes e os arquivos para baixar: .prof
+        # (formato do pstats, abre no snakeviz) e a foto do tracemalloc
+        # (tracemalloc.Snapshot.load)
+        estatisticas = pstats.Stats(perfilador).stats if perfilador is not None else {}
+        cpu = pd.DataFrame(
+            [(self._local(arquivo, linha, funcao), chamadas, proprio * 1000, acumulado * 1000)
+             for (arquivo, linha, funcao), (_, chamadas, proprio, acumulado, _) in estatisticas.items()],
+            columns=["funcao", "chamadas", "proprio_ms", "acumulado_ms"])
+
+        por_linha = foto.statistics("lineno")
+        alocacoes = pd.DataFrame(
+            [(self._local(e.traceback[0].filename, e.traceback[0].lineno), e.size / 1024, e.count)
+             for e in por_linha[:self.top_n]],
+            columns=["linha", "kb", "blocos"])
+
+        return {
+            "momento": momento.isoformat(timespec="seconds"),
+            "duracao_ms": duracao * 1000,
+            "pico_mb": pico / 1024 ** 2,
+            "alocado_mb": sum(e.size for e in por_linha) / 1024 ** 2,
+            "cpu_proprio": cpu.nlargest(self.top_n, "proprio_ms").reset_index(drop=True),
+            "cpu_acumulado": cpu.nlargest(self.top_n, "acumulado_ms").reset_index(drop=True),
+            "alocacoes": alocacoes,
+            "arquivo_cpu": marshal.dumps(estatisticas) if estatisticas else None,
+            "arquivo_memoria": pickle.dumps(foto),
+        }
+
+    @staticmethod
+    def _local(arquivo, linha, funcao=None):
+        # Caminho curto: relativo ao projeto, a partir do site-packages ou
+        # relativo à biblioteca padrão
+        if "site-packages" in arquivo:
+            arquivo = arquivo.split("site-packages" + os.sep, 1)[-1]
+        elif arquivo.startswith(RAIZ):
+            arquivo = os.path.relpath(arquivo, RAIZ)
+        elif arquivo.startswith(BIBLIOTECA_PADRAO):
+            arquivo = os.path.relpath(arquivo, BIBLIOTECA_PADRAO)
+        if funcao is None:
+            return f"{arquivo}:{linha}"
+        return f"{arquivo}:{linha}({funcao})" if arquivo != "~" else funcao
+
+
+perfilador = Perfilador()
@@ -0,0 +1,31 @@
+import io
+import os
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from controller.AcidenteController import AcidenteController
+from controller.CacheDados import cache_dados
+
+
+@pytest.fixture
+def controller(tmp_path, monkeypatch):
+    # Controller sem banco consolidado, numa pasta temporária com data/ vazia
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    cache_dados.invalidar()
+    yield AcidenteController(consolidado=False)
+    cache_dados.invalidar()
+
+
+@pytest.fixture
+def carregar(controller):
+    # Grava um DataFrame no formato da PRF como se fosse o upload de uma
+    # planilha CSV (";", latin1); devolve o resultado de processar_planilha
+    def carregar(df, nome_arquivo="acidentes_2024.csv", incremental=False):
+        planilha = io.BytesIO(df.to_csv(sep=";", index=False).encode("latin1"))
+        return controller.processar_planilha(planilha, nome_arquivo=nome_arquivo, incremental=incremental)
+    return carregar
@@ -0,0 +1,87 @@
+import sqlite3
+
+import pytest
+
+from benchmarks.dados_sinteticos import gerar_acidentes
+from controller.AcidenteController import MEDIDAS_SERIES
+from Model.AcidenteModel import AcidenteModel
+
+BANCO = "acidentes_2024.db"
+SEM_COORDENADAS = 25
+
+
+@pytest.fixture(autouse=True)
+def acidentes(carregar):
+    df = gerar_acidentes(300, 2024, fracao_sujas=0, fracao_pa=0.8)
+    df.loc[df.index[:SEM_COORDENADAS], "latitude"] = ""
+    carregar(df)
+
+
+def _totais(controller):
+    metricas = controller.metricas_gerais(BANCO)
+    por_municipio = controller.agregar(BANCO, ["municipio"])
+    return metricas, int(por_municipio["total_acidentes"].sum())
+
+
+def test_totais_contam_so_acidentes_com_coordenadas(controller, monkeypatch):
+    linhas = controller.listar_dados_por_banco(BANCO)
+    metricas, soma_municipios = _totais(controller)
+    assert metricas["total_acidentes"] == soma_municipios == len(linhas)
+    assert metricas["total_mortos"] == linhas["mortos"].sum()
+
+    # Sem cubo, a consulta direto em acidentes dá o mesmo resultado
+    monkeypatch.setattr(AcidenteModel, "cubos_disponiveis", lambda self: [])
+    assert _totais(controller) == (metricas, soma_municipios)
+
+
+def test_detalhe_do_municipio_conta_como_os_graficos(controller):
+    banco = sqlite3.connect(f"data/{BANCO}")
+    municipio, sem_coordenadas = banco.execute(
+        "SELECT municipio, COUNT(*) FROM acidentes WHERE uf = 'PA' AND latitude IS NULL "
+        "GROUP BY municipio ORDER BY 2 DESC LIMIT 1").fetchone()
+    assert sem_coordenadas > 0
+
+    linhas = controller.listar_dados_por_banco(BANCO)
+    linhas = linhas[linhas["municipio"] == municipio]
+    detalhe = controller.dados_por_municipio(BANCO, municipio)
+    assert int(detalhe.loc[0, "total_acidentes"]) == len(linhas)
+    assert int(detalhe.loc[0, "total_mortos"]) == linhas["mortos"].sum()
+    por_mes = controller.agregar(BANCO, ["mes"], filtros={"municipio": municipio})
+    assert int(detalhe.loc[0, "total_acidentes"]) == por_mes["total_acidentes"].sum()
+
+
+def test_cubo_de_versao_anterior_e_recriado(controller):
+    metricas = controller.metricas_gerais(BANCO)
+    banco = sqlite3.connect(f"data/{BANCO}")
+    banco.execute("ALTER TABLE cubo_estado DROP COLUMN versao")
+    banco.execute("UPDATE cubo_total SET total_acidentes = total_acidentes + 1000")
+    banco.commit()
+    banco.close()
+
+    # O cubo antigo não é usado até ser recriado
+    model = AcidenteModel(f"data/{BANCO}")
+    assert model.cubos_disponiveis() == []
+    assert controller.metricas_gerais(BANCO) == metricas
+
+    with AcidenteModel(f"data/{BANCO}", escrita=True) as escrita:
+        escrita.atualizar_cubo()
+    assert model.cubo_atualizado()
+    assert controller.metricas_gerais(BANCO) == metricas
+    total = model.consultar("SELECT SUM(total_acidentes) AS n FROM cubo_total")["n"][0]
+    assert total == metricas["total_acidentes"]
+
+
+def test_fonte_csv_agrega_como_o_banco(controller, carregar):
+    # O mesmo arquivo como fonte .csv da pasta data e carregado num banco anual
+    df = gerar_acidentes(200, 2021, fracao_sujas=0.1, fracao_pa=0.8, semente=7)
+    df.to_csv("data/extra_2021.csv", sep=";", index=False, encoding="latin1")
+    carregar(df, nome_arquivo="acidentes_2021.csv")
+
+    metricas = controller.metricas_gerais("extra_2021.csv")
+    assert metricas["total_acidentes"] == len(controller.listar_dados_por_banco("extra_2021.csv")) > 0
+    assert metricas == controller.metricas_gerais("acidentes_2021.db")
+
+    for agrupar_por in (["municipio"], ["mes", "dia_semana_numero"], ["hora"]):
+        csv = controller.agregar("extra_2021.csv", agrupar_por, medidas=MEDIDAS_SERIES)
+        banco = controller.agregar("acidentes_2021.db", agrupar_por, medidas=MEDIDAS_SERIES)
+        assert csv.astype(str).equals(banco.astype(str))
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from controller.AgregacaoEspacial import AgregacaoEspacial
+
+
+@pytest.fixture
+def pontos():
+    gerador = np.random.default_rng(0)
+    n = 6000
+    return pd.DataFrame({
+        "latitude": -3 + gerador.normal(0, 1.5, n),
+        "longitude": -50 + gerador.normal(0, 1.5, n),
+        "mortos": gerador.integers(0, 3, n),
+        "feridos_graves": gerador.integers(0, 2, n),
+        "ano": gerador.choice(["2023", "2024"], n),
+    })
+
+
+@pytest.mark.parametrize("forma", ["grade", "hexagono"])
+def test_totais_e_somas_preservados(pontos, forma):
+    celulas = AgregacaoEspacial().agrupar(pontos, 6, forma=forma, somas=["mortos", "feridos_graves"])
+    assert celulas["total_acidentes"].sum() == len(pontos)
+    assert celulas["mortos"].sum() == pontos["mortos"].sum()
+    assert celulas["feridos_graves"].sum() == pontos["feridos_graves"].sum()
+    assert celulas["total_acidentes"].is_monotonic_decreasing
+
+
+def test_pontos_sem_coordenada_ficam_de_fora(pontos):
+    pontos.loc[:9, "latitude"] = np.nan
+    celulas = AgregacaoEspacial().agrupar(pontos, 6)
+    assert celulas["total_acidentes"].sum() == len(pontos) - 10
+
+
+def test_centro_proximo_dos_pontos():
+    # Pontos do mesmo lugar caem em uma célula cujo centro fica a menos de
+    # meia célula deles
+    df = pd.DataFrame({"latitude": [-1.45] * 5, "longitude": [-48.49] * 5})
+    for forma in ["grade", "hexagono"]:
+        celulas = AgregacaoEspacial().agrupar(df, 8, forma=forma)
+        assert celulas["total_acidentes"].tolist() == [5]
+        assert abs(celulas.loc[0, "latitude"] + 1.45) < 0.1
+        assert abs(celulas.loc[0, "longitude"] + 48.49) < 0.1
+
+
+def test_grade_e_hexagono_formam_celulas_diferentes(pontos):
+    agregacao = AgregacaoEspacial()
+    grade = agregacao.agrupar(pontos, 6, forma="grade")
+    hexagono = agregacao.agrupar(pontos, 6, forma="hexagono")
+    assert len(grade) != len(hexagono)
+    with pytest.raises(ValueError):
+        agregacao.agrupar(pontos, 6, forma="circulo")
+
+
+def test_zoom_maior_gera_mais_celulas(pontos):
+    agregacao = AgregacaoEspacial()
+    quantidades = [len(agregacao.agrupar(pontos, zoom, forma="hexagono")) for zoom in [4, 6, 8]]
+    assert quantidades == sorted(quantidades)
+    assert quantidades[0] < quantidades[-1]
+
+
+def test_zoom_pedido_vale_mesmo_acima_do_maximo(pontos):
+    # As células não são aumentadas para caber no máximo; o mapa só avisa
+    agregacao = AgregacaoEspacial(maximo_celulas=50)
+    celulas = agregacao.agrupar(pontos, 9, forma="hexagono")
+    assert len(celulas) > 50
+    assert agregacao.celulas_demais(celulas)
+    assert len(celulas) == len(AgregacaoEspacial().agrupar(pontos, 9, forma="hexagono"))
+    assert not AgregacaoEspacial().celulas_demais(AgregacaoEspacial().agrupar(pontos, 4))
+
+
+def test_celulas_separadas_pela_coluna_de_cor(pontos):
+    agregacao = AgregacaoEspacial()
+    por_ano = agregacao.agrupar(pontos, 6, forma="hexagono", somas=["mortos"], por="ano")
+    assert set(por_ano["ano"]) == {"2023", "2024"}
+    assert por_ano.groupby("ano")["total_acidentes"].sum().to_dict() == \
+        pontos["ano"].value_counts().to_dict()
+    assert por_ano.groupby("ano")["mortos"].sum().to_dict() == \
+        pontos.groupby("ano")["mortos"].sum().to_dict()
+
+    # Cada ano tem as mesmas células que teria sozinho
+    so_2024 = agregacao.agrupar(pontos[pontos["ano"] == "2024"], 6, forma="hexagono")
+    do_2024 = por_ano[por_ano["ano"] == "2024"]
+    assert sorted(do_2024["total_acidentes"]) == sorted(so_2024["total_acidentes"])
+    assert len(por_ano) >= len(agregacao.agrupar(pontos, 6, forma="hexagono"))
@@ -0,0 +1,65 @@
+import math
+
+import pytest
+
+from benchmarks.dados_sinteticos import gerar_acidentes
+from controller.AcidenteController import AcidenteController, RAIO_TERRA_KM
+from Model.AcidenteModel import AcidenteModel
+
+# Centro das buscas (Belém) e pontos a distâncias conhecidas na esfera da
+# distância haversine: ao norte, a leste e logo fora do raio de 10 km
+LATITUDE = -1.4558
+LONGITUDE = -48.4902
+BANCO = "acidentes_2024.db"
+
+
+def _ao_norte(km):
+    return LATITUDE + math.degrees(km / RAIO_TERRA_KM), LONGITUDE
+
+
+def _a_leste(km):
+    graus = 2 * math.asin(math.sin(km / (2 * RAIO_TERRA_KM)) / math.cos(math.radians(LATITUDE)))
+    return LATITUDE, LONGITUDE + math.degrees(graus)
+
+
+PONTOS = [_ao_norte(9.995), _a_leste(9.995), _ao_norte(10.01), _a_leste(10.01), (LATITUDE, LONGITUDE)]
+
+
+@pytest.fixture(autouse=True)
+def acidentes(carregar):
+    df = gerar_acidentes(len(PONTOS), 2024, fracao_sujas=0, fracao_pa=1)
+    df["municipio"] = ["NORTE", "LESTE", "FORA NORTE", "FORA LESTE", "CENTRO"]
+    df["latitude"] = [f"{lat:.9f}".replace(".", ",") for lat, _ in PONTOS]
+    df["longitude"] = [f"{lon:.9f}".replace(".", ",") for _, lon in PONTOS]
+    carregar(df)
+
+
+@pytest.mark.parametrize("indice", [True, False])
+def test_raio_inclui_acidentes_na_borda(controller, monkeypatch, indice):
+    monkeypatch.setattr(AcidenteModel, "indice_espacial_atualizado", lambda self: indice)
+    df = controller.acidentes_no_raio(BANCO, LATITUDE, LONGITUDE, 10)
+    assert sorted(df["municipio"]) == ["CENTRO", "LESTE", "NORTE"]
+    assert df["distancia_km"].max() == pytest.approx(9.995, abs=1e-3)
+
+
+def test_mais_proximos_na_ordem_da_distancia(controller):
+    df = controller.acidentes_mais_proximos(BANCO, LATITUDE, LONGITUDE, k=3)
+    assert list(df["municipio"]) in (["CENTRO", "NORTE", "LESTE"], ["CENTRO", "LESTE", "NORTE"])
+
+
+@pytest.mark.parametrize("indice", [True, False])
+def test_area_sem_colunas_de_coordenadas(controller, monkeypatch, indice):
+    # Sem índice espacial o filtro lê as coordenadas mesmo que colunas não as peça
+    monkeypatch.setattr(AcidenteModel, "indice_espacial_atualizado", lambda self: indice)
+    df = controller.acidentes_na_area(BANCO, LATITUDE - 0.1, LATITUDE + 0.1,
+                                      LONGITUDE - 0.1, LONGITUDE + 0.1, colunas=["municipio"])
+    assert list(df.columns) == ["municipio", "ano"]
+    assert len(df) == len(PONTOS)
+
+
+def test_caixa_contem_o_circulo_longe_do_equador():
+    lat_min, lat_max, lon_min, lon_max = AcidenteController._caixa_do_raio(-60, -48, 100)
+    borda = 2 * math.degrees(math.asin(math.sin(100 / (2 * RAIO_TERRA_KM)) / math.cos(math.radians(-60))))
+    assert lon_max - (-48) >= borda
+    assert lat_max - (-60) >= math.degrees(100 / RAIO_TERRA_KM)
+    assert AcidenteController._caixa_do_raio(-89.95, 0, 10)[2:] == (-180, 180)
@@ -0,0 +1,99 @@
+import threading
+
+import pandas as pd
+
+from controller.CacheDados import CacheDados
+
+
+def _quadro(colunas, linhas=1000):
+    return pd.DataFrame({c: range(linhas) for c in colunas})
+
+
+class Leitor:
+    # Fonte falsa de dados: conta as leituras e as colunas pedidas em cada uma
+    def __init__(self, colunas=("a", "b", "c")):
+        self.colunas = list(colunas)
+        self.leituras = []
+
+    def __call__(self, pedidas):
+        self.leituras.append(pedidas)
+        return _quadro(self.colunas if pedidas is None else [c for c in pedidas if c in self.colunas])
+
+
+def test_remove_o_item_usado_ha_mais_tempo():
+    tamanho = int(_quadro(["a", "b", "c"]).memory_usage(deep=True).sum())
+    cache = CacheDados(orcamento_mb=1)
+    cache.orcamento_bytes = 2 * tamanho
+    leitores = {chave: Leitor() for chave in "xyz"}
+
+    cache.obter("x", [], leitores["x"])
+    cache.obter("y", [], leitores["y"])
+    cache.obter("x", [], leitores["x"])
+    cache.obter("z", [], leitores["z"])
+
+    # y era o menos usado recentemente; x continua no cache
+    assert cache.estatisticas()["remocoes"] == 1
+    cache.obter("x", [], leitores["x"])
+    cache.obter("y", [], leitores["y"])
+    assert len(leitores["x"].leituras) == 1
+    assert len(leitores["y"].leituras) == 2
+    assert cache.estatisticas()["bytes_em_uso"] <= cache.orcamento_bytes
+
+
+def test_nova_versao_dos_dados_descarta_o_item(tmp_path):
+    arquivo = tmp_path / "acidentes_2024.db"
+    arquivo.write_bytes(b"")
+    cache = CacheDados()
+    leitor = Leitor()
+
+    cache.obter("x", [str(arquivo)], leitor, {str(arquivo): "1:2024-01-01"})
+    # O arquivo muda, mas a versão dos dados não: o item continua valendo
+    arquivo.write_bytes(b"ANALYZE")
+    cache.obter("x", [str(arquivo)], leitor, {str(arquivo): "1:2024-01-01"})
+    assert len(leitor.leituras) == 1
+
+    cache.obter("x", [str(arquivo)], leitor, {str(arquivo): "2:2024-02-01"})
+    assert len(leitor.leituras) == 2
+    assert cache.estatisticas()["itens"] == 1
+
+
+def test_colunas_recortadas_de_um_unico_item():
+    cache = CacheDados()
+    leitor = Leitor()
+    tamanho_total = int(_quadro(["a", "b", "c"]).memory_usage(deep=True).sum())
+
+    assert list(cache.obter("x", [], leitor, colunas=["a"]).columns) == ["a"]
+    # Coluna nova: relê junto a que já estava guardada
+    assert list(cache.obter("x", [], leitor, colunas=["b"]).columns) == ["b"]
+    assert list(cache.obter("x", [], leitor, colunas=["b", "a"]).columns) == ["b", "a"]
+    assert leitor.leituras == [["a"], ["a", "b"]]
+
+    # Com o quadro inteiro guardado, qualquer recorte sai dele
+    assert list(cache.obter("x", [], leitor).columns) == ["a", "b", "c"]
+    assert list(cache.obter("x", [], leitor, colunas=["c", "inexistente"]).columns) == ["c"]
+    assert leitor.leituras == [["a"], ["a", "b"], None]
+    assert cache.estatisticas()["itens"] == 1
+    assert cache.estatisticas()["bytes_em_uso"] == tamanho_total
+
+
+def test_um_carregamento_por_chave_e_trava_descartada():
+    cache = CacheDados()
+    liberar = threading.Event()
+    leituras = []
+
+    def carregar(pedidas):
+        leituras.append(pedidas)
+        liberar.wait(5)
+        return _quadro(["a"])
+
+    sessoes = [threading.Thread(target=cache.obter, args=("x", [], carregar)) for _ in range(4)]
+    for sessao in sessoes:
+        sessao.start()
+    liberar.set()
+    for sessao in sessoes:
+        sessao.join()
+
+    assert len(leituras) == 1
+    assert cache._carregamentos == {}
+    estatisticas = cache.estatisticas()
+    assert (estatisticas["falhas"], estatisticas["acertos"]) == (1, 3)
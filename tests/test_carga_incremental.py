@@ -0,0 +1,66 @@
+import pandas as pd
+import pytest
+
+from benchmarks.dados_sinteticos import gerar_acidentes
+from Model.AcidenteModel import AcidenteModel
+
+BANCO = "acidentes_2024.db"
+COLUNAS = ["id", "municipio", "mortos", "feridos_graves", "latitude", "longitude"]
+
+
+def _estado(controller):
+    # Linhas, totais e uma agregação do ano, para comparar duas cargas
+    linhas = controller.listar_dados_por_banco(BANCO, COLUNAS).sort_values("id").reset_index(drop=True)
+    return (linhas.astype(str), controller.metricas_gerais(BANCO),
+            controller.agregar(BANCO, ["municipio"], ordenar_por="municipio").astype(str))
+
+
+@pytest.fixture
+def planilhas():
+    # Ano com 200 acidentes e uma planilha com a segunda metade (10 deles
+    # corrigidos) e 50 acidentes novos
+    todos = gerar_acidentes(250, 2024, fracao_sujas=0, fracao_pa=1)
+    base = todos.iloc[:200]
+    nova = todos.iloc[100:].copy()
+    corrigidas = nova.index[:10]
+    nova.loc[corrigidas, "mortos"] += 1
+    return base, nova
+
+
+def test_incremental_igual_a_substituir_pela_uniao(controller, carregar, planilhas):
+    base, nova = planilhas
+    carregar(base)
+    _, _, resumo = carregar(nova, incremental=True)
+    assert (resumo["inseridas"], resumo["atualizadas"], resumo["inalteradas"]) == (50, 10, 90)
+    incremental = _estado(controller)
+
+    carregar(pd.concat([base.iloc[:100], nova]))
+    substituido = _estado(controller)
+
+    assert incremental[0].equals(substituido[0])
+    assert incremental[1] == substituido[1]
+    assert incremental[2].equals(substituido[2])
+
+
+def test_cubo_da_carga_incremental_confere_com_a_tabela(controller, carregar, planilhas, monkeypatch):
+    base, nova = planilhas
+    carregar(base)
+    carregar(nova, incremental=True)
+    pelo_cubo = controller.metricas_gerais(BANCO)
+
+    monkeypatch.setattr(AcidenteModel, "cubos_disponiveis", lambda self: [])
+    assert controller.metricas_gerais(BANCO) == pelo_cubo
+    assert pelo_cubo["total_acidentes"] == 250
+
+
+def test_reenvio_incremental_nao_altera_nada(controller, carregar, planilhas):
+    base, nova = planilhas
+    carregar(base)
+    carregar(nova, incremental=True)
+    antes = _estado(controller)
+
+    # Mesmas linhas em outro arquivo (outra ordem): todas inalteradas
+    _, _, resumo = carregar(nova.iloc[::-1], incremental=True)
+    assert (resumo["inseridas"], resumo["atualizadas"], resumo["inalteradas"]) == (0, 0, 150)
+    depois = _estado(controller)
+    assert antes[0].equals(depois[0]) and antes[1] == depois[1]
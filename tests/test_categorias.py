@@ -0,0 +1,51 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.dados_sinteticos import gerar_acidentes
+from controller.DicionarioCategorias import DicionarioCategorias
+
+
+def test_codigos_estaveis_e_valores_preservados():
+    dicionario = DicionarioCategorias()
+    ano_1 = pd.Series(["BELEM", "MARABA", None, "BELEM"])
+    ano_2 = pd.Series(["ALTAMIRA", "BELEM", "ANANINDEUA"])
+
+    categorizada_1 = dicionario.categorizar(ano_1, "municipio")
+    codigos = categorizada_1.cat.codes.tolist()
+    categorizada_2 = dicionario.categorizar(ano_2, "municipio")
+
+    # Valores novos entram no fim: os códigos do primeiro ano não mudam
+    assert dicionario.alinhar(pd.DataFrame({"municipio": categorizada_1}))["municipio"].cat.codes.tolist() == codigos
+    assert list(dicionario.categorias("municipio")[:2]) == ["BELEM", "MARABA"]
+
+    juntos = pd.concat([dicionario.alinhar(pd.DataFrame({"municipio": s})) for s in (categorizada_1, categorizada_2)],
+                       ignore_index=True)["municipio"]
+    assert isinstance(juntos.dtype, pd.CategoricalDtype)
+    esperado = pd.concat([ano_1, ano_2], ignore_index=True)
+    assert juntos.astype(object).where(juntos.notna(), None).tolist() == esperado.tolist()
+
+
+def test_br_numerica_vira_texto():
+    dicionario = DicionarioCategorias()
+    br = dicionario.categorizar(pd.Series([316.0, 10.0, np.nan]), "br")
+    assert br.astype(object).tolist()[:2] == ["316", "10"]
+    assert pd.isna(br.iloc[2])
+
+
+def test_quadro_compacto_tem_os_valores_do_banco(controller, carregar):
+    carregar(gerar_acidentes(300, 2024, fracao_sujas=0, fracao_pa=1))
+    colunas = ["id", "municipio", "causa_acidente", "data_inversa", "br", "mortos", "latitude"]
+    df = controller.listar_dados_por_banco("acidentes_2024.db", colunas).sort_values("id")
+
+    assert isinstance(df["municipio"].dtype, pd.CategoricalDtype)
+    assert df["mortos"].dtype.itemsize < 8 and df["latitude"].dtype == "float32"
+
+    banco = sqlite3.connect("data/acidentes_2024.db")
+    original = pd.read_sql(f"SELECT {', '.join(colunas)} FROM acidentes ORDER BY id", banco)
+    banco.close()
+    for coluna in ["municipio", "causa_acidente", "data_inversa", "br"]:
+        assert df[coluna].astype(str).tolist() == original[coluna].astype(str).tolist()
+    assert df["mortos"].tolist() == original["mortos"].tolist()
+    assert np.allclose(df["latitude"], original["latitude"], atol=1e-5)
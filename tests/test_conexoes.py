@@ -0,0 +1,86 @@
+import os
+import sqlite3
+
+import pytest
+
+from Model.GerenciadorConexoes import GerenciadorConexoes
+
+
+@pytest.fixture
+def banco(tmp_path):
+    caminho = str(tmp_path / "acidentes_2024.db")
+    conexao = sqlite3.connect(caminho)
+    conexao.execute("CREATE TABLE acidentes (id INTEGER)")
+    conexao.execute("INSERT INTO acidentes VALUES (1)")
+    conexao.commit()
+    conexao.close()
+    return caminho
+
+
+def test_leitura_reaproveita_a_conexao_livre(banco):
+    gerenciador = GerenciadorConexoes()
+    with gerenciador.leitura(banco) as primeira:
+        pass
+    with gerenciador.leitura(banco) as segunda:
+        assert segunda is primeira
+        # Uma conexão em uso não é entregue a outro pedido
+        with gerenciador.leitura(banco) as terceira:
+            assert terceira is not primeira
+    assert gerenciador.estatisticas()["leitura_livres"] == 2
+
+
+def test_leitura_e_somente_leitura_e_descartada_apos_erro(banco):
+    gerenciador = GerenciadorConexoes()
+    with pytest.raises(sqlite3.OperationalError):
+        with gerenciador.leitura(banco) as conexao:
+            conexao.execute("INSERT INTO acidentes VALUES (2)")
+    with gerenciador.leitura(banco) as nova:
+        assert nova is not conexao
+        assert nova.execute("SELECT COUNT(*) FROM acidentes").fetchone()[0] == 1
+
+
+def test_arquivo_recriado_abre_nova_conexao(banco):
+    gerenciador = GerenciadorConexoes()
+    with gerenciador.leitura(banco) as antiga:
+        pass
+
+    # Um novo upload grava o banco em outro arquivo e o põe no lugar
+    temporario = banco + ".novo"
+    conexao = sqlite3.connect(temporario)
+    conexao.execute("CREATE TABLE acidentes (id INTEGER)")
+    conexao.executemany("INSERT INTO acidentes VALUES (?)", [(1,), (2,), (3,)])
+    conexao.commit()
+    conexao.close()
+    os.replace(temporario, banco)
+
+    with gerenciador.leitura(banco) as conexao:
+        assert conexao is not antiga
+        assert conexao.execute("SELECT COUNT(*) FROM acidentes").fetchone()[0] == 3
+
+
+def test_limite_de_livres_e_ociosas(banco):
+    gerenciador = GerenciadorConexoes(maximo_livres=1)
+    with gerenciador.leitura(banco), gerenciador.leitura(banco):
+        pass
+    assert gerenciador.estatisticas()["leitura_livres"] == 1
+
+    gerenciador.tempo_ocioso = -1
+    gerenciador.reservar_escrita(banco)
+    gerenciador.liberar_escrita(banco)
+    with gerenciador.leitura(banco):
+        # A livre e a de escrita liberada estavam ociosas e foram fechadas
+        assert gerenciador.estatisticas()["leitura_livres"] == 0
+        assert gerenciador.estatisticas()["escrita_abertas"] == 0
+
+
+def test_escrita_reservada_por_uma_thread(banco):
+    gerenciador = GerenciadorConexoes()
+    conexao = gerenciador.reservar_escrita(banco)
+    assert gerenciador.reservar_escrita(banco) is conexao
+    conexao.execute("INSERT INTO acidentes VALUES (2)")
+    conexao.commit()
+    gerenciador.liberar_escrita(banco)
+    gerenciador.liberar_escrita(banco)
+
+    with gerenciador.leitura(banco) as leitura:
+        assert leitura.execute("SELECT COUNT(*) FROM acidentes").fetchone()[0] == 2
@@ -0,0 +1,55 @@
+import os
+import sqlite3
+
+from benchmarks.dados_sinteticos import gerar_acidentes
+from controller.AcidenteController import AcidenteController
+from Model.ConsolidadoModel import ConsolidadoModel, CAMINHO_CONSOLIDADO
+
+ANOS = ["2023", "2024"]
+
+
+def _carregar_anos(carregar):
+    for semente, ano in enumerate(ANOS):
+        carregar(gerar_acidentes(150, int(ano), fracao_sujas=0, semente=semente),
+                 nome_arquivo=f"acidentes_{ano}.csv")
+
+
+def test_leituras_nao_criam_nem_sincronizam_o_consolidado(controller, carregar):
+    _carregar_anos(carregar)
+    consolidado = AcidenteController(consolidado=True)
+
+    assert not consolidado.consolidado_atualizado()
+    assert consolidado.metricas_gerais(None) == controller.metricas_gerais(None)
+    assert len(consolidado.listar_dados_consolidados_todos_anos()) == \
+        len(controller.listar_dados_consolidados_todos_anos())
+    assert not os.path.exists(CAMINHO_CONSOLIDADO)
+
+    consolidado.sincronizar_consolidado()
+    assert consolidado.consolidado_atualizado()
+    assert consolidado.metricas_gerais(None) == controller.metricas_gerais(None)
+
+
+def test_consolidado_segue_a_versao_dos_dados(controller, carregar, monkeypatch):
+    _carregar_anos(carregar)
+    consolidado = AcidenteController(consolidado=True)
+    consolidado.sincronizar_consolidado()
+
+    # ANALYZE muda o arquivo do ano, mas não os dados: nada é copiado de novo
+    banco = sqlite3.connect("data/acidentes_2024.db")
+    banco.execute("ANALYZE")
+    banco.close()
+    copias = []
+    trocar_particao = ConsolidadoModel.trocar_particao
+    monkeypatch.setattr(ConsolidadoModel, "trocar_particao",
+                        lambda self, ano, *args: copias.append(ano) or trocar_particao(self, ano, *args))
+    assert consolidado.consolidado_atualizado()
+    consolidado.sincronizar_consolidado()
+    assert copias == []
+
+    # Uma carga que muda as linhas do ano troca só a partição dele, ao terminar
+    carregar(gerar_acidentes(20, 2024, fracao_sujas=0, semente=9), nome_arquivo="acidentes_2024.csv",
+             incremental=True)
+    assert not consolidado.consolidado_atualizado()
+    consolidado.sincronizar_consolidado()
+    assert copias == ["2024"]
+    assert consolidado.metricas_gerais(None) == controller.metricas_gerais(None)
@@ -0,0 +1,84 @@
+import io
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from benchmarks.dados_sinteticos import gerar_acidentes
+
+BANCO = "data/acidentes_2024.db"
+UFS = ["PA", " PA", "pa", "PA ", " Pa ", "AM", "", "PAR"]
+
+
+def _planilha(formato):
+    df = gerar_acidentes(len(UFS), 2024, fracao_sujas=0, fracao_pa=1)
+    df["uf"] = UFS
+    if formato == "xlsx":
+        arquivo = io.BytesIO()
+        df.to_excel(arquivo, index=False)
+    else:
+        arquivo = io.BytesIO(df.to_csv(sep=";", index=False).encode("latin1"))
+    arquivo.seek(0)
+    return arquivo, df
+
+
+def _gravadas():
+    banco = sqlite3.connect(BANCO)
+    try:
+        return banco.execute("SELECT id, uf FROM acidentes ORDER BY id").fetchall()
+    finally:
+        banco.close()
+
+
+@pytest.mark.parametrize("formato", ["csv", "xlsx"])
+def test_uf_com_espacos_ou_minusculas(controller, formato):
+    arquivo, df = _planilha(formato)
+    controller.processar_planilha(arquivo, nome_arquivo=f"acidentes_2024.{formato}")
+    esperados = sorted(int(i) for i in df["id"][:5])
+    assert _gravadas() == [(i, "PA") for i in esperados]
+
+
+def test_csv_e_xlsx_gravam_as_mesmas_linhas(controller):
+    gravadas = []
+    for formato in ["csv", "xlsx"]:
+        arquivo, _ = _planilha(formato)
+        controller.processar_planilha(arquivo, nome_arquivo=f"acidentes_2024.{formato}")
+        gravadas.append(controller.listar_dados_por_banco("acidentes_2024.db")[["id", "municipio", "mortos"]]
+                        .astype(str).sort_values("id").reset_index(drop=True))
+    assert gravadas[0].equals(gravadas[1])
+
+
+def _xlsx_tipado(df):
+    # Como o Excel grava: números, datas e horários como células tipadas
+    tipado = df.copy()
+    for coluna in ["latitude", "longitude"]:
+        tipado[coluna] = tipado[coluna].str.replace(",", ".").astype(float)
+    for coluna in ["mortos", "feridos_graves", "veiculos", "pessoas"]:
+        tipado[coluna] = tipado[coluna].astype(int)
+    tipado["data_inversa"] = pd.to_datetime(tipado["data_inversa"])
+    tipado["horario"] = pd.to_datetime(tipado["horario"], format="%H:%M:%S").dt.time
+    arquivo = io.BytesIO()
+    tipado.to_excel(arquivo, index=False)
+    arquivo.seek(0)
+    return arquivo
+
+
+def test_xlsx_tipado_em_blocos_igual_ao_csv(controller, carregar, tmp_path):
+    df = gerar_acidentes(120, 2024, fracao_sujas=0, fracao_pa=0.6)
+    colunas = ["id", "municipio", "data_inversa", "horario", "mortos", "veiculos", "latitude", "longitude"]
+
+    carregar(df)
+    pelo_csv = controller.listar_dados_por_banco("acidentes_2024.db", colunas).sort_values("id")
+
+    # Blocos pequenos: a planilha é lida em vários pedaços
+    controller.processar_planilha(_xlsx_tipado(df), tamanho_bloco=7, nome_arquivo="acidentes_2024.xlsx")
+    pelo_xlsx = controller.listar_dados_por_banco("acidentes_2024.db", colunas).sort_values("id")
+    assert pelo_xlsx.astype(str).reset_index(drop=True).equals(pelo_csv.astype(str).reset_index(drop=True))
+
+    # A conversão para CSV gera um arquivo que a carga do CSV lê igual
+    destino = tmp_path / "acidentes_2024.csv"
+    assert controller.converter_xlsx_para_csv(_xlsx_tipado(df), destino) == len(df)
+    with open(destino, "rb") as arquivo:
+        controller.processar_planilha(arquivo, nome_arquivo="acidentes_2024.csv")
+    convertido = controller.listar_dados_por_banco("acidentes_2024.db", colunas).sort_values("id")
+    assert convertido.astype(str).reset_index(drop=True).equals(pelo_csv.astype(str).reset_index(drop=True))
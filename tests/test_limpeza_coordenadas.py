@@ -0,0 +1,118 @@
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from controller.AcidenteController import AcidenteController
+
+
+def limpar_coordenadas_linha_a_linha(df):
+    # Implementação original (linha a linha), mantida aqui como referência
+    def _clean_numeric_string(val):
+        if pd.isna(val) or val == "":
+            return None
+        s = str(val).strip()
+        s = s.replace(",", ".")
+        m = re.search(r'-?\d+\.\d+', s)
+        if m:
+            try:
+                return float(m.group(0))
+            except:
+                return None
+        m2 = re.search(r'-?\d+', s)
+        if m2:
+            try:
+                return float(m2.group(0))
+            except:
+                return None
+        return None
+
+    lat_cols = [c for c in df.columns if 'lat' in c.lower()]
+    lon_cols = [c for c in df.columns if 'lon' in c.lower()
+                or 'long' in c.lower()]
+
+    if lat_cols:
+        for col in lat_cols:
+            df[col] = df[col].apply(_clean_numeric_string)
+            df = df[df[col].notna()]
+            df = df[(df[col] >= -90) & (df[col] <= 90)]
+
+    if lon_cols:
+        for col in lon_cols:
+            df[col] = df[col].apply(_clean_numeric_string)
+            df = df[df[col].notna()]
+            df = df[(df[col] >= -180) & (df[col] <= 180)]
+
+    if lat_cols and lat_cols[0] not in ['latitude']:
+        df.rename(columns={lat_cols[0]: 'latitude'}, inplace=True)
+    if lon_cols and lon_cols[0] not in ['longitude']:
+        df.rename(columns={lon_cols[0]: 'longitude'}, inplace=True)
+
+    if "coords" in df.columns and ("latitude" not in df.columns or "longitude" not in df.columns):
+        def _extract_lat_lon(s):
+            if pd.isna(s) or s == "":
+                return (None, None)
+            txt = str(s).replace(",", ".")
+            parts = re.findall(r'-?\d+\.\d+', txt)
+            if len(parts) >= 2:
+                lat = float(parts[0])
+                lon = float(parts[1])
+                if -90 <= lat <= 90 and -180 <= lon <= 180:
+                    return (lat, lon)
+            return (None, None)
+
+        latitudes = []
+        longitudes = []
+        for s in df["coords"]:
+            lat, lon = _extract_lat_lon(s)
+            latitudes.append(lat)
+            longitudes.append(lon)
+        df["latitude"] = latitudes
+        df["longitude"] = longitudes
+
+        df = df[df["latitude"].notna() & df["longitude"].notna()]
+
+    return df
+
+
+# Formas sujas encontradas nas planilhas: vírgula decimal, rótulo antes do
+# número, notação científica, vazios, fora da faixa, inteiros e espaços
+LATITUDES = ["-1,4558", "lat: -1,23", "1.5e-05", "-2.5E+01", "", "NA", None, np.nan, "999,0", "-91",
+             "-48", "  -1,5  ", "sem informação", "-0,000001", "12,", "1.234.567", "-", "45,5 S"]
+LONGITUDES = ["-48,4902", "lon: -48,49", "-4.8e+01", "2E-3", "-48,1", "-48,2", "-48,3", "-48,4", "-48,5",
+              "-48,6", "-181", "-48,7", "-48,8", "NA", "", "-48,9", "-48,0", "180,0"]
+
+COORDS = ["-1,45, -48,49", "(-1.45; -48.49)", "lat -1,45 lon -48,49", "", None, "NA", "sem números",
+          "-1,45", "-1,45 -48,49 12,3", "95,0 -48,49", "-1,45 -190,0", "-1 -48", "1.5e-05 -48,49"]
+
+
+def comparar(df):
+    esperado = limpar_coordenadas_linha_a_linha(df.copy())
+    obtido = AcidenteController()._limpar_coordenadas(df.copy())
+    pd.testing.assert_frame_equal(obtido, esperado, check_dtype=False)
+
+
+def test_latitude_e_longitude_em_texto():
+    comparar(pd.DataFrame({"id": range(len(LATITUDES)), "latitude": LATITUDES, "longitude": LONGITUDES}))
+
+
+def test_nomes_de_coluna_alternativos():
+    comparar(pd.DataFrame({"id": range(len(LATITUDES)), "Lat": LATITUDES, "Long": LONGITUDES}))
+
+
+@pytest.mark.parametrize("valores", [
+    [-1.4558, 1.5e-05, 1e-20, -2.5e17, np.nan, 95.0, 0.0, -90.0],
+    [-1, 0, 91, 45],
+])
+def test_coordenadas_numericas(valores):
+    # Floats que o str() escreve em notação científica passam pela busca no texto
+    comparar(pd.DataFrame({"latitude": valores, "longitude": [-48.0] * len(valores)}))
+
+
+def test_coords_com_zero_um_ou_tres_numeros():
+    comparar(pd.DataFrame({"id": range(len(COORDS)), "coords": COORDS}))
+
+
+def test_somente_invalidas():
+    comparar(pd.DataFrame({"latitude": ["", "NA", None], "longitude": ["x", "", None]}))
@@ -0,0 +1,57 @@
+import os
+
+from benchmarks.dados_sinteticos import gerar_acidentes
+from Model.AcidenteModel import AcidenteModel
+
+BANCO = "data/acidentes_2024.db"
+
+
+def _cargas(controller):
+    return [(carga["modo"], carga["nome_arquivo"]) for carga in controller.listar_manifesto("acidentes_2024.db")]
+
+
+def test_reenvio_identico_nao_reprocessa(controller, carregar):
+    df = gerar_acidentes(100, 2024, fracao_sujas=0, fracao_pa=1)
+    carregar(df)
+    versao = AcidenteModel(BANCO).versao_dados()
+    mtime = os.stat(BANCO).st_mtime_ns
+
+    amostra, _, resumo = carregar(df)
+    assert resumo["identica"] and resumo["inalteradas"] == 100
+    assert amostra.empty
+    assert _cargas(controller) == [("substituir", "acidentes_2024.csv")]
+    assert AcidenteModel(BANCO).versao_dados() == versao
+    assert os.stat(BANCO).st_mtime_ns == mtime
+
+    # Depois de uma carga completa, o mesmo arquivo como incremental também não muda nada
+    _, _, resumo = carregar(df, incremental=True)
+    assert resumo["identica"]
+
+
+def test_mesmo_arquivo_depois_de_outro_e_reprocessado(controller, carregar):
+    primeiro = gerar_acidentes(100, 2024, fracao_sujas=0, fracao_pa=1)
+    segundo = gerar_acidentes(80, 2024, fracao_sujas=0, fracao_pa=1, semente=1)
+    carregar(primeiro)
+    carregar(segundo, nome_arquivo="acidentes_2024_b.csv")
+    versao = AcidenteModel(BANCO).versao_dados()
+
+    _, _, resumo = carregar(primeiro)
+    assert "identica" not in resumo
+    assert AcidenteModel(BANCO).versao_dados() != versao
+    assert controller.metricas_gerais("acidentes_2024.db")["total_acidentes"] == 100
+    assert [nome for _, nome in _cargas(controller)] == [
+        "acidentes_2024.csv", "acidentes_2024_b.csv", "acidentes_2024.csv"]
+
+
+def test_substituir_depois_de_incremental_reprocessa(controller, carregar):
+    # O último arquivo aplicado foi só mesclado: substituir o ano por ele
+    # apaga as linhas que vieram de antes, então precisa ser processado
+    base = gerar_acidentes(100, 2024, fracao_sujas=0, fracao_pa=1)
+    extra = gerar_acidentes(130, 2024, fracao_sujas=0, fracao_pa=1).iloc[100:]
+    carregar(base)
+    carregar(extra, incremental=True)
+    assert carregar(extra, incremental=True)[2]["identica"]
+
+    _, _, resumo = carregar(extra)
+    assert "identica" not in resumo
+    assert controller.metricas_gerais("acidentes_2024.db")["total_acidentes"] == 30
@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.dados_sinteticos import gerar_acidentes
+from controller.RankingTrechos import RankingTrechos, PESOS_PADRAO
+
+MEDIDAS = list(PESOS_PADRAO)
+
+
+def _trechos_aleatorios(semente, linhas=300):
+    gerador = np.random.default_rng(semente)
+    return pd.DataFrame({
+        "ano": gerador.choice(["2023", "2024"], linhas),
+        "br_numero": gerador.choice([10, 316, 230], linhas),
+        "km_trecho": gerador.integers(0, 60, linhas),
+        "total_acidentes": gerador.integers(1, 4, linhas),
+        "feridos_leves": gerador.integers(0, 3, linhas),
+        "feridos_graves": gerador.integers(0, 2, linhas),
+        "mortos": gerador.binomial(1, 0.1, linhas),
+    })
+
+
+def _ranking_ingenuo(trechos, janela_km, top_n):
+    # Mesma regra do RankingTrechos, janela por janela, sem NumPy
+    escolhidas = []
+    for br, grupo in trechos.groupby("br_numero"):
+        por_km = grupo.groupby("km_trecho")[MEDIDAS].sum()
+        inicio, fim = por_km.index.min(), por_km.index.max()
+        janelas = []
+        for km in range(inicio, max(fim - janela_km + 1, inicio) + 1):
+            somas = por_km.loc[(por_km.index >= km) & (por_km.index < km + janela_km)].sum()
+            if somas["total_acidentes"] > 0:
+                indice = sum(PESOS_PADRAO[m] * somas[m] for m in MEDIDAS)
+                janelas.append((-indice, -somas["total_acidentes"], km, somas))
+        ocupados = set()
+        for indice, _, km, somas in sorted(janelas, key=lambda j: j[:3]):
+            cobertos = set(range(km, km + janela_km))
+            if cobertos & ocupados:
+                continue
+            ocupados |= cobertos
+            escolhidas.append({"br_numero": br, "km_inicio": km, "km_fim": km + janela_km,
+                               **{m: int(somas[m]) for m in MEDIDAS}, "indice_gravidade": -indice})
+    resultado = pd.DataFrame(escolhidas).sort_values(
+        ["indice_gravidade", "total_acidentes", "br_numero", "km_inicio"],
+        ascending=[False, False, True, True]).head(top_n)
+    return resultado.reset_index(drop=True)
+
+
+@pytest.mark.parametrize("janela_km", [1, 3, 10, 80])
+@pytest.mark.parametrize("semente", [0, 1])
+def test_ranking_igual_ao_calculo_janela_por_janela(janela_km, semente):
+    trechos = _trechos_aleatorios(semente)
+    ranking = RankingTrechos().ranquear(trechos, janela_km, top_n=8)
+    esperado = _ranking_ingenuo(trechos, janela_km, 8)
+    assert ranking.drop(columns="posicao").astype("int64").equals(esperado.astype("int64"))
+    assert ranking["posicao"].tolist() == list(range(1, len(esperado) + 1))
+
+
+def test_trechos_escolhidos_nao_se_sobrepoem():
+    ranking = RankingTrechos().ranquear(_trechos_aleatorios(2), janela_km=5, top_n=30)
+    for _, grupo in ranking.groupby("br_numero"):
+        grupo = grupo.sort_values("km_inicio")
+        assert (grupo["km_inicio"].to_numpy()[1:] >= grupo["km_fim"].to_numpy()[:-1]).all()
+
+
+def test_ranking_por_ano():
+    trechos = _trechos_aleatorios(3)
+    ranking = RankingTrechos().ranquear(trechos, janela_km=2, top_n=5, por_ano=True)
+    for ano, grupo in ranking.groupby("ano"):
+        esperado = _ranking_ingenuo(trechos[trechos["ano"] == ano], 2, 5)
+        assert grupo.drop(columns=["ano", "posicao"]).reset_index(drop=True).astype("int64").equals(
+            esperado.astype("int64"))
+        assert grupo["posicao"].tolist() == list(range(1, len(esperado) + 1))
+
+
+def test_janela_invalida():
+    with pytest.raises(ValueError):
+        RankingTrechos().ranquear(_trechos_aleatorios(0), janela_km=0)
+
+
+def test_trechos_do_banco_conferem_com_as_linhas(controller, carregar):
+    carregar(gerar_acidentes(400, 2024, fracao_sujas=0, fracao_pa=1))
+    linhas = controller.listar_dados_por_banco("acidentes_2024.db", ["br", "km", "mortos"])
+    linhas = linhas.assign(br_numero=controller._para_br(linhas["br"]),
+                           km_trecho=np.floor(controller._para_km(linhas["km"])))
+    esperado = linhas.dropna(subset=["br_numero", "km_trecho"]).groupby(
+        ["br_numero", "km_trecho"]).agg(total_acidentes=("mortos", "size"), mortos=("mortos", "sum"))
+
+    trechos = controller.trechos("acidentes_2024.db").dropna(subset=["br_numero", "km_trecho"])
+    trechos = trechos.astype({"br_numero": "int64", "km_trecho": "int64"}).set_index(
+        ["br_numero", "km_trecho"]).sort_index()
+    assert len(esperado) > 10
+    assert trechos["total_acidentes"].tolist() == esperado["total_acidentes"].tolist()
+    assert trechos["mortos"].tolist() == esperado["mortos"].tolist()
+
+    # O ranking da página é o do RankingTrechos sobre esses trechos
+    criticos = controller.trechos_criticos("acidentes_2024.db", janela_km=5, top_n=5)
+    assert criticos.equals(RankingTrechos().ranquear(controller.trechos("acidentes_2024.db"), 5, 5))
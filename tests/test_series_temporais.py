@@ -0,0 +1,84 @@
+import pandas as pd
+import pytest
+
+from benchmarks.dados_sinteticos import gerar_acidentes
+from controller.SeriesTemporais import SeriesTemporais, DIAS_SEMANA
+
+BANCO = "acidentes_2024.db"
+
+
+@pytest.fixture
+def diaria():
+    return pd.DataFrame({
+        "ano": ["2023", "2023", "2024", "2024", "2024"],
+        "data_inversa": ["2023-01-02", "2023-12-31", "2024-02-29", "2024-03-01", "2024-03-01"],
+        "total_acidentes": [2, 1, 3, 1, 1],
+    })
+
+
+def test_dias_sem_acidente_entram_com_zero(diaria):
+    serie = SeriesTemporais().reamostrar(diaria, "dia")
+    assert serie.groupby("ano").size().to_dict() == {"2023": 365, "2024": 366}
+    assert serie.groupby("ano")["total_acidentes"].sum().to_dict() == {"2023": 3, "2024": 5}
+    dia = serie[serie["periodo"] == "2024-03-01"]
+    assert dia["total_acidentes"].tolist() == [2]
+
+
+def test_semanas_e_meses(diaria):
+    semanas = SeriesTemporais().reamostrar(diaria, "semana")
+    # Semanas de segunda a domingo: 31/12/2023 cai na semana de 25/12
+    assert (semanas["periodo"].dt.weekday == 0).all()
+    assert semanas.loc[semanas["periodo"] == "2023-12-25", "total_acidentes"].tolist() == [1]
+
+    meses = SeriesTemporais().reamostrar(diaria, "mes")
+    assert meses.groupby("ano").size().to_dict() == {"2023": 12, "2024": 12}
+    assert meses.loc[(meses["ano"] == "2024") & (meses["periodo"].dt.month == 3), "total_acidentes"].tolist() == [2]
+
+
+def test_anos_alinhados_no_mesmo_calendario(diaria):
+    serie = SeriesTemporais().reamostrar(diaria, "dia", alinhar=True)
+    assert (serie["periodo"].dt.year == 2000).all()
+    # 29 de fevereiro só existe em 2024, e continua no calendário comum
+    assert serie.loc[serie["periodo"] == "2000-02-29", "total_acidentes"].tolist() == [3]
+
+    semanas = SeriesTemporais().reamostrar(diaria, "semana", alinhar=True)
+    assert semanas.groupby("ano")["periodo"].nunique().to_dict() == {"2023": 53, "2024": 53}
+    assert semanas.groupby("ano")["total_acidentes"].sum().to_dict() == {"2023": 3, "2024": 5}
+
+
+def test_frequencia_invalida(diaria):
+    with pytest.raises(ValueError):
+        SeriesTemporais().reamostrar(diaria, "hora")
+
+
+def test_matriz_semana_hora():
+    contagens = pd.DataFrame({"dia_semana_numero": [0, 1, 1, 6, None], "hora": [23, 0, 0, 12, 5],
+                              "total_acidentes": [4, 1, 2, 3, 9]})
+    matriz = SeriesTemporais.matriz_semana_hora(contagens)
+    assert matriz.shape == (7, 24)
+    assert list(matriz.index) == list(DIAS_SEMANA.values())
+    assert matriz.loc["Domingo", 23] == 4 and matriz.loc["Segunda", 0] == 3 and matriz.loc["Sábado", 12] == 3
+    assert matriz.to_numpy().sum() == 10
+
+
+def test_series_do_banco_conferem_com_as_linhas(controller, carregar):
+    carregar(gerar_acidentes(500, 2024, fracao_sujas=0, fracao_pa=1))
+    linhas = controller.listar_dados_por_banco(BANCO, ["data_inversa", "horario", "municipio", "mortos"])
+    datas = pd.to_datetime(linhas["data_inversa"].astype(str))
+
+    meses = controller.serie_temporal(BANCO, "mes")
+    assert meses["total_acidentes"].tolist() == datas.dt.month.value_counts().reindex(
+        range(1, 13), fill_value=0).tolist()
+    assert meses["mortos"].sum() == linhas["mortos"].sum()
+
+    municipio = linhas["municipio"].astype(str).value_counts().index[0]
+    do_municipio = linhas["municipio"].astype(str) == municipio
+    dias = controller.serie_temporal(BANCO, "dia", municipio, mes=3)
+    assert len(dias) == 31 and dias["periodo"].dt.month.eq(3).all()
+    assert dias["total_acidentes"].sum() == (do_municipio & (datas.dt.month == 3)).sum()
+
+    matriz = controller.mapa_calor(BANCO, municipio)
+    assert matriz.to_numpy().sum() == do_municipio.sum()
+    segunda_8h = do_municipio & (datas.dt.weekday == 0) & \
+        (linhas["horario"].astype(str).str.slice(0, 2).astype(int) == 8)
+    assert matriz.loc["Segunda", 8] == segunda_8h.sum()
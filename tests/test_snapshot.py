@@ -0,0 +1,76 @@
+import os
+import shutil
+import threading
+
+import pandas as pd
+
+from benchmarks.dados_sinteticos import gerar_acidentes
+from Model.AcidenteModel import AcidenteModel
+from Model.SnapshotModel import SnapshotModel
+
+BANCO = "data/acidentes_2024.db"
+
+
+def _leituras_do_snapshot(monkeypatch):
+    leituras = []
+    ler = SnapshotModel.ler
+    monkeypatch.setattr(SnapshotModel, "ler", lambda self, colunas=None: leituras.append(colunas) or ler(self, colunas))
+    return leituras
+
+
+def test_snapshot_da_versao_atual_e_usado(controller, carregar, monkeypatch):
+    carregar(gerar_acidentes(100, 2024, fracao_sujas=0, fracao_pa=1))
+    assert SnapshotModel(BANCO).atualizado(AcidenteModel(BANCO).versao_dados())
+
+    leituras = _leituras_do_snapshot(monkeypatch)
+    df = controller.listar_dados_por_banco("acidentes_2024.db", ["municipio"])
+    assert leituras == [["municipio"]] and len(df) == 100
+
+
+def test_snapshot_de_outra_versao_e_regravado(controller, carregar, monkeypatch):
+    carregar(gerar_acidentes(100, 2024, fracao_sujas=0, fracao_pa=1))
+    shutil.copy("data/acidentes_2024.parquet", "antigo.parquet")
+    carregar(gerar_acidentes(60, 2024, fracao_sujas=0, fracao_pa=1, semente=3))
+
+    # Uma cópia de antes da última carga (gravação interrompida, por exemplo)
+    os.replace("antigo.parquet", "data/acidentes_2024.parquet")
+    versao = AcidenteModel(BANCO).versao_dados()
+    assert not SnapshotModel(BANCO).atualizado(versao)
+
+    leituras = _leituras_do_snapshot(monkeypatch)
+    assert len(controller.listar_dados_por_banco("acidentes_2024.db")) == 60
+    assert leituras == []
+    assert SnapshotModel(BANCO).atualizado(versao)
+    assert len(SnapshotModel(BANCO).ler()) == 60
+
+
+def test_sem_versao_vale_o_mtime(controller, carregar):
+    carregar(gerar_acidentes(10, 2024, fracao_sujas=0, fracao_pa=1))
+    snapshot = SnapshotModel(BANCO)
+    assert snapshot.atualizado()
+    info = os.stat(snapshot.caminho)
+    os.utime(BANCO, ns=(info.st_atime_ns, info.st_mtime_ns + 10 ** 9))
+    assert not snapshot.atualizado()
+
+
+def test_gravacoes_simultaneas_nao_deixam_temporarios(tmp_path):
+    snapshot = SnapshotModel(str(tmp_path / "acidentes_2024.db"))
+    quadros = [pd.DataFrame({"municipio": [f"M{i}"] * 5000, "mortos": range(5000)}) for i in range(4)]
+    erros = []
+
+    def gravar(df, versao):
+        try:
+            snapshot.gravar(df, versao)
+        except Exception as e:
+            erros.append(e)
+
+    gravacoes = [threading.Thread(target=gravar, args=(df, f"{i}:v")) for i, df in enumerate(quadros)]
+    for gravacao in gravacoes:
+        gravacao.start()
+    for gravacao in gravacoes:
+        gravacao.join()
+
+    assert erros == []
+    assert os.listdir(tmp_path) == ["acidentes_2024.parquet"]
+    df = snapshot.ler()
+    assert len(df) == 5000 and df["municipio"].nunique() == 1